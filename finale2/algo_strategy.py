@@ -49,13 +49,33 @@ class AlgoStrategy(gamelib.AlgoCore):
         TURRET_COST=1
         WALL_COST=3
         WALL_UPGRADE_COST=3
-        TURRET_DAMAGE_NORMAL= 3
-        TURRET_DAMAGE_UPGRADED=20
         BASE_STRUCTURE_POINT_INCOME=5
+        # Tuning constants, can be overridden with an ALGO_PARAMS env var or params.json (see scripts/contributions/sweep.py)
+        self.params = gamelib.load_params({
+            "center_goal_mp": 17,
+            "center_low_health_goal_mp": 14,
+            "base_min_mp": 8.99,
+            "max_min_mp": 19.99,
+            "wall_min_mp": 16.99,
+            "stagger_min_mp": 15,
+            "overflow_min_mp": 12,
+            "failure_mp": 3,
+            "turret_damage_normal": 3,
+            "turret_damage_upgraded": 20,
+            "predicted_attack_probability": 0.5,
+            "predicted_edge_share": 0.7,
+            "max_learned_failures": 2,
+        })
+        TURRET_DAMAGE_NORMAL = self.params["turret_damage_normal"]
+        TURRET_DAMAGE_UPGRADED = self.params["turret_damage_upgraded"]
         MP = 1
         SP = 0
         # This is a good place to do initial setup
         self.scored_on_locations = []
+        self.opponent_model = gamelib.OpponentModel(config)
+        self.knowledge = gamelib.KnowledgeStore()
+        self.signature = None
+        self.learned_failures = 0
         self.time = 0
         self.last_enemy_hp = 30
         self.lastMP = 0
@@ -96,10 +116,18 @@ class AlgoStrategy(gamelib.AlgoCore):
 
         
         game_state = gamelib.GameState(self.config, turn_state)
+        self.opponent_model.start_turn(game_state)
         
         gamelib.debug_write('Performing turn {} of your custom algo strategy'.format(game_state.turn_number))
         game_state.suppress_warnings(True)  #Comment or remove this line to enable warnings.
 
+        if game_state.turn_number == 1:
+            # the opponent's opening is on the board, start from what we learned against it before
+            self.signature = gamelib.opening_signature(game_state)
+            self.learned_failures = min(self.knowledge.get(self.signature).get("failures", 0), self.params["max_learned_failures"])
+            self.failures += self.learned_failures
+            self.disableMiddle = self.disableMiddle or self.failures > 0
+
         self.starter_strategy(game_state)
 
         game_state.submit_turn()
@@ -179,6 +207,14 @@ class AlgoStrategy(gamelib.AlgoCore):
         else:
             self.rightHit = False
 
+        # an enemy that keeps attacking from one edge heads for our opposite corner
+        edge, share = self.opponent_model.predict_edge()
+        if share >= self.params["predicted_edge_share"] and self.opponent_model.attack_probability() >= self.params["predicted_attack_probability"]:
+            if edge == game_state.game_map.TOP_RIGHT:
+                self.leftHit = True
+            elif edge == game_state.game_map.TOP_LEFT:
+                self.rightHit = True
+
         # Check for upgraded turrets from the enemy
         for x in range(0, 5):
             for y in range(14, 16):
@@ -220,9 +256,9 @@ class AlgoStrategy(gamelib.AlgoCore):
                 self.isLeft = False
                 self.isRight = False
                 self.centerHole = True
-                self.goalMP = 17
+                self.goalMP = self.params["center_goal_mp"]
                 if game_state.enemy_health <= 12:
-                    self.goalMP = max(14, game_state.enemy_health + 5)
+                    self.goalMP = max(self.params["center_low_health_goal_mp"], game_state.enemy_health + 5)
                 return
         self.dont_spawn = False
         self.centerHole = False
@@ -233,19 +269,19 @@ class AlgoStrategy(gamelib.AlgoCore):
             else:
                 self.isRight = True
         self.calculate_attack_parameters(game_state)
-        minMP = min(19.99, 8.99 + self.defaultValue)
+        minMP = min(self.params["max_min_mp"], self.params["base_min_mp"] + self.defaultValue)
         if (not self.isWallTactic and self.hasWall):
-            minMP = 16.99
+            minMP = self.params["wall_min_mp"]
         if game_state.enemy_health <= 12:
             minMP = max(minMP, game_state.enemy_health + 2 + self.defaultValue)
         else:
             minMP = max(minMP, math.ceil(game_state.enemy_health / 2) + 2 + self.defaultValue)
         if self.isStaggerTurret:
-            minMP = max(minMP, 15 + self.up_front + self.behindTurrets // 2)
+            minMP = max(minMP, self.params["stagger_min_mp"] + self.up_front + self.behindTurrets // 2)
         minMP += self.up_front + (self.behindTurrets + 1) // 2
         if minMP > 20:
-            minMP = self.defaultValue + 12
-        minMP += 3 * self.failures
+            minMP = self.defaultValue + self.params["overflow_min_mp"]
+        minMP += self.params["failure_mp"] * self.failures
         self.goalMP = minMP
         
     def decide_tower(self, game_state):
@@ -452,6 +488,13 @@ class AlgoStrategy(gamelib.AlgoCore):
             else:
                 break
         
+    def on_game_end(self, end_state):
+        if self.signature is not None:
+            # halve what was learned before and add this game's failures, so repeat games can't grow it without limit
+            failures = self.learned_failures // 2 + self.failures - self.learned_failures
+            self.knowledge.put(self.signature, {"failures": min(failures, self.params["max_learned_failures"])})
+        self.knowledge.close()
+
     def on_action_frame(self, turn_string):
         """
         This is the action frame of the game. This function could be called 
@@ -461,7 +504,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         """
 
         state = json.loads(turn_string)
-        
+        self.opponent_model.update(state)
 
         # Check if anything is being built/spawned on (1, 14)
         events = state["events"]
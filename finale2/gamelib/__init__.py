@@ -16,14 +16,45 @@ Investigating it is useful for advanced players interested in getting data from
 The Navigation class in navigation.py contains functions related to path-finding, which are used by GameState in pathing related functions. 
 Investigating it is useful for advanced player who want to optimize the slow default pathing algorithm we provide. \n 
 
-util.py contains a small handful of functions that help with communication, including the debug-printing function, debug_write().
+The ThreatMap class in threat_map.py holds the damage per frame mobile units take at every location, for both players.
+Get it with GameState.get_threat_map(), which keeps it up to date as you spawn and upgrade structures. \n
+
+The ShieldMap class in shield_map.py holds the supports covering every location, and the shield and effective health
+a group of mobile units gets along a path. Get it with GameState.get_shield_map(). \n
+
+GameState.fork() makes a cheap copy to try hypothetical plans on, and GameState.plan() returns a Plan (plan.py)
+that can undo everything spawned, upgraded or removed since it started. GameState.zobrist_hash() is a fast key
+for a board state, to use with the TranspositionTable in transposition.py. \n
+
+The DefensePlanner class in defense_planner.py searches for the structures to build or upgrade that make the
+enemy's best path take the most damage, and returns them as a build order. place_turrets() in placement.py quickly
+picks many turret locations that cover the enemy's predicted paths. The AttackPlanner class in attack_planner.py
+chooses where to spawn mobile units, of which types and how many. The Lookahead class in lookahead.py scores
+builds by the expected outcome of the enemy's likely attacks. The OpponentModel class in opponent_model.py learns
+from the action frames where and how hard the enemy tends to attack. \n
+
+The KnowledgeStore class in knowledge.py remembers what the algo learned about an opponent between games, keyed by
+opening_signature(), the structures the opponent opened with. \n
+
+util.py contains a small handful of functions that help with communication, including the debug-printing function, debug_write(), 
+and load_params() for reading tunable parameters.
 """
 
 from .algocore import AlgoCore
-from .util import debug_write
+from .util import debug_write, load_params
 from .game_state import GameState
 from .unit import GameUnit
 from .game_map import GameMap
-
-__all__ = ["algocore", "game_state", "game_map", "navigation", "unit", "util"]
+from .knowledge import KnowledgeStore, opening_signature
+from .threat_map import ThreatMap
+from .shield_map import ShieldMap
+from .plan import Plan
+from .transposition import TranspositionTable, zobrist_key
+from .defense_planner import DefensePlanner
+from .placement import place_turrets
+from .attack_planner import AttackPlanner
+from .lookahead import Lookahead
+from .opponent_model import OpponentModel
+
+__all__ = ["algocore", "attack_planner", "defense_planner", "game_state", "game_map", "knowledge", "lookahead", "navigation", "opponent_model", "placement", "plan", "shield_map", "threat_map", "transposition", "unit", "util"]
  
\ No newline at end of file
@@ -0,0 +1,267 @@
+import time
+from .navigation import path_timeline
+from .threat_map import range_offsets
+from .transposition import TranspositionTable
+from .unit import GameUnit
+
+
+class AttackPlanner:
+    """Chooses where to spawn mobile units, which types and how many, within the MP you have.
+
+    Every plan is a list of groups (unit_type, x, y, count), estimated frame by frame along their paths:
+    groups take the damage of the ThreatMap at their location every frame (the unit with the least
+    health first, like turrets target), get the shield of the ShieldMap as they pass supports, deal
+    their damage to the nearest enemy structure in range, and score a breach for every unit reaching the edge.
+    Structures are not removed when destroyed, so paths and threats don't change during a plan.
+
+        planner = gamelib.AttackPlanner(game_state)
+        planner.apply(planner.plan(time_limit=0.3))
+
+    The candidates are every open spawn location with all MP in a single unit type, then for the
+    best locations a mix of demolishers and scouts in one location, and demolishers in one location
+    with scouts in another. Results are memoized by GameState.zobrist_hash(), so the same board and MP
+    give the same plan without searching again.
+
+    Attributes :
+        * game_state (:obj: GameState): The game state to plan for, it is not changed by plan. Set it to the
+          next turn's game state to keep the memoized plans
+        * unit_types (list): The mobile unit types to try
+        * structure_weight (float): The score of a point of damage to enemy structures, a breach scores 1
+        * best_score (float): The estimated score of the last plan
+        * evaluated (int): The number of plans estimated by the last plan
+
+    """
+    def __init__(self, game_state, unit_types=None, structure_weight=0.01, top_locations=4):
+        """Sets up the planner
+
+        Args:
+            game_state: A GameState object
+            unit_types: The mobile unit types to try, scouts, demolishers and interceptors if None
+            structure_weight: The score of a point of damage to enemy structures, a breach scores 1
+            top_locations: The number of best spawn locations mixes and splits are tried on
+
+        """
+        unit_information = game_state.config["unitInformation"]
+        self.game_state = game_state
+        self.SCOUT = unit_information[3]["shorthand"]
+        self.DEMOLISHER = unit_information[4]["shorthand"]
+        self.unit_types = unit_types if unit_types is not None else [self.SCOUT, self.DEMOLISHER, unit_information[5]["shorthand"]]
+        self.structure_weight = structure_weight
+        self.top_locations = top_locations
+        self.best_score = 0
+        self.evaluated = 0
+        self.__breach_damage = {info.get("shorthand"): info.get("playerBreachDamage", 1) for info in unit_information}
+        self.__plans = TranspositionTable(1000)
+        self.__scores = TranspositionTable(10000)
+        self.__paths = TranspositionTable(10000)
+        self.__offsets = {}
+
+    def __path(self, state, location):
+        """The path from a spawn location, and whether it reaches an enemy edge. (None, False) if the location is blocked.
+        """
+        key = (state.game_map.zobrist_hash(), tuple(location))
+        paths = self.__paths.get(key)
+        if paths is None:
+            path = None if state.contains_stationary_unit(location) else state.find_path_to_edge_cached(list(location))
+            if path is None:
+                paths = (None, False)
+            else:
+                end_points = state.game_map.get_edge_locations(state.get_target_edge(location))
+                paths = (path, path[-1] in end_points)
+            self.__paths.put(key, paths)
+        return paths
+
+    def evaluate(self, actions, state=None, player_index=0):
+        """Estimates the score of a plan
+
+        Args:
+            actions: A list of (unit_type, x, y, count), groups on blocked locations are skipped
+            state: The GameState to estimate it on, the planner's game state if None
+            player_index: The player spawning the units, 1 to estimate an enemy attack on you
+
+        Returns:
+            The number of breaches (times each unit's playerBreachDamage) plus structure_weight times
+            the damage dealt to enemy structures
+
+        """
+        state = state if state is not None else self.game_state
+        threat_map = state.get_threat_map()
+        shield_map = state.get_shield_map()
+        groups = []
+        for unit_type, x, y, count in actions:
+            unit = GameUnit(unit_type, state.config, player_index)
+            if unit.speed <= 0 or count < 1:
+                continue
+            path, breaches = self.__path(state, [x, y])
+            if path is None:
+                continue
+            groups.append({
+                "unit": unit,
+                "timeline": path_timeline(path, unit.speed),
+                "shields": shield_map.cumulative_shield(path, player_index),
+                "breaches": breaches,
+                "health": [unit.max_health] * count,
+                "step": -1})
+
+        self.evaluated += 1
+        structures = {}
+        score = 0
+        frame = 0
+        while any(group["health"] and group["step"] < len(group["timeline"]) for group in groups):
+            at = {}
+            for group in groups:
+                if not group["health"] or group["step"] >= len(group["timeline"]):
+                    continue
+                timeline = group["timeline"]
+                step = group["step"]
+                while step + 1 < len(timeline) and timeline[step + 1][1] <= frame:
+                    step += 1
+                    gained = group["shields"][step] - (group["shields"][step - 1] if step > 0 else 0)
+                    group["health"] = [health + gained for health in group["health"]]
+                if frame >= timeline[-1][2]:
+                    if group["breaches"]:
+                        score += len(group["health"]) * self.__breach_damage.get(group["unit"].unit_type, 1)
+                    group["step"] = len(timeline)
+                    continue
+                group["step"] = step
+                location = timeline[step][0]
+                at.setdefault(tuple(location), []).append(group)
+                score += self.structure_weight * self.__attack_structures(state, structures, location, group)
+
+            for location, here in at.items():
+                self.__take_damage(here, threat_map.damage_at(list(location), player_index))
+            frame += 1
+        return score
+
+    def __attack_structures(self, state, structures, location, group):
+        """Deals one frame of the group's damage to the nearest enemy structures in range, returns the damage dealt
+        """
+        unit = group["unit"]
+        damage = unit.damage_f * len(group["health"])
+        if damage <= 0:
+            return 0
+        dealt = 0
+        if unit.attackRange not in self.__offsets:
+            self.__offsets[unit.attackRange] = sorted(range_offsets(unit.attackRange), key=lambda offset: offset[0] ** 2 + offset[1] ** 2)
+        for dx, dy in self.__offsets[unit.attackRange]:
+            target = [location[0] + dx, location[1] + dy]
+            if not state.game_map.in_arena_bounds(target):
+                continue
+            structure = state.contains_stationary_unit(target)
+            if not structure or structure.player_index == unit.player_index:
+                continue
+            remaining = structures.setdefault(tuple(target), structure.health)
+            hit = min(remaining, damage - dealt)
+            structures[tuple(target)] = remaining - hit
+            dealt += hit
+            if dealt >= damage:
+                break
+        return dealt
+
+    def __take_damage(self, groups, damage):
+        """Takes one frame of damage from the units at a location, lowest health first
+        """
+        while damage > 0:
+            alive = [group for group in groups if group["health"]]
+            if not alive:
+                return
+            group = min(alive, key=lambda group: min(group["health"]))
+            health = group["health"]
+            index = health.index(min(health))
+            hit = min(health[index], damage)
+            health[index] -= hit
+            damage -= hit
+            if health[index] <= 0:
+                health.pop(index)
+
+    def __candidates(self, state, mp):
+        """Yields the plans to try, see the class docstring
+        """
+        locations = [location for edge in [state.game_map.BOTTOM_LEFT, state.game_map.BOTTOM_RIGHT]
+                     for location in state.game_map.get_edge_locations(edge) if not state.contains_stationary_unit(location)]
+        costs = {unit_type: state.type_cost(unit_type)[state.MP] for unit_type in self.unit_types + [self.SCOUT, self.DEMOLISHER]}
+
+        singles = []
+        for location in locations:
+            for unit_type in self.unit_types:
+                count = int(mp // costs[unit_type])
+                if count > 0:
+                    actions = [(unit_type, location[0], location[1], count)]
+                    singles.append(actions)
+                    yield actions
+
+        if self.SCOUT not in self.unit_types or self.DEMOLISHER not in self.unit_types:
+            return
+        # mixes and splits are only tried on the locations where a single unit type did best
+        best_single = {}
+        for actions in singles:
+            location = tuple(actions[0][1:3])
+            best_single[location] = max(best_single.get(location, 0), self.__score_of(state, actions))
+        best = sorted(best_single, key=lambda location: -best_single[location])[:self.top_locations]
+        for demolishers in range(1, int(mp // costs[self.DEMOLISHER]) + 1):
+            scouts = int((mp - demolishers * costs[self.DEMOLISHER]) // costs[self.SCOUT])
+            if scouts < 1:
+                continue
+            for first in best:
+                for second in best:
+                    yield [(self.DEMOLISHER, first[0], first[1], demolishers), (self.SCOUT, second[0], second[1], scouts)]
+
+    def __score_of(self, state, actions, player_index=0):
+        """The memoized score of a plan on a state
+        """
+        key = (state.zobrist_hash(), tuple(actions), player_index)
+        return self.__scores.get_or_compute(key, lambda: self.evaluate(actions, state, player_index))
+
+    def plan(self, mp=None, time_limit=0.5):
+        """Searches for the best attack
+
+        Args:
+            mp: The MP to spend, all of it if None
+            time_limit: Seconds to search for, the best plan found so far is returned when they run out
+
+        Returns:
+            A list of (unit_type, x, y, count) to spawn, in order. Empty if no plan scores above 0.
+            Pass it to apply, or use attempt_spawn yourself.
+
+        """
+        deadline = time.time() + time_limit
+        state = self.game_state
+        if mp is None:
+            mp = state.get_resource(state.MP)
+        key = (state.zobrist_hash(), mp)
+        memo = self.__plans.get(key)
+        if memo is not None:
+            self.best_score, actions = memo
+            return list(actions)
+
+        self.evaluated = 0
+        self.__scores = TranspositionTable(10000)
+        best_score, best_actions = 0, []
+        finished = True
+        for actions in self.__candidates(state, mp):
+            if time.time() > deadline:
+                finished = False
+                break
+            score = self.__score_of(state, actions)
+            if score > best_score:
+                best_score, best_actions = score, actions
+
+        self.best_score = best_score
+        if finished:
+            self.__plans.put(key, (best_score, list(best_actions)))
+        return list(best_actions)
+
+    def apply(self, actions):
+        """Spawns the units of a plan on the game state
+
+        Args:
+            actions: A list of (unit_type, x, y, count), for example from plan
+
+        Returns:
+            The number of units spawned
+
+        """
+        spawned = 0
+        for unit_type, x, y, count in actions:
+            spawned += self.game_state.attempt_spawn(unit_type, [x, y], count) or 0
+        return spawned
@@ -0,0 +1,156 @@
+import time
+from .transposition import TranspositionTable
+
+
+class DefensePlanner:
+    """Chooses which structures to build or upgrade with beam search.
+    Every build order is scored by the damage the enemy's mobile units would take on their paths
+    (GameState.find_paths_to_edges from every open location on the enemy's edges, and the ThreatMap),
+    assuming the enemy spawns where it takes the least damage.
+
+        planner = gamelib.DefensePlanner(game_state, [[3, 12], [24, 12], [13, 11]], [TURRET])
+        planner.apply(planner.plan(time_limit=0.5))
+
+    Attributes :
+        * game_state (:obj: GameState): The game state to plan for, it is not changed by plan
+        * candidates (list): The locations structures can be built on
+        * unit_types (list): The structure types to try on every candidate location
+        * beam_width (int): The number of build orders kept after every step
+        * enemy_unit (str): The mobile unit the enemy paths are scored for, scouts by default
+        * evaluated (int): The number of board states scored by the last plan
+
+    """
+    def __init__(self, game_state, candidates, unit_types=None, beam_width=8, enemy_unit=None):
+        """Sets up the planner
+
+        Args:
+            game_state: A GameState object
+            candidates: A list of locations to consider building on
+            unit_types: The structure types to try, turrets if None
+            beam_width: The number of build orders kept after every step
+            enemy_unit: The enemy mobile unit type, scouts if None
+
+        """
+        unit_information = game_state.config["unitInformation"]
+        self.game_state = game_state
+        self.candidates = [list(location) for location in candidates]
+        self.unit_types = unit_types if unit_types is not None else [unit_information[2]["shorthand"]]
+        self.beam_width = beam_width
+        self.enemy_unit = enemy_unit if enemy_unit is not None else unit_information[3]["shorthand"]
+        self.evaluated = 0
+        self.UPGRADE = unit_information[7]["shorthand"]
+        self.__scores = TranspositionTable()
+        self.__starts = [location for edge in [game_state.game_map.TOP_LEFT, game_state.game_map.TOP_RIGHT]
+                         for location in game_state.game_map.get_edge_locations(edge)]
+
+    def __paths(self, state, parent=None, location=None):
+        """Gets the enemy paths of a state. A structure that is not on any of the parent's paths
+        can't change them (pathlengths only grow, and not on the cells the paths use), so they are reused.
+        """
+        if parent is not None and tuple(location) not in parent[1]:
+            return parent
+        paths = [path for path in state.find_paths_to_edges(self.__starts) if path is not None]
+        return paths, set(tuple(location) for path in paths for location in path)
+
+    def __score(self, state, paths):
+        """Scores a state, higher is better: the least damage the enemy can take on a path that reaches
+        our edge, then the average over those paths. Paths that can't reach our edge can't score.
+        """
+        key = state.zobrist_hash()
+        score = self.__scores.get(key)
+        if score is None:
+            self.evaluated += 1
+            threat_map = state.get_threat_map()
+            edges = state.game_map.get_edges()
+            targets = set(tuple(location) for edge in [edges[state.game_map.BOTTOM_LEFT], edges[state.game_map.BOTTOM_RIGHT]] for location in edge)
+            damages = [threat_map.unit_path_damage(self.enemy_unit, path, 1) for path in paths if tuple(path[-1]) in targets]
+            if len(damages) == 0:
+                score = (float('inf'), float('inf'))
+            else:
+                score = (min(damages), sum(damages) / len(damages))
+            self.__scores.put(key, score)
+        return score
+
+    def __actions(self, state, budget):
+        """Gets every affordable build and upgrade on the candidate locations of a state
+        """
+        actions = []
+        spent = self.game_state.get_resource(self.game_state.SP) - state.get_resource(state.SP)
+        for location in self.candidates:
+            unit = state.contains_stationary_unit(location)
+            if unit:
+                if unit.player_index == 0 and not unit.upgraded and not unit.pending_removal:
+                    cost = state.type_cost(unit.unit_type, True)[state.SP]
+                    if spent + cost <= budget and state.get_resource(state.SP) >= cost:
+                        actions.append((self.UPGRADE, location[0], location[1]))
+                continue
+            for unit_type in self.unit_types:
+                cost = state.type_cost(unit_type)[state.SP]
+                if spent + cost <= budget and state.can_spawn(unit_type, location):
+                    actions.append((unit_type, location[0], location[1]))
+        return actions
+
+    def plan(self, budget=None, max_actions=10, time_limit=1.0):
+        """Searches for the best build order
+
+        Args:
+            budget: The most SP to spend, all of it if None
+            max_actions: The most builds and upgrades in the order
+            time_limit: Seconds to search for, the best order found so far is returned when they run out
+
+        Returns:
+            A list of (unit_type, x, y) in the order to build them, unit_type is the upgrade shorthand
+            ('UP') for upgrades. Pass it to apply, or use attempt_spawn/attempt_upgrade yourself.
+
+        """
+        deadline = time.time() + time_limit
+        if budget is None:
+            budget = self.game_state.get_resource(self.game_state.SP)
+        self.evaluated = 0
+
+        root = self.game_state.fork()
+        root.suppress_warnings(True)
+        root_paths = self.__paths(root)
+        best_score, best_actions = self.__score(root, root_paths[0]), []
+        beam = [(best_score, [], root, root_paths)]
+        for _ in range(max_actions):
+            children = {}
+            for _, actions, state, paths in beam:
+                for action in self.__actions(state, budget):
+                    if time.time() > deadline:
+                        return best_actions
+                    child = state.fork()
+                    if action[0] == self.UPGRADE:
+                        child.attempt_upgrade([action[1], action[2]])
+                    else:
+                        child.attempt_spawn(action[0], [action[1], action[2]])
+                    key = child.zobrist_hash()
+                    if key in children:
+                        continue
+                    child_paths = self.__paths(child, paths, action[1:])
+                    children[key] = (self.__score(child, child_paths[0]), actions + [action], child, child_paths)
+
+            if len(children) == 0:
+                break
+            beam = sorted(children.values(), key=lambda entry: entry[0], reverse=True)[:self.beam_width]
+            if beam[0][0] > best_score:
+                best_score, best_actions = beam[0][0], beam[0][1]
+        return best_actions
+
+    def apply(self, actions):
+        """Builds and upgrades the structures of a build order on the game state
+
+        Args:
+            actions: A list of (unit_type, x, y), for example from plan
+
+        Returns:
+            The number of actions that succeeded
+
+        """
+        done = 0
+        for unit_type, x, y in actions:
+            if unit_type == self.UPGRADE:
+                done += self.game_state.attempt_upgrade([x, y]) or 0
+            else:
+                done += self.game_state.attempt_spawn(unit_type, [x, y]) or 0
+        return done
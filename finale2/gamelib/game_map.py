@@ -1,5 +1,7 @@
 import math
+import copy
 from .unit import GameUnit
+from .transposition import zobrist_key
 from .util import debug_write
 
 class GameMap:
@@ -36,6 +38,10 @@ class GameMap:
         self.BOTTOM_LEFT = 2
         self.BOTTOM_RIGHT = 3
         self.__map = self.__empty_grid()
+        self.__owned = None
+        self.__journals = []
+        self.__type_index = {info.get("shorthand"): i for i, info in enumerate(config.get("unitInformation", []))}
+        self.__hash = 0
         self.__start = [13,0]
     
     def __getitem__(self, location):
@@ -46,7 +52,10 @@ class GameMap:
 
     def __setitem__(self, location, val):
         if type(location) == tuple and len(location) == 2 and self.in_arena_bounds(location):
+            self.__own(location[0], location[1])
+            self.__hash ^= self.__cell_hash(location[0], location[1])
             self.__map[location[0]][location[1]] = val
+            self.__hash ^= self.__cell_hash(location[0], location[1])
             return
         self._invalid_coordinates(location)
 
@@ -75,6 +84,96 @@ class GameMap:
                 grid[x].append([])
         return grid
 
+    def __own(self, x, y):
+        """Copies a location (and its units) shared with a fork or a journal before it is changed
+        """
+        if self.__owned is not None and (x, y) not in self.__owned:
+            if self.__journals and (x, y) not in self.__journals[-1]:
+                self.__journals[-1][(x, y)] = self.__map[x][y]
+            self.__map[x][y] = [copy.copy(unit) for unit in self.__map[x][y]]
+            self.__owned.add((x, y))
+
+    def __cell_hash(self, x, y):
+        """The XOR of the Zobrist keys of the structures at a location
+        """
+        cell_hash = 0
+        for unit in self.__map[x][y]:
+            if unit.stationary:
+                cell_hash ^= zobrist_key((((x * self.ARENA_SIZE + y) * 2 + unit.player_index) * 8 + self.__type_index.get(unit.unit_type, 7)) * 2 + int(unit.upgraded))
+        return cell_hash
+
+    def zobrist_hash(self):
+        """Gets a 64 bit hash of the structures on the map (location, owner, type and upgrade), the same
+        for the same structures in every game. It is updated by add_unit, remove_unit and upgrade_unit,
+        call rehash after changing the lists returned by game_map[x, y] directly.
+
+        Returns:
+            The Zobrist hash of the map
+
+        """
+        return self.__hash
+
+    def rehash(self):
+        """Recomputes the Zobrist hash of the whole map, see zobrist_hash
+        """
+        self.__hash = 0
+        for x in range(self.ARENA_SIZE):
+            for y in range(self.ARENA_SIZE):
+                self.__hash ^= self.__cell_hash(x, y)
+
+    def fork(self):
+        """Gets a copy of this map that shares every location with it until either map changes that location.
+        Only the columns of the grid are copied, so forking is cheap. Change forked maps with add_unit,
+        remove_unit and upgrade_unit, changing the lists returned by game_map[x, y] changes both maps.
+
+        Returns:
+            A new GameMap with the same units
+
+        """
+        child = copy.copy(self)
+        child.__map = [column[:] for column in self.__map]
+        child.__owned = set()
+        child.__journals = []
+        child.__start = [13,0]
+        self.__owned = set()
+        return child
+
+    def journal_start(self):
+        """Starts remembering the units of every location before it changes, until journal_rollback or
+        journal_commit. Journals can be nested, see GameState.plan.
+        """
+        self.__journals.append({})
+        self.__owned = set()
+
+    def journal_rollback(self):
+        """Puts back the units of every location changed since the last journal_start
+
+        Returns:
+            The locations that were put back
+
+        """
+        journal = self.__journals.pop()
+        for (x, y), units in journal.items():
+            self.__hash ^= self.__cell_hash(x, y)
+            self.__map[x][y] = units
+            self.__hash ^= self.__cell_hash(x, y)
+        self.__owned = set()
+        return [[x, y] for x, y in journal]
+
+    def journal_commit(self):
+        """Keeps the changes since the last journal_start. If journals are nested, the outer journal
+        can still roll them back.
+
+        Returns:
+            The locations changed since the last journal_start
+
+        """
+        journal = self.__journals.pop()
+        if self.__journals:
+            for location, units in journal.items():
+                self.__journals[-1].setdefault(location, units)
+        return [[x, y] for x, y in journal]
+
     def _invalid_coordinates(self, location):
         self.warn("{} is out of bounds.".format(str(location)))
 
@@ -149,6 +248,57 @@ class GameMap:
             bottom_right.append([int(x), int(y)])
         return [top_right, top_left, bottom_left, bottom_right]
     
+    def mirror_location(self, location):
+        """Gets the location on the other side of the vertical center line of the board
+
+        Args:
+            location: A map location
+
+        Returns:
+            [ARENA_SIZE - 1 - x, y]
+
+        """
+        x, y = location
+        return [self.ARENA_SIZE - 1 - x, y]
+
+    def mirror_edge(self, edge):
+        """Gets the edge on the other side of the vertical center line, TOP_LEFT for TOP_RIGHT and so on
+
+        Args:
+            edge: One of the edge constants. See game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, and similar constants.
+
+        Returns:
+            The mirrored edge constant
+
+        """
+        return {self.TOP_RIGHT: self.TOP_LEFT, self.TOP_LEFT: self.TOP_RIGHT,
+                self.BOTTOM_LEFT: self.BOTTOM_RIGHT, self.BOTTOM_RIGHT: self.BOTTOM_LEFT}[edge]
+
+    def mirror_path(self, path):
+        """Mirrors every location of a path, see mirror_location
+        """
+        return [self.mirror_location(location) for location in path]
+
+    def is_symmetric(self, player_index=None):
+        """Checks if the structures on the board are the same on both sides of the vertical center line.
+        On a symmetric board every path, threat and shield on one side is the mirror of the other side.
+
+        Args:
+            player_index: Only check the structures of this player, 0 for you 1 for the enemy. Both players if None.
+
+        Returns:
+            True if every structure has a structure of the same type, owner and upgrade at its mirrored location
+
+        """
+        for x in range(self.HALF_ARENA):
+            for y in range(self.ARENA_SIZE):
+                units = [unit for unit in self.__map[x][y] if unit.stationary and (player_index is None or unit.player_index == player_index)]
+                mirrored_x = self.ARENA_SIZE - 1 - x
+                mirrored = [unit for unit in self.__map[mirrored_x][y] if unit.stationary and (player_index is None or unit.player_index == player_index)]
+                if [(u.unit_type, u.player_index, u.upgraded) for u in units] != [(u.unit_type, u.player_index, u.upgraded) for u in mirrored]:
+                    return False
+        return True
+
     def add_unit(self, unit_type, location, player_index=0):
         """Add a single GameUnit to the map at the given location.
 
@@ -167,11 +317,14 @@ class GameMap:
             self.warn("Player index {} is invalid. Player index should be 0 or 1.".format(player_index))
 
         x, y = location
+        self.__own(x, y)
         new_unit = GameUnit(unit_type, self.config, player_index, None, location[0], location[1])
         if not new_unit.stationary:
             self.__map[x][y].append(new_unit)
         else:
+            self.__hash ^= self.__cell_hash(x, y)
             self.__map[x][y] = [new_unit]
+            self.__hash ^= self.__cell_hash(x, y)
 
     def remove_unit(self, location):
         """Remove all units on the map in the given location.
@@ -186,8 +339,34 @@ class GameMap:
             self._invalid_coordinates(location)
         
         x, y = location
+        self.__own(x, y)
+        self.__hash ^= self.__cell_hash(x, y)
         self.__map[x][y] = []
 
+    def upgrade_unit(self, location):
+        """Upgrades the structure at the given location, without checking or spending resources.
+
+        Args:
+            location: The location of the structure
+
+        Returns:
+            The upgraded structure, None if there is no structure at the location
+
+        This function does not affect your turn and only changes the data stored in GameMap, use GameState.attempt_upgrade for that.
+        """
+        if not self.in_arena_bounds(location):
+            self._invalid_coordinates(location)
+            return
+
+        x, y = location
+        self.__own(x, y)
+        for unit in self.__map[x][y]:
+            if unit.stationary:
+                self.__hash ^= self.__cell_hash(x, y)
+                unit.upgrade()
+                self.__hash ^= self.__cell_hash(x, y)
+                return unit
+
     def get_locations_in_range(self, location, radius):
         """Gets locations in a circular area around a location
 
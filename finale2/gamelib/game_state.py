@@ -1,11 +1,16 @@
 import math
 import json
 import sys
+import copy
 
-from .navigation import ShortestPathFinder
+from .navigation import ShortestPathFinder, path_timeline
 from .util import send_command, debug_write
 from .unit import GameUnit
 from .game_map import GameMap
+from .threat_map import ThreatMap
+from .shield_map import ShieldMap
+from .plan import Plan
+from .transposition import zobrist_key
 
 def is_stationary(unit_type):
     """
@@ -93,6 +98,11 @@ class GameState:
         self._shortest_path_finder = ShortestPathFinder()
         self._build_stack = []
         self._deploy_stack = []
+        self._threat_map = None
+        self._shield_map = None
+        self._path_finders = {}
+        self._symmetric = None
+        self._maps_shared = False
         self._player_resources = [
                 {'SP': 0, 'MP': 0},  # player 0, which is you
                 {'SP': 0, 'MP': 0}]  # player 1, which is the opponent
@@ -125,6 +135,7 @@ class GameState:
 
         self.__create_parsed_units(p1units, 0)
         self.__create_parsed_units(p2units, 1)
+        self.game_map.rehash()
 
     def __create_parsed_units(self, units, player_number):
         """
@@ -149,6 +160,74 @@ class GameState:
                     unit = GameUnit(unit_type, self.config, player_number, hp, x, y)
                     self.game_map[x,y].append(unit)
 
+    def fork(self):
+        """Gets a copy of this game state to try out hypothetical plans on, without changing this one.
+        The copy shares the map (see GameMap.fork), the config and the threat map, shield map and pathlengths
+        with this game state, and only copies a location or a map when one of them changes it.
+        Spawning, upgrading or removing in the copy is not sent to the game, only this game state's submit_turn is.
+
+        Returns:
+            A new GameState, with the same units, resources and planned turn as this one
+
+        """
+        child = copy.copy(self)
+        child.game_map = self.game_map.fork()
+        child._shortest_path_finder = ShortestPathFinder()
+        # the parent's pathlengths hold for the child until it changes the map, but the child's must not leak back
+        child._path_finders = dict(self._path_finders)
+        child._build_stack = list(self._build_stack)
+        child._deploy_stack = list(self._deploy_stack)
+        child._player_resources = [dict(resources) for resources in self._player_resources]
+        child._maps_shared = True
+        self._maps_shared = True
+        return child
+
+    def zobrist_hash(self):
+        """Gets a 64 bit hash of the board state, for keys of a TranspositionTable. Combines
+        GameMap.zobrist_hash (the structures, kept up to date as they are spawned, upgraded or removed)
+        with both players' SP and MP. Mobile units and the turn number are not part of it.
+
+        Returns:
+            The Zobrist hash of the game state
+
+        """
+        board_hash = self.game_map.zobrist_hash()
+        for player_index, resources in enumerate(self._player_resources):
+            for resource_index, resource in enumerate(['SP', 'MP']):
+                board_hash ^= zobrist_key((((1 << 20) + player_index * 2 + resource_index) << 32) + int(round(resources[resource] * 100)))
+        return board_hash
+
+    def plan(self):
+        """Starts a plan, the changes made by attempt_spawn, attempt_upgrade and attempt_remove until it is
+        committed can be undone with its rollback(). See the Plan class.
+
+        Returns:
+            A new Plan for this game state
+
+        """
+        return Plan(self)
+
+    def _journal_start(self):
+        """Used by Plan, starts the game map journal and returns what is needed to undo the other changes
+        """
+        self.game_map.journal_start()
+        return [dict(resources) for resources in self._player_resources], len(self._build_stack), len(self._deploy_stack)
+
+    def _journal_end(self, snapshot, rollback):
+        """Used by Plan, keeps or undoes the changes since _journal_start returned snapshot
+        """
+        if not rollback:
+            return self.game_map.journal_commit()
+
+        resources, build_length, deploy_length = snapshot
+        self._player_resources = resources
+        del self._build_stack[build_length:]
+        del self._deploy_stack[deploy_length:]
+        locations = self.game_map.journal_rollback()
+        for location in locations:
+            self.__update_maps(location)
+        return locations
+
     def __resource_required(self, unit_type):
         return self.SP if is_stationary(unit_type) else self.MP
 
@@ -384,6 +463,7 @@ class GameState:
                     self.game_map.add_unit(unit_type, location, 0)
                     if is_stationary(unit_type):
                         self._build_stack.append((unit_type, x, y))
+                        self.__update_maps([x, y])
                     else:
                         self._deploy_stack.append((unit_type, x, y))
                     spawned_units += 1
@@ -445,8 +525,9 @@ class GameState:
                     if resources[SP] >= costs[SP] and resources[MP] >= costs[MP]:
                         self.__set_resource(SP, 0 - costs[SP])
                         self.__set_resource(MP, 0 - costs[MP])
-                        existing_unit.upgrade()
+                        self.game_map.upgrade_unit([x, y])
                         self._build_stack.append((UPGRADE, x, y))
+                        self.__update_maps([x, y])
                         spawned_units += 1
             else:
                 self.warn("Could not upgrade a unit from {}. Location has no structures or is enemy territory.".format(location))
@@ -498,6 +579,167 @@ class GameState:
         end_points = self.game_map.get_edge_locations(target_edge)
         return self._shortest_path_finder.navigate_multiple_endpoints(start_location, end_points, self)
 
+    def find_paths_to_edges(self, start_locations, target_edge=None):
+        """Gets the paths units at many locations would take, in one batched pass.
+        Much faster than calling find_path_to_edge for every location, the pathlengths are shared
+        by every location heading to the same edge, and kept like find_path_to_edge_cached does.
+
+        Args:
+            start_locations: The locations of hypothetical units
+            target_edge: The edge the units want to reach. Induced from every start location if None.
+
+        Returns:
+            A list with the path of every start location, in the same order, see find_path_to_edge.
+            None for start locations blocked by a structure.
+
+        """
+        by_edge = {}
+        for i, location in enumerate(start_locations):
+            edge = target_edge if target_edge is not None else self.get_target_edge(location)
+            by_edge.setdefault(edge, []).append(i)
+
+        paths = [None] * len(start_locations)
+        for edge, indices in by_edge.items():
+            found = self.__get_path_finder(edge).navigate_many([start_locations[i] for i in indices], self.game_map.get_edge_locations(edge), self, True)
+            for i, path in zip(indices, found):
+                paths[i] = path
+        return paths
+
+    def __get_path_finder(self, edge):
+        """Gets a path finder that keeps its pathlengths toward an edge until a structure changes.
+        On a symmetric board the pathlengths toward the mirrored edge are reused.
+        """
+        if self._symmetric is None:
+            self._symmetric = self.game_map.is_symmetric()
+        if edge not in self._path_finders:
+            mirrored_edge = self.game_map.mirror_edge(edge)
+            if self._symmetric and mirrored_edge in self._path_finders:
+                self._path_finders[edge] = self._path_finders[mirrored_edge].mirrored()
+            else:
+                finder = ShortestPathFinder()
+                finder.navigate_many([], self.game_map.get_edge_locations(edge), self)
+                self._path_finders[edge] = finder
+        return self._path_finders[edge]
+
+    def find_path_to_edge_cached(self, start_location, target_edge=None):
+        """Gets the same path as find_path_to_edge, but keeps the pathlengths toward every edge until a structure
+        is spawned or upgraded with attempt_spawn or attempt_upgrade, so only the first path toward an edge costs
+        a full search. If the board is symmetric, the pathlengths toward the mirrored edge are reused, so checking
+        both sides of the board costs a single search. Call clear_path_cache after changing the game map directly.
+
+        Args:
+            start_location: The location of a hypothetical unit
+            target_edge: The edge the unit wants to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc. Induced from start_location if None.
+
+        Returns:
+            A list of locations corresponding to the path the unit would take, see find_path_to_edge
+
+        """
+        if self.contains_stationary_unit(start_location):
+            return self.find_path_to_edge(start_location, target_edge)
+        return self.find_paths_to_edges([start_location], target_edge)[0]
+
+    def clear_path_cache(self):
+        """Forgets the pathlengths kept by find_path_to_edge_cached and find_paths_to_edges. Call this after
+        changing the game map directly (add_unit or remove_unit), attempt_spawn and attempt_upgrade already do.
+        """
+        self._path_finders = {}
+        self._symmetric = None
+
+    def get_path_heatmap(self, player_index=1):
+        """Predicts where the mobile units of a player can go, from the paths of every location on their edges
+        that is not blocked, toward both of the other player's edges.
+
+        Args:
+            player_index: The player spawning the mobile units, 0 for you 1 for the enemy
+
+        Returns:
+            heatmap, crossings. heatmap[x][y] is the number of paths going through [x, y].
+            crossings is a set of (x, y), the first location of every path on the other player's half of the map.
+
+        """
+        if not player_index == 1 and not player_index == 0:
+            self._invalid_player_index(player_index)
+            return None, None
+        if player_index == 0:
+            edges = [self.game_map.BOTTOM_LEFT, self.game_map.BOTTOM_RIGHT]
+        else:
+            edges = [self.game_map.TOP_LEFT, self.game_map.TOP_RIGHT]
+        start_locations = [location for edge in edges for location in self.game_map.get_edge_locations(edge)]
+
+        heatmap = [[0] * self.ARENA_SIZE for _ in range(self.ARENA_SIZE)]
+        crossings = set()
+        for path in self.find_paths_to_edges(start_locations):
+            if path is None:
+                continue
+            crossed = False
+            for x, y in path:
+                heatmap[x][y] += 1
+                if not crossed and (y < self.HALF_ARENA) == (player_index == 1):
+                    crossings.add((x, y))
+                    crossed = True
+        return heatmap, crossings
+
+    def find_path_timeline(self, start_location, unit_type, target_edge=None):
+        """Gets the path a mobile unit at a given location would take, and when it would be on every location of it.
+        Faster units spend fewer frames on each location, and so fewer frames in range of each turret.
+
+        Args:
+            start_location: The location of a hypothetical unit
+            unit_type: The type of the mobile unit, its speed is read from the config
+            target_edge: The edge the unit wants to reach. game_map.TOP_LEFT, game_map.BOTTOM_RIGHT, etc. Induced from start_location if None.
+
+        Returns:
+            A list of (location, entry frame, exit frame) for every location of the path, see navigation.path_timeline
+
+        """
+        if is_stationary(unit_type):
+            self.warn("Attempted to get the path timeline of a structure {}".format(unit_type))
+            return None
+        path = self.find_path_to_edge(start_location, target_edge)
+        if path is None:
+            return None
+        return path_timeline(path, GameUnit(unit_type, self.config).speed)
+
+    def get_threat_map(self):
+        """Gets the ThreatMap of this game state, the damage per frame mobile units take at every location.
+        It is created the first time this is called and kept up to date by attempt_spawn and attempt_upgrade.
+
+        Returns:
+            A ThreatMap for both players
+
+        """
+        if self._threat_map is None:
+            self._threat_map = ThreatMap(self)
+        return self._threat_map
+
+    def get_shield_map(self):
+        """Gets the ShieldMap of this game state, the supports that shield mobile units at every location.
+        It is created the first time this is called and kept up to date by attempt_spawn and attempt_upgrade.
+
+        Returns:
+            A ShieldMap for both players
+
+        """
+        if self._shield_map is None:
+            self._shield_map = ShieldMap(self)
+        return self._shield_map
+
+    def __update_maps(self, location):
+        """Updates the threat and shield maps that were created, and forgets the cached paths, after a structure changed
+        """
+        self.clear_path_cache()
+        if self._maps_shared:
+            if self._threat_map is not None:
+                self._threat_map = self._threat_map.fork(self)
+            if self._shield_map is not None:
+                self._shield_map = self._shield_map.fork(self)
+            self._maps_shared = False
+        if self._threat_map is not None:
+            self._threat_map.update_location(location)
+        if self._shield_map is not None:
+            self._shield_map.update_location(location)
+
     def contains_stationary_unit(self, location):
         """Check if a location is blocked, return structures unit if it is
 
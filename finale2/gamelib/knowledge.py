@@ -0,0 +1,145 @@
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import time
+from .util import debug_write
+
+KNOWLEDGE_FILE = "knowledge.db"
+
+
+def opening_signature(game_state, player_index=1):
+    """Gets a short key for the structures a player has built, to recognize an opponent by its opening.
+    Should usually be called on turn 1, when the opponent's first builds are on the board.
+
+    Args:
+        game_state: A GameState object
+        player_index: The player whose structures are used, 1 for your opponent
+
+    Returns:
+        A 16 character hex string, the same for the same structures
+
+    """
+    structures = []
+    for x in range(game_state.ARENA_SIZE):
+        for y in range(game_state.ARENA_SIZE):
+            if game_state.game_map.in_arena_bounds([x, y]):
+                for unit in game_state.game_map[x, y]:
+                    if unit.stationary and unit.player_index == player_index:
+                        structures.append("{}{},{}".format(unit.unit_type, x, y))
+    return hashlib.sha1(";".join(structures).encode()).hexdigest()[:16]
+
+
+class KnowledgeStore:
+    """Remembers what an algo learned about its opponents between games, in a SQLite file.
+    Open it in 'on_game_start', get what was learned once the opponent is recognized, and put what
+    was learned this game in 'on_game_end':
+
+        self.knowledge = gamelib.KnowledgeStore()
+        ...
+        self.signature = gamelib.opening_signature(game_state)
+        learned = self.knowledge.get(self.signature)
+        ...
+        self.knowledge.put(self.signature, {"failures": min(self.failures, 2)})
+
+    Values that only grow during a game should be stored bounded or decayed, or they grow without limit
+    against an opponent met again and again. Every entry is a small json object keyed by a signature
+    (see opening_signature). Only the entries stored least recently beyond max_entries are forgotten,
+    so the file stays small and lookups stay fast.
+    The store never raises, if the file can't be used it acts as an empty store and writes a debug message.
+
+    Attributes :
+        * path (str): The SQLite file, knowledge.db next to algo_strategy.py by default
+        * max_entries (int): The most signatures remembered
+
+    """
+    def __init__(self, path=None, max_entries=1000):
+        """Opens the store, creating the file if needed
+
+        Args:
+            path: The SQLite file, knowledge.db next to algo_strategy.py if None
+            max_entries: The most signatures remembered
+
+        """
+        if path is None:
+            path = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), KNOWLEDGE_FILE)
+        self.path = path
+        self.max_entries = max_entries
+        self.__connection = None
+        try:
+            self.__connection = sqlite3.connect(path, timeout=0.5)
+            self.__connection.execute("CREATE TABLE IF NOT EXISTS knowledge "
+                                      "(signature TEXT PRIMARY KEY, data TEXT, games INTEGER, used REAL)")
+        except sqlite3.Error as e:
+            self.__failed("open", e)
+
+    def __failed(self, action, error):
+        debug_write("Could not {} knowledge store {}: {}".format(action, self.path, error))
+        if self.__connection is not None:
+            self.__connection.close()
+        self.__connection = None
+
+    def get(self, signature):
+        """Gets what was learned about an opponent
+
+        Args:
+            signature: The opponent's signature
+
+        Returns:
+            The dict stored for the signature, with the number of games it was stored after as "games".
+            Empty if nothing was stored.
+
+        """
+        if self.__connection is None:
+            return {}
+        try:
+            row = self.__connection.execute("SELECT data, games FROM knowledge WHERE signature = ?", (signature,)).fetchone()
+        except sqlite3.Error as e:
+            self.__failed("read", e)
+            return {}
+        if row is None:
+            return {}
+        data = json.loads(row[0])
+        data["games"] = row[1]
+        return data
+
+    def put(self, signature, data):
+        """Stores what was learned about an opponent, replacing what was stored before
+
+        Args:
+            signature: The opponent's signature
+            data: A dict that can be saved as json
+
+        """
+        if self.__connection is None:
+            return
+        data = {name: value for name, value in data.items() if name != "games"}
+        try:
+            with self.__connection:
+                # INSERT OR REPLACE rather than an upsert, which needs SQLite 3.24
+                self.__connection.execute(
+                    "INSERT OR REPLACE INTO knowledge VALUES "
+                    "(?, ?, COALESCE((SELECT games FROM knowledge WHERE signature = ?), 0) + 1, ?)",
+                    (signature, json.dumps(data), signature, time.time()))
+                self.__connection.execute(
+                    "DELETE FROM knowledge WHERE signature NOT IN "
+                    "(SELECT signature FROM knowledge ORDER BY used DESC LIMIT ?)", (self.max_entries,))
+        except sqlite3.Error as e:
+            self.__failed("write", e)
+
+    def __len__(self):
+        if self.__connection is None:
+            return 0
+        try:
+            return self.__connection.execute("SELECT COUNT(*) FROM knowledge").fetchone()[0]
+        except sqlite3.Error as e:
+            self.__failed("read", e)
+            return 0
+
+    def close(self):
+        """Closes the file
+        """
+        if self.__connection is not None:
+            self.__connection.close()
+            self.__connection = None
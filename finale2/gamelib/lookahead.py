@@ -0,0 +1,274 @@
+import multiprocessing
+import time
+from .attack_planner import AttackPlanner
+from .game_state import GameState
+from .transposition import TranspositionTable
+
+
+def _replay(state, stack):
+    """Replays a build or deploy stack of (unit_type, x, y) on a state
+    """
+    unit_information = state.config["unitInformation"]
+    for unit_type, x, y in stack:
+        if unit_type == unit_information[7]["shorthand"]:
+            state.attempt_upgrade([x, y])
+        elif unit_type == unit_information[6]["shorthand"]:
+            state.attempt_remove([x, y])
+        else:
+            state.attempt_spawn(unit_type, [x, y])
+
+
+def _evaluate_in_process(job):
+    """Scores a build against some attacks in a worker process, returns the board's Zobrist hash and the scores.
+    The state is rebuilt from the turn's serialized string and the moves made on it so far.
+    """
+    config, serialized_string, build_stack, deploy_stack, build, attacks, structure_weight = job
+    state = GameState(config, serialized_string)
+    state.suppress_warnings(True)
+    _replay(state, build_stack)
+    _replay(state, deploy_stack)
+    _replay(state, build)
+    planner = AttackPlanner(state, structure_weight=structure_weight)
+    return state.game_map.zobrist_hash(), [planner.evaluate(actions, state, 1) for actions in attacks]
+
+
+class Lookahead:
+    """Scores builds by the attacks the enemy is likely to answer with, a one ply expectimax.
+    We choose a build, the enemy's attack is a chance node over likely attacks with their probabilities,
+    and each leaf is the AttackPlanner estimate of the enemy attack on the board with our build.
+
+        lookahead = gamelib.Lookahead(game_state)
+        build = lookahead.best_build([[], [("DF", 3, 12)], [("DF", 24, 12)]], time_limit=0.5)
+
+    The likely attacks default to enemy_attacks: all of the enemy's projected MP in scouts or in
+    demolishers, from the open enemy spawn locations where they take the least damage. Pass your
+    own (from replays or an opponent model) as attacks. Leaf scores are cached by the board's
+    Zobrist hash and the attack, and every leaf scored (not those found in the cache) counts against max_nodes.
+
+    With processes, builds are scored in a pool of worker processes that is kept until close() is called,
+    or in the pool you pass. Workers rebuild the board from the turn's serialized string and the spawns,
+    upgrades and removals made with attempt_spawn, attempt_upgrade and attempt_remove. A worker whose board
+    doesn't hash the same as ours (because the game map was also changed directly) is ignored, and its build
+    is scored in this process instead.
+
+    Attributes :
+        * game_state (:obj: GameState): The game state to search from, it is not changed
+        * attacks (list): A list of (probability, actions), actions being a list of (unit_type, x, y, count)
+          for the enemy. enemy_attacks() if None
+        * max_nodes (int): The most leaves scored by a search, the best build found so far is returned after
+        * processes (int): The number of worker processes to score builds in, 0 or None to score them in this process
+          (unless a pool is given)
+        * nodes (int): The number of leaves scored by the last search
+        * expected (float): The expected enemy score of the last best build
+        * worst (float): The worst enemy score over the likely attacks of the last best build
+
+    """
+    def __init__(self, game_state, attacks=None, max_nodes=2000, processes=None, structure_weight=0.01, pool=None):
+        """Sets up the lookahead
+
+        Args:
+            game_state: A GameState object
+            attacks: A list of (probability, actions) the enemy may play, enemy_attacks() if None
+            max_nodes: The most leaves scored by a search
+            processes: The number of worker processes to score builds in, 0 or None for none
+            structure_weight: The score of a point of damage to our structures, an enemy breach scores 1
+            pool: A multiprocessing Pool to score builds in, to share one between turns. It is not closed by close()
+
+        """
+        unit_information = game_state.config["unitInformation"]
+        self.game_state = game_state
+        self.attacks = attacks
+        self.max_nodes = max_nodes
+        self.processes = processes
+        self.nodes = 0
+        self.expected = 0
+        self.worst = 0
+        self.SCOUT = unit_information[3]["shorthand"]
+        self.DEMOLISHER = unit_information[4]["shorthand"]
+        self.UPGRADE = unit_information[7]["shorthand"]
+        self.__planner = AttackPlanner(game_state, structure_weight=structure_weight)
+        self.__leaves = TranspositionTable(20000)
+        self.__pool = pool
+        self.__owns_pool = False
+
+    def enemy_attacks(self, num=4, turns_in_future=1):
+        """Guesses the enemy's likely attacks with a heuristic: every unit type spending all of the enemy's MP
+        at the open enemy spawn locations whose paths take the least damage.
+
+        Args:
+            num: The number of spawn locations to use
+            turns_in_future: The turn the enemy's MP is projected to with project_future_MP, 0 for the MP it has now
+
+        Returns:
+            A list of (probability, actions), with the same probability for every attack
+
+        """
+        state = self.game_state
+        if turns_in_future > 0:
+            mp = state.project_future_MP(turns_in_future, 1)
+        else:
+            mp = state.get_resource(state.MP, 1)
+        threat_map = state.get_threat_map()
+        starts = [location for edge in [state.game_map.TOP_LEFT, state.game_map.TOP_RIGHT]
+                  for location in state.game_map.get_edge_locations(edge) if not state.contains_stationary_unit(location)]
+        paths = state.find_paths_to_edges(starts)
+        damages = sorted((threat_map.unit_path_damage(self.SCOUT, path, 1), location) for location, path in zip(starts, paths) if path is not None)
+
+        actions = []
+        for _, location in damages[:num]:
+            for unit_type in [self.SCOUT, self.DEMOLISHER]:
+                count = int(mp // state.type_cost(unit_type)[state.MP])
+                if count > 0:
+                    actions.append([(unit_type, location[0], location[1], count)])
+        return [(1 / len(actions), attack) for attack in actions] if actions else []
+
+    def __apply(self, state, build):
+        """Makes a build of (unit_type, x, y) on a state, unit_type being the upgrade shorthand for upgrades
+        """
+        for unit_type, x, y in build:
+            if unit_type == self.UPGRADE:
+                state.attempt_upgrade([x, y])
+            else:
+                state.attempt_spawn(unit_type, [x, y])
+
+    def __aggregate(self, attacks, scores):
+        """The expected and worst enemy score over the attacks
+        """
+        expected = sum(probability * score for (probability, _), score in zip(attacks, scores))
+        return expected, max(scores, default=0)
+
+    def evaluate(self, build, attacks=None):
+        """Scores a build against the likely enemy attacks
+
+        Args:
+            build: A list of (unit_type, x, y) to build, unit_type being the upgrade shorthand ('UP') for upgrades
+            attacks: A list of (probability, actions), the lookahead's attacks if None
+
+        Returns:
+            The expected enemy score (breaches plus structure_weight times the damage to our structures)
+            and the worst enemy score over the attacks
+
+        """
+        if attacks is None:
+            attacks = self.__likely_attacks()
+        state, board = self.__board(build)
+        return self.__score(state, board, attacks)
+
+    def __board(self, build):
+        """A fork of the game state with a build made on it, and the Zobrist hash of its map
+        """
+        state = self.game_state.fork()
+        state.suppress_warnings(True)
+        self.__apply(state, build)
+        return state, state.game_map.zobrist_hash()
+
+    def __missing(self, board, attacks):
+        """The attacks whose leaf is not cached yet for a board
+        """
+        return [actions for _, actions in attacks if (board, tuple(actions)) not in self.__leaves]
+
+    def __score(self, state, board, attacks):
+        """Scores the leaves of a board, from the cache when they are in it
+        """
+        scores = []
+        for _, actions in attacks:
+            key = (board, tuple(actions))
+            score = self.__leaves.get(key)
+            if score is None:
+                self.nodes += 1
+                score = self.__planner.evaluate(actions, state, 1)
+                self.__leaves.put(key, score)
+            scores.append(score)
+        return self.__aggregate(attacks, scores)
+
+    def __likely_attacks(self):
+        """The lookahead's attacks, guessed with enemy_attacks the first time if none were given
+        """
+        if self.attacks is None:
+            self.attacks = self.enemy_attacks()
+        return self.attacks
+
+    def __get_pool(self):
+        """The pool to score builds in, created the first time if none was given. None if processes can't be forked.
+        """
+        if self.__pool is None:
+            try:
+                self.__pool = multiprocessing.get_context("fork").Pool(self.processes)
+            except ValueError:
+                self.processes = None
+                return None
+            self.__owns_pool = True
+        return self.__pool
+
+    def __evaluate_in_pool(self, builds, attacks, deadline):
+        """Scores the builds in worker processes within the node budget, and caches the scores like evaluate
+        """
+        state = self.game_state
+        jobs = []
+        planned = self.nodes
+        for build in builds:
+            board = self.__board(build)[1]
+            missing = self.__missing(board, attacks)
+            if planned + len(missing) > self.max_nodes:
+                break
+            if missing:
+                planned += len(missing)
+                jobs.append((build, board, missing))
+        pool = self.__get_pool() if jobs else None
+        if pool is None:
+            return
+
+        pending = pool.map_async(_evaluate_in_process, [
+            (state.config, state.serialized_string, list(state._build_stack), list(state._deploy_stack),
+             build, missing, self.__planner.structure_weight) for build, _, missing in jobs])
+        try:
+            results = pending.get(max(deadline - time.time(), 0))
+        except multiprocessing.TimeoutError:
+            return
+
+        for (_, board, missing), (worker_board, scores) in zip(jobs, results):
+            if worker_board != board:
+                continue
+            self.nodes += len(missing)
+            for actions, score in zip(missing, scores):
+                self.__leaves.put((board, tuple(actions)), score)
+
+    def best_build(self, builds, time_limit=1.0):
+        """Searches for the build with the lowest expected enemy score, the worst case breaks ties
+
+        Args:
+            builds: A list of builds to choose from, each a list of (unit_type, x, y).
+                For example plans of DefensePlanner, or single structures.
+            time_limit: Seconds to search for, the best build found so far is returned when they run out
+
+        Returns:
+            The best build, empty if none could be scored. expected and worst hold its scores.
+
+        """
+        deadline = time.time() + time_limit
+        attacks = self.__likely_attacks()
+        self.nodes = 0
+        if (self.processes or self.__pool is not None) and len(builds) > 1:
+            self.__evaluate_in_pool(builds, attacks, deadline)
+
+        best_score, best_build = None, []
+        for build in builds:
+            if time.time() > deadline:
+                break
+            state, board = self.__board(build)
+            if self.nodes + len(self.__missing(board, attacks)) > self.max_nodes:
+                break
+            score = self.__score(state, board, attacks)
+            if best_score is None or score < best_score:
+                best_score, best_build = score, build
+
+        self.expected, self.worst = best_score if best_score is not None else (0, 0)
+        return list(best_build)
+
+    def close(self):
+        """Stops the worker processes created by this lookahead, a pool that was passed in is left running
+        """
+        if self.__owns_pool:
+            self.__pool.terminate()
+            self.__pool = None
+            self.__owns_pool = False
@@ -80,6 +80,63 @@ class ShortestPathFinder:
         self._validate(ideal_endpoints, end_points)
         return self._get_path(start_point, end_points)
 
+    def navigate_many(self, start_points, end_points, game_state, keep_map=False):
+        """Finds the paths units at many locations would take to reach the same set of endpoints.
+        Gives the same paths as calling navigate_multiple_endpoints for every start point, but the
+        pathlengths are only computed once for every pocket of pathable space instead of once per unit.
+
+        Args:
+            * start_points: The starting locations of the units
+            * end_points: The end points of the units, should be a list of edge locations
+            * game_state: The current game state
+            * keep_map: Reuse the pathlengths already found by this path finder, which must have been
+              found for the same end points and game state (or come from mirrored())
+
+        Returns:
+            A list with the path of every start point, in the same order. None for start points
+            that are blocked by a structure, since no unit can be spawned there.
+
+        """
+        if not keep_map:
+            self.initialize_map(game_state)
+            for location in self.game_state.game_map:
+                if self.game_state.contains_stationary_unit(location):
+                    self.game_map[location[0]][location[1]].blocked = True
+
+        paths = []
+        for start_point in start_points:
+            node = self.game_map[start_point[0]][start_point[1]]
+            if node.blocked:
+                paths.append(None)
+                continue
+            # every start point in the same pocket has the same most ideal tile, so its pathlengths are already set
+            if not node.visited_validate:
+                ideal_endpoints = self._idealness_search(start_point, end_points)
+                self._validate(ideal_endpoints, end_points)
+            paths.append(self._get_path(start_point, end_points))
+        return paths
+
+    def mirrored(self):
+        """Gets a new path finder with the pathlengths found by this one mirrored across the vertical center line.
+        Only valid when the board is symmetric (see GameMap.is_symmetric), the pathlengths toward an edge are then
+        the mirror of the pathlengths toward the mirrored edge. Pass keep_map=True to navigate_many to use them.
+
+        Returns:
+            A ShortestPathFinder for the mirrored end points
+
+        """
+        finder = ShortestPathFinder()
+        finder.initialize_map(self.game_state)
+        size = self.game_state.ARENA_SIZE
+        for x in range(size):
+            for y in range(size):
+                node, source = finder.game_map[x][y], self.game_map[size - 1 - x][y]
+                node.visited_idealness = source.visited_idealness
+                node.visited_validate = source.visited_validate
+                node.blocked = source.blocked
+                node.pathlength = source.pathlength
+        return finder
+
     def _idealness_search(self, start, end_points):
         """
         Finds the most ideal tile in our 'pocket' of pathable space. 
@@ -315,3 +372,32 @@ class ShortestPathFinder:
             sys.stderr.write(" ")
         sys.stderr.write(str(number))
         sys.stderr.write(" ")
+
+
+def path_timeline(path, speed):
+    """Gets the frames a mobile unit spends on every location of a path.
+    Like the game engine, the unit builds up speed every frame and moves one location each time it reaches 1,
+    so a unit with speed 0.5 stays 2 frames on every location.
+
+    Args:
+        path: A list of locations, for example from GameState.find_path_to_edge
+        speed: The speed of the unit
+
+    Returns:
+        A list of (location, entry frame, exit frame) for every location of the path, frames counted
+        from the unit spawning. The unit is on a location from its entry frame up to (not including) its exit frame.
+
+    """
+    timeline = []
+    frame = 0
+    progress = 0.0
+    for location in path:
+        entry = frame
+        while True:
+            frame += 1
+            progress += speed
+            if progress >= 1 - 1e-9:
+                progress -= 1
+                break
+        timeline.append((location, entry, frame))
+    return timeline
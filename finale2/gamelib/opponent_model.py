@@ -0,0 +1,288 @@
+import json
+
+
+class OpponentModel:
+    """Learns what a player tends to do from the action frames, to predict its next attack.
+    Feed it every action frame in on_action_frame, and start every turn in on_turn before asking it anything:
+
+        def on_action_frame(self, turn_string):
+            self.opponent_model.update(json.loads(turn_string))
+
+        def on_turn(self, turn_state):
+            game_state = gamelib.GameState(self.config, turn_state)
+            self.opponent_model.start_turn(game_state)
+            edge, probability = self.opponent_model.predict_edge()
+
+    Every turn is folded into counters and histograms when the next one starts, and everything learned
+    so far is multiplied by decay first, so recent turns count the most. The counters have a fixed size
+    (the spawn locations, unit types and attack size bins) and keep running totals, so every query takes
+    the same time however long the game is.
+
+    Attributes :
+        * player_index (int): The player modelled, 1 for your opponent and 0 for you
+        * decay (float): What the weight of a turn is multiplied by every turn after it
+        * turns (int): The number of turns learned from
+        * edges (list): edges[edge] is the decayed number of attacks mostly spawned on that edge, edge being
+          GameMap.TOP_RIGHT, TOP_LEFT, BOTTOM_LEFT or BOTTOM_RIGHT
+        * locations (dict): The decayed number of mobile units spawned at every (x, y)
+        * unit_types (list): unit_types[i] is the decayed number of mobile units spawned of the unit type with index i in the config
+        * sizes (list): sizes[i] is the decayed number of attacks that spent between i and i + 1 MP, the last bin holds the larger ones
+
+    """
+    def __init__(self, config, player_index=1, decay=0.8, size_bins=30):
+        """Sets up an empty model
+
+        Args:
+            config: The game config
+            player_index: The player to model, 1 for your opponent and 0 for you
+            decay: What the weight of a turn is multiplied by every turn after it
+            size_bins: The number of bins of the attack size histogram, one per MP
+
+        """
+        self.player_index = player_index
+        self.decay = decay
+        self.turns = 0
+        self.HALF_ARENA = 14
+        self.edges = [0.0] * 4
+        self.locations = {}
+        self.unit_types = [0.0] * len(config["unitInformation"])
+        self.sizes = [0.0] * size_bins
+        self.__costs = [info.get("cost2", 0) for info in config["unitInformation"]]
+        self.__shorthands = [info.get("shorthand") for info in config["unitInformation"]]
+        self.__mobile = [3, 4, 5]
+
+        # running totals, all decayed like the histograms
+        self.__turn_weight = 0.0
+        self.__attack_weight = 0.0
+        self.__spent = 0.0
+        self.__spent_fraction = 0.0
+        self.__unit_count = 0.0
+        self.__lost = 0.0
+        self.__rebuilt = 0.0
+        self.__removal_weight = 0.0
+        self.__attacks_after_removal = 0.0
+        self.__destroyed = set()
+        self.__last_removed = False
+
+        self.__turn = None
+        self.__new_turn()
+
+    def __new_turn(self):
+        """Resets what is learned about the turn being played
+        """
+        self.__turn_mp = None
+        self.__turn_spent = 0.0
+        self.__turn_edges = [0.0] * 4
+        self.__turn_locations = {}
+        self.__turn_units = {}
+        self.__turn_lost = 0
+        self.__turn_rebuilt = 0
+        self.__turn_removed = False
+
+    def __edge_of(self, location):
+        """The edge a spawn location is on, see GameMap
+        """
+        x, y = location
+        if y >= self.HALF_ARENA:
+            return 1 if x < self.HALF_ARENA else 0
+        return 2 if x < self.HALF_ARENA else 3
+
+    def __close_turn(self):
+        """Folds the turn being played into the counters, after decaying them
+        """
+        if self.__turn is None:
+            return
+        for values in [self.edges, self.unit_types, self.sizes]:
+            values[:] = [value * self.decay for value in values]
+        for location in self.locations:
+            self.locations[location] *= self.decay
+        self.__turn_weight = self.__turn_weight * self.decay + 1
+        self.__attack_weight *= self.decay
+        self.__spent *= self.decay
+        self.__spent_fraction *= self.decay
+        self.__unit_count *= self.decay
+        self.__lost = self.__lost * self.decay + self.__turn_lost
+        self.__rebuilt = self.__rebuilt * self.decay + self.__turn_rebuilt
+        self.__removal_weight *= self.decay
+        self.__attacks_after_removal *= self.decay
+
+        attacked = self.__turn_spent > 0
+        if attacked:
+            self.__attack_weight += 1
+            self.__spent += self.__turn_spent
+            self.__spent_fraction += min(1, self.__turn_spent / self.__turn_mp) if self.__turn_mp else 1
+            edge = max(range(4), key=lambda edge: self.__turn_edges[edge])
+            self.edges[edge] += 1
+            self.sizes[min(int(self.__turn_spent), len(self.sizes) - 1)] += 1
+            for location, count in self.__turn_locations.items():
+                self.locations[location] = self.locations.get(location, 0) + count
+            for index, count in self.__turn_units.items():
+                self.unit_types[index] += count
+                self.__unit_count += count
+        if self.__last_removed:
+            self.__removal_weight += 1
+            self.__attacks_after_removal += attacked
+        self.__last_removed = self.__turn_removed
+
+        self.turns += 1
+        self.__turn = None
+        self.__new_turn()
+
+    def update(self, frame):
+        """Learns from a frame of the game, in the order they are received
+
+        Args:
+            frame: An action frame or turn state, as the string from the engine or parsed with json.loads
+
+        """
+        if isinstance(frame, str):
+            frame = json.loads(frame)
+        state_type, turn_number = int(frame["turnInfo"][0]), int(frame["turnInfo"][1])
+        stats = frame.get("p2Stats" if self.player_index == 1 else "p1Stats")
+        if state_type != 1:
+            # the turn state starts a new turn, and shows the MP the player has for it
+            self.__close_turn()
+            if stats is not None:
+                self.__turn_mp = float(stats[2])
+            return
+        if turn_number != self.__turn:
+            # a frame of a new turn closes the last one when the turn state was not given
+            if self.__turn is not None:
+                self.__close_turn()
+            self.__turn = turn_number
+
+        owner = self.player_index + 1
+        events = frame.get("events", {})
+        for event in events.get("spawn", []):
+            location, type_index, _, player = event[:4]
+            if player != owner:
+                continue
+            location = tuple(location)
+            if type_index in self.__mobile:
+                self.__turn_spent += self.__costs[type_index]
+                self.__turn_edges[self.__edge_of(location)] += self.__costs[type_index]
+                self.__turn_locations[location] = self.__turn_locations.get(location, 0) + 1
+                self.__turn_units[type_index] = self.__turn_units.get(type_index, 0) + 1
+            elif type_index == 6:
+                self.__turn_removed = True
+            elif type_index < 6 and location in self.__destroyed:
+                self.__destroyed.discard(location)
+                self.__turn_rebuilt += 1
+        for event in events.get("death", []):
+            location, type_index, _, player = event[:4]
+            removed_by_owner = len(event) > 4 and event[4]
+            if player == owner and type_index not in self.__mobile and type_index < 6 and not removed_by_owner:
+                self.__destroyed.add(tuple(location))
+                self.__turn_lost += 1
+
+    def start_turn(self, game_state):
+        """Starts a new turn from its game state, like update with the turn state without parsing it again
+
+        Args:
+            game_state: The GameState of the turn starting
+
+        """
+        self.__close_turn()
+        self.__turn_mp = game_state.get_resource(game_state.MP, self.player_index)
+
+    def attack_probability(self):
+        """Predicts whether the player attacks next turn. After a turn where the player removed structures,
+        only the turns that followed a removal are counted, as removing is often done to open a path.
+
+        Returns:
+            The decayed fraction of turns with mobile units spawned, 0 before anything is learned
+
+        """
+        if self.__last_removed and self.__removal_weight > 0:
+            return self.__attacks_after_removal / self.__removal_weight
+        return self.__attack_weight / self.__turn_weight if self.__turn_weight > 0 else 0
+
+    def predict_edge(self):
+        """Predicts the edge the player's next attack will mostly spawn on
+
+        Returns:
+            The edge (GameMap.TOP_RIGHT, TOP_LEFT, BOTTOM_LEFT or BOTTOM_RIGHT) and the decayed fraction of attacks
+            that used it, or (None, 0) before any attack is seen
+
+        """
+        total = sum(self.edges)
+        if total <= 0:
+            return None, 0
+        edge = max(range(4), key=lambda edge: self.edges[edge])
+        return edge, self.edges[edge] / total
+
+    def predict_attack_size(self, mp=None):
+        """Predicts the MP the player's next attack will spend
+
+        Args:
+            mp: The MP the player will have, for example from GameState.project_future_MP. If None,
+                the decayed average MP spent on an attack is returned.
+
+        Returns:
+            The predicted MP spent, the decayed average fraction of its MP the player spends on an attack times mp
+            if mp is given. 0 before any attack is seen.
+
+        """
+        if self.__attack_weight <= 0:
+            return 0
+        if mp is None:
+            return self.__spent / self.__attack_weight
+        return mp * self.__spent_fraction / self.__attack_weight
+
+    def unit_type_share(self, unit_type):
+        """Gets how much of the player's attacks are made of a unit type
+
+        Args:
+            unit_type: The mobile unit type's shorthand
+
+        Returns:
+            The decayed fraction of the mobile units spawned that were of that type
+
+        """
+        if self.__unit_count <= 0:
+            return 0
+        return self.unit_types[self.__shorthands.index(unit_type)] / self.__unit_count
+
+    def spawn_locations(self, num=4):
+        """Gets the locations the player spawns mobile units on the most
+
+        Args:
+            num: The most locations returned
+
+        Returns:
+            A list of [x, y], most used first
+
+        """
+        ranked = sorted(self.locations, key=lambda location: -self.locations[location])
+        return [list(location) for location in ranked[:num] if self.locations[location] > 0]
+
+    def rebuild_rate(self):
+        """Gets how often the player rebuilds structures it lost
+
+        Returns:
+            The decayed number of structures rebuilt on the location one was destroyed on, over the decayed number destroyed
+        """
+        return min(1, self.__rebuilt / self.__lost) if self.__lost > 0 else 0
+
+    def likely_attacks(self, mp, num=4):
+        """Gets the player's likely attacks, for Lookahead
+
+        Args:
+            mp: The MP the player will have
+            num: The number of spawn locations to use
+
+        Returns:
+            A list of (probability, actions), actions spending all of mp on a single unit type at one of the
+            player's most used spawn locations. The probabilities are the shares of that location and unit type.
+
+        """
+        locations = self.spawn_locations(num)
+        weights = []
+        for location in locations:
+            for index in self.__mobile:
+                count = int(mp // self.__costs[index]) if self.__costs[index] > 0 else 0
+                weight = self.locations[tuple(location)] * self.unit_types[index]
+                if count > 0 and weight > 0:
+                    weights.append((weight, [(self.__shorthands[index], location[0], location[1], count)]))
+        total = sum(weight for weight, _ in weights)
+        return [(weight / total, actions) for weight, actions in weights]
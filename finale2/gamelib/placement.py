@@ -0,0 +1,98 @@
+import heapq
+from .threat_map import range_offsets
+from .unit import GameUnit
+
+
+def _weighted_count(mask, weight_planes):
+    """The sum of the weights of the cells set in mask, weight_planes is a list of (weight, the cells with that weight)
+    """
+    return sum(weight * bin(mask & plane).count("1") for weight, plane in weight_planes)
+
+
+def place_turrets(game_state, candidates, num, unit_type=None, heatmap=None, saturation=1):
+    """Picks turret locations that cover as much of the enemy's predicted paths as possible, with lazy greedy.
+
+    Every turret that can hit a location of the enemy paths adds the location's heatmap count, up to saturation
+    turrets per location (including the turrets already on the board). That value has diminishing returns, so picking
+    the turret with the largest gain every time is close to the best set, and a turret's gain can only go
+    down as others are picked. The gains are kept in a priority queue and only the top one is recomputed,
+    with the coverage of every candidate stored as a bitset over the path locations.
+
+    Args:
+        game_state: A GameState object
+        candidates: The locations turrets may be placed on
+        num: The number of turrets to pick
+        unit_type: The structure type to place, turrets if None
+        heatmap: heatmap[x][y] is the value of covering [x, y], GameState.get_path_heatmap(1) if None. Values can be floats,
+            for example decayed counts.
+        saturation: The number of turrets after which a location gains nothing more
+
+    Returns:
+        Up to num locations, in the order they were picked, and no more than can be afforded. Only candidates
+        the structure can be spawned on are picked, and not those that would add nothing.
+        The paths are not recomputed for the new turrets, so candidates should not block the paths.
+
+    """
+    if unit_type is None:
+        unit_type = game_state.config["unitInformation"][2]["shorthand"]
+    if heatmap is None:
+        heatmap, _ = game_state.get_path_heatmap(1)
+    attack_range = GameUnit(unit_type, game_state.config, 0).attackRange
+    num = min(num, game_state.number_affordable(unit_type))
+
+    # one bit for every location worth covering
+    bits = {}
+    planes = {}
+    for x in range(game_state.ARENA_SIZE):
+        for y in range(game_state.ARENA_SIZE):
+            if heatmap[x][y] > 0:
+                bits[(x, y)] = len(bits)
+                planes[heatmap[x][y]] = planes.get(heatmap[x][y], 0) | 1 << bits[(x, y)]
+    weight_planes = list(planes.items())
+
+    def cover(location, radius):
+        mask = 0
+        for dx, dy in range_offsets(radius):
+            bit = bits.get((location[0] + dx, location[1] + dy))
+            if bit is not None:
+                mask |= 1 << bit
+        return mask
+
+    # at_least[j] has the locations covered by more than j turrets
+    at_least = [0] * (saturation + 1)
+    at_least[0] = (1 << len(bits)) - 1
+
+    def add(mask):
+        for j in range(saturation, 0, -1):
+            at_least[j] |= at_least[j - 1] & mask
+
+    for location in game_state.game_map:
+        unit = game_state.contains_stationary_unit(location)
+        if unit and unit.player_index == 0 and unit.damage_i > 0:
+            add(cover(location, unit.attackRange))
+
+    covers = []
+    queue = []
+    for location in candidates:
+        if not game_state.can_spawn(unit_type, location):
+            continue
+        mask = cover(location, attack_range)
+        covers.append((list(location), mask))
+        gain = _weighted_count(mask & ~at_least[saturation], weight_planes)
+        queue.append((-gain, len(covers) - 1, at_least[saturation]))
+    heapq.heapify(queue)
+
+    picked = []
+    while queue and len(picked) < num:
+        gain, index, saturated = heapq.heappop(queue)
+        location, mask = covers[index]
+        # the gain is still exact if none of its locations were saturated since it was computed
+        if mask & (saturated ^ at_least[saturation]):
+            gain = -_weighted_count(mask & ~at_least[saturation], weight_planes)
+            heapq.heappush(queue, (gain, index, at_least[saturation]))
+            continue
+        if gain == 0:
+            break
+        picked.append(location)
+        add(mask)
+    return picked
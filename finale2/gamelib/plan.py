@@ -0,0 +1,67 @@
+class Plan:
+    """A set of changes to a game state that can be kept or undone.
+    Should be created with 'GameState.plan()', usually in a with statement:
+
+        with game_state.plan() as plan:
+            game_state.attempt_spawn(TURRET, [13, 6])
+            if not good_enough(game_state):
+                plan.rollback()
+
+    Everything attempt_spawn, attempt_upgrade and attempt_remove change while the plan is open
+    (resources, the game map, the build and deploy stacks, the threat and shield maps) is put back
+    by rollback(), at a cost that only depends on the number of changes. Leaving the with statement
+    commits the plan, unless it was rolled back or an exception was raised. Plans can be nested,
+    the inner plan has to be closed first.
+
+    Attributes :
+        * game_state (:obj: GameState): The game state the plan changes
+        * closed (bool): True once the plan was committed or rolled back
+
+    """
+    def __init__(self, game_state):
+        """Starts remembering the changes to a game state
+
+        Args:
+            game_state: A GameState object
+
+        """
+        self.game_state = game_state
+        self.closed = False
+        self.__snapshot = game_state._journal_start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if not self.closed:
+            if exc_type is None:
+                self.commit()
+            else:
+                self.rollback()
+        return False
+
+    def commit(self):
+        """Keeps every change made since the plan started
+
+        Returns:
+            The locations of the game map that were changed
+
+        """
+        if self.closed:
+            self.game_state.warn("Attempted to commit a plan that was already closed")
+            return []
+        self.closed = True
+        return self.game_state._journal_end(self.__snapshot, False)
+
+    def rollback(self):
+        """Undoes every change made since the plan started
+
+        Returns:
+            The locations of the game map that were put back
+
+        """
+        if self.closed:
+            self.game_state.warn("Attempted to roll back a plan that was already closed")
+            return []
+        self.closed = True
+        return self.game_state._journal_end(self.__snapshot, True)
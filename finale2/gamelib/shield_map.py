@@ -0,0 +1,170 @@
+import copy
+from .threat_map import range_offsets
+from .unit import GameUnit
+
+
+class ShieldMap:
+    """Holds the supports that can shield a mobile unit at every location, for both players.
+    Should usually be created with 'GameState.get_shield_map()', which keeps it up to date
+    when you spawn or upgrade structures.
+
+    Every support gives shieldPerUnit plus shieldBonusPerY for every row it is away from its
+    owner's edge (y for you, ARENA_SIZE - 1 - y for your opponent), once to every friendly
+    mobile unit that comes within its shieldRange. A unit is only shielded once by each support,
+    no matter how long it stays in range.
+
+    Attributes :
+        * game_state (:obj: GameState): The game state the shields are computed from
+        * grid (list): grid[player_index][x][y] is a list of the locations of the supports of
+          player_index that cover [x, y]. 0 for you, 1 for your opponent.
+
+    """
+    def __init__(self, game_state):
+        """Computes the coverage of every support on the map
+
+        Args:
+            game_state: A GameState object
+
+        """
+        self.game_state = game_state
+        self.ARENA_SIZE = game_state.ARENA_SIZE
+        self.grid = [[[[] for _ in range(self.ARENA_SIZE)] for _ in range(self.ARENA_SIZE)] for _ in range(2)]
+        self.__sources = {}
+
+        for location in game_state.game_map:
+            self.update_location(location)
+
+    def __apply(self, source, add):
+        """Adds or removes the coverage of a single support
+        """
+        x, y, player_index, amount, shield_range = source
+        grid = self.grid[player_index]
+        in_bounds = self.game_state.game_map.in_arena_bounds
+        for dx, dy in range_offsets(shield_range):
+            if in_bounds([x + dx, y + dy]):
+                if add:
+                    grid[x + dx][y + dy].append((x, y))
+                else:
+                    grid[x + dx][y + dy].remove((x, y))
+
+    def fork(self, game_state):
+        """Copies this map for a fork of its game state, see GameState.fork
+
+        Args:
+            game_state: The forked GameState
+
+        Returns:
+            A new ShieldMap with the same values, updated from game_state from now on
+
+        """
+        child = copy.copy(self)
+        child.game_state = game_state
+        child.grid = [[[list(supports) for supports in column] for column in grid] for grid in self.grid]
+        child.__sources = dict(self.__sources)
+        return child
+
+    def update_location(self, location):
+        """Recomputes the coverage of the support at a location.
+        Call this after changing the game map directly (add_unit, remove_unit or upgrading a unit).
+
+        Args:
+            location: The location of the structure that was added, removed or upgraded
+
+        """
+        x, y = map(int, location)
+        old_source = self.__sources.pop((x, y), None)
+        if old_source is not None:
+            self.__apply(old_source, False)
+
+        unit = self.game_state.contains_stationary_unit([x, y])
+        if unit and unit.shieldRange > 0:
+            rows = y if unit.player_index == 0 else self.ARENA_SIZE - 1 - y
+            amount = unit.shieldPerUnit + unit.shieldBonusPerY * rows
+            if amount > 0:
+                source = (x, y, unit.player_index, amount, unit.shieldRange)
+                self.__sources[(x, y)] = source
+                self.__apply(source, True)
+
+    def shield_of(self, location):
+        """Gets the shield the support at a location gives every unit it covers
+
+        Args:
+            location: The location of a support
+
+        Returns:
+            The shield given to each unit, 0 if there is no support there
+
+        """
+        source = self.__sources.get(tuple(location))
+        return source[3] if source is not None else 0
+
+    def supports_at(self, location, player_index=0):
+        """Gets the supports covering a location
+
+        Args:
+            location: The location of a hypothetical mobile unit
+            player_index: The player controlling the mobile unit, 0 for you 1 for the enemy
+
+        Returns:
+            A list of the locations of the friendly supports in range of the location
+
+        """
+        x, y = location
+        return list(self.grid[player_index][x][y])
+
+    def cumulative_shield(self, path, player_index=0):
+        """Gets the shield a single unit has picked up at every step of a path
+
+        Args:
+            path: A list of locations, for example from GameState.find_path_to_edge
+            player_index: The player controlling the mobile units taking the path, 0 for you 1 for the enemy
+
+        Returns:
+            A list with the total shield received after reaching each location of the path
+
+        """
+        grid = self.grid[player_index]
+        seen = set()
+        total = 0
+        shields = []
+        for x, y in path:
+            for support in grid[x][y]:
+                if support not in seen:
+                    seen.add(support)
+                    total += self.__sources[support][3]
+            shields.append(total)
+        return shields
+
+    def path_shield(self, path, player_index=0):
+        """Gets the total shield a single unit picks up along a path
+
+        Args:
+            path: A list of locations, for example from GameState.find_path_to_edge
+            player_index: The player controlling the mobile units taking the path, 0 for you 1 for the enemy
+
+        Returns:
+            The sum of the shield of every distinct support covering any location of the path
+
+        """
+        grid = self.grid[player_index]
+        supports = set()
+        for x, y in path:
+            supports.update(grid[x][y])
+        return sum(self.__sources[support][3] for support in supports)
+
+    def effective_health(self, unit_type, path, num=1, player_index=0):
+        """Gets the total health of a group of mobile units after the shields along a path,
+        every unit of the group is shielded by each support on the way.
+
+        Args:
+            unit_type: The type of the mobile units
+            path: A list of locations, for example from GameState.find_path_to_edge
+            num: The number of units in the group
+            player_index: The player controlling the mobile units, 0 for you 1 for the enemy
+
+        Returns:
+            num * (the units' starting health + the shield picked up along the path)
+
+        """
+        unit = GameUnit(unit_type, self.game_state.config)
+        return num * (unit.max_health + self.path_shield(path, player_index))
@@ -1,7 +1,18 @@
 import unittest
 import json
+import os
+import tempfile
 from .game_state import GameState
 from .unit import GameUnit
+from .navigation import path_timeline
+from .transposition import TranspositionTable
+from .defense_planner import DefensePlanner
+from .placement import place_turrets
+from .attack_planner import AttackPlanner
+from .lookahead import Lookahead, _evaluate_in_process
+from .opponent_model import OpponentModel
+from .knowledge import KnowledgeStore, opening_signature
+from .util import load_params, PARAMS_ENV
 
 class BasicTests(unittest.TestCase):
 
@@ -275,3 +286,461 @@ class BasicTests(unittest.TestCase):
         actual = game.project_future_MP(turns)
         self.assertAlmostEqual(actual, expected, 0, "Expected {} MP {} turns from now, got {}".format(expected, turns, actual))
 
+
+    def test_threat_map(self):
+        game = self.make_turn_0_map()
+        threat_map = game.get_threat_map()
+        self.assertEqual(0, threat_map.damage_at([13, 8], 1), "There are no turrets yet")
+
+        game.attempt_spawn("DF", [13, 6])
+        self.assertEqual(5, threat_map.damage_at([13, 8], 1), "The new turret should threaten enemy units in range")
+        self.assertEqual(0, threat_map.damage_at([13, 8], 0), "Our own turret should not threaten our units")
+        self.assertEqual(0, threat_map.damage_at([13, 10], 1), "The turret should not reach outside its range")
+
+        game.attempt_upgrade([13, 6])
+        self.assertEqual(15, threat_map.damage_at([13, 9], 1), "The upgrade should increase damage and range")
+
+        game.game_map.add_unit("DF", [13, 20], 1)
+        threat_map.update_location([13, 20])
+        for location in [[13, 18], [12, 19], [14, 21]]:
+            expected = sum(unit.damage_i for unit in game.get_attackers(location, 0))
+            self.assertEqual(expected, threat_map.damage_at(location, 0), "Threat should match get_attackers at {}".format(location))
+
+        game.game_map.remove_unit([13, 20])
+        threat_map.update_location([13, 20])
+        self.assertEqual(0, threat_map.damage_at([13, 18], 0), "The removed turret should no longer threaten")
+        self.assertEqual(30, threat_map.path_damage([[13, 8], [13, 9]], 1), "Path damage should sum every location")
+
+    def test_path_timeline(self):
+        game = self.make_turn_0_map()
+        path = [[13, 6], [13, 7], [13, 8]]
+        self.assertEqual([([13, 6], 0, 1), ([13, 7], 1, 2), ([13, 8], 2, 3)], path_timeline(path, 1))
+        self.assertEqual([([13, 6], 0, 2), ([13, 7], 2, 4), ([13, 8], 4, 6)], path_timeline(path, 0.5), "Slower units should stay longer on every location")
+        self.assertEqual([([13, 6], 0, 3), ([13, 7], 3, 6)], path_timeline(path[:2], 1 / 3.), "Fractional speeds should add up like the engine")
+
+        timeline = game.find_path_timeline([13, 0], "EI")
+        self.assertEqual(game.find_path_to_edge([13, 0]), [location for location, _, _ in timeline])
+        self.assertEqual(2 * len(timeline), timeline[-1][2])
+        self.assertIsNone(game.find_path_timeline([13, 0], "DF"), "Structures don't move")
+
+        game.game_map.add_unit("DF", [13, 20], 1)
+        threat_map = game.get_threat_map()
+        path = [[13, 16], [13, 17], [13, 18], [13, 19]]
+        self.assertEqual(threat_map.path_damage(path, 0), threat_map.unit_path_damage("PI", path, 0), "Speed 1 should take one hit per location")
+        self.assertEqual(2 * threat_map.path_damage(path, 0), threat_map.unit_path_damage("EI", path, 0))
+        self.assertEqual(4 * threat_map.path_damage(path, 0), threat_map.timeline_damage(path_timeline(path, 0.25), 0))
+
+    def test_batched_paths(self):
+        game = self.make_turn_0_map()
+        for x in range(3, 25):
+            game.game_map.add_unit("FF", [x, 13], 0)
+        game.game_map.add_unit("FF", [13, 27], 1)
+        game.game_map.add_unit("FF", [5, 16], 1)
+        game.game_map.add_unit("FF", [6, 16], 1)
+        game.game_map.add_unit("FF", [6, 15], 1)
+        game.game_map.add_unit("FF", [5, 15], 1)
+
+        starts = game.game_map.get_edge_locations(game.game_map.TOP_LEFT) + game.game_map.get_edge_locations(game.game_map.TOP_RIGHT) + [[8, 14]]
+        paths = game.find_paths_to_edges(starts)
+        for start, path in zip(starts, paths):
+            if game.contains_stationary_unit(start):
+                self.assertIsNone(path, "Blocked starts can't spawn units")
+            else:
+                self.assertEqual(game.find_path_to_edge(start), path, "Batched path from {} should match find_path_to_edge".format(start))
+
+        heatmap, crossings = game.get_path_heatmap(1)
+        expected = [[0] * game.ARENA_SIZE for _ in range(game.ARENA_SIZE)]
+        for start, path in zip(starts[:-1], paths[:-1]):
+            for x, y in path or []:
+                expected[x][y] += 1
+        self.assertEqual(expected, heatmap)
+        self.assertTrue(crossings, "Paths should cross into our half around the walls")
+        self.assertTrue(all(y == 13 and x in [0, 1, 2, 25, 26, 27] for x, y in crossings), crossings)
+
+    def test_mirror(self):
+        game = self.make_turn_0_map()
+        game_map = game.game_map
+        self.assertEqual([27, 13], game_map.mirror_location([0, 13]))
+        self.assertEqual(game_map.TOP_LEFT, game_map.mirror_edge(game_map.TOP_RIGHT))
+        self.assertEqual(game_map.get_edge_locations(game_map.BOTTOM_RIGHT), game_map.mirror_path(game_map.get_edge_locations(game_map.BOTTOM_LEFT)))
+
+        for x in [4, 5, 6, 10]:
+            game_map.add_unit("FF", [x, 16], 1)
+            game_map.add_unit("FF", [27 - x, 16], 1)
+        game_map.add_unit("DF", [8, 10], 0)
+        self.assertTrue(game_map.is_symmetric(1), "The enemy structures are mirrored")
+        self.assertFalse(game_map.is_symmetric(), "Our turret is not mirrored")
+        game_map.add_unit("DF", [19, 10], 0)
+        self.assertTrue(game_map.is_symmetric())
+
+        for start in [[5, 18], [22, 18], [13, 27], [14, 27]]:
+            for edge in [game_map.BOTTOM_LEFT, game_map.BOTTOM_RIGHT]:
+                self.assertEqual(game.find_path_to_edge(start, edge), game.find_path_to_edge_cached(start, edge))
+        self.assertTrue(game._symmetric)
+
+        game.attempt_spawn("FF", [13, 5])
+        self.assertFalse(game.game_map.is_symmetric())
+        self.assertEqual(game.find_path_to_edge([13, 27]), game.find_path_to_edge_cached([13, 27]), "Spawning should clear the kept pathlengths")
+        self.assertFalse(game._symmetric)
+
+    def test_fork(self):
+        game = self.make_turn_0_map()
+        game.attempt_spawn("DF", [[13, 6], [10, 6]])
+        threat_map = game.get_threat_map()
+
+        child = game.fork()
+        self.assertIs(game.game_map[13, 6], child.game_map[13, 6], "Unchanged locations should be shared")
+        self.assertIs(threat_map, child.get_threat_map())
+
+        child.attempt_spawn("DF", [16, 6])
+        child.attempt_upgrade([13, 6])
+        self.assertEqual(game.get_resource(game.SP) - 6, child.get_resource(child.SP))
+        self.assertFalse(game.contains_stationary_unit([16, 6]), "The parent should not see the child's structures")
+        self.assertFalse(game.contains_stationary_unit([13, 6]).upgraded, "The parent's turret should not be upgraded")
+        self.assertTrue(child.contains_stationary_unit([13, 6]).upgraded)
+        self.assertEqual(2, len(game._build_stack))
+        self.assertEqual(4, len(child._build_stack))
+        self.assertEqual(0, game.get_threat_map().damage_at([16, 8], 1), "The parent's threat map should be unchanged")
+        self.assertEqual(5, child.get_threat_map().damage_at([16, 8], 1))
+        self.assertEqual(15, child.get_threat_map().damage_at([13, 9], 1))
+
+        game.attempt_spawn("FF", [13, 2])
+        self.assertFalse(child.contains_stationary_unit([13, 2]), "The child should not see the parent's later structures")
+        grandchild = child.fork()
+        grandchild.game_map.remove_unit([16, 6])
+        self.assertTrue(child.contains_stationary_unit([16, 6]))
+        self.assertEqual(child.find_path_to_edge([13, 27]), child.fork().find_path_to_edge([13, 27]))
+
+        game.clear_path_cache()
+        blocked = game.fork()
+        blocked.game_map.add_unit("FF", [13, 1], 0)
+        blocked.find_path_to_edge_cached([13, 27])
+        self.assertEqual({}, game._path_finders, "Pathlengths cached on a fork should not leak into the parent")
+        self.assertEqual(game.find_path_to_edge([13, 27]), game.find_path_to_edge_cached([13, 27]))
+
+    def test_plan(self):
+        game = self.make_turn_0_map()
+        game.attempt_spawn("DF", [13, 6])
+        threat_map = game.get_threat_map()
+        resources = game.get_resources()
+
+        with game.plan() as plan:
+            game.attempt_spawn("DF", [16, 6])
+            game.attempt_upgrade([13, 6])
+            game.attempt_remove([13, 6])
+            game.attempt_spawn("PI", [13, 0], 2)
+            self.assertEqual(15, threat_map.damage_at([13, 9], 1))
+            self.assertEqual(sorted([[16, 6], [13, 6], [13, 0]]), sorted(plan.rollback()))
+        self.assertTrue(plan.closed)
+        self.assertEqual(resources, game.get_resources(), "Rollback should give back the resources")
+        self.assertEqual([("DF", 13, 6)], game._build_stack)
+        self.assertEqual([], game._deploy_stack)
+        self.assertFalse(game.contains_stationary_unit([16, 6]))
+        self.assertFalse(game.contains_stationary_unit([13, 6]).upgraded)
+        self.assertEqual([], game.game_map[13, 0])
+        self.assertEqual(0, threat_map.damage_at([13, 9], 1), "Rollback should update the threat map")
+        self.assertEqual(5, threat_map.damage_at([13, 8], 1))
+
+        with game.plan() as plan:
+            game.attempt_spawn("DF", [16, 6])
+            with game.plan() as inner:
+                game.attempt_upgrade([16, 6])
+            self.assertTrue(inner.closed, "Leaving the with statement should commit")
+            self.assertTrue(game.contains_stationary_unit([16, 6]).upgraded)
+        self.assertTrue(game.contains_stationary_unit([16, 6]).upgraded, "Committed changes should stay")
+        self.assertEqual(resources[game.SP] - 6, game.get_resource(game.SP))
+
+        with game.plan() as outer:
+            game.attempt_spawn("FF", [10, 10])
+            with game.plan() as inner:
+                game.attempt_spawn("FF", [11, 10])
+            outer.rollback()
+        self.assertFalse(game.contains_stationary_unit([10, 10]))
+        self.assertFalse(game.contains_stationary_unit([11, 10]), "Rolling back the outer plan should undo committed inner plans")
+
+        try:
+            with game.plan():
+                game.attempt_spawn("FF", [10, 10])
+                raise ValueError()
+        except ValueError:
+            pass
+        self.assertFalse(game.contains_stationary_unit([10, 10]), "An exception should roll back the plan")
+
+    def test_zobrist_hash(self):
+        game = self.make_turn_0_map()
+        empty_hash = game.zobrist_hash()
+        self.assertEqual(0, game.game_map.zobrist_hash())
+
+        game.attempt_spawn("DF", [13, 6])
+        game.attempt_spawn("FF", [10, 10])
+        game.attempt_spawn("PI", [13, 0])
+        board_hash = game.game_map.zobrist_hash()
+        self.assertNotEqual(0, board_hash)
+
+        other = self.make_turn_0_map()
+        other.game_map.add_unit("FF", [10, 10], 0)
+        other.game_map.add_unit("DF", [13, 6], 0)
+        self.assertEqual(board_hash, other.game_map.zobrist_hash(), "The order of changes should not matter")
+        self.assertNotEqual(game.zobrist_hash(), other.zobrist_hash(), "Different resources should change the hash")
+        other.game_map.add_unit("DF", [13, 6], 1)
+        self.assertNotEqual(board_hash, other.game_map.zobrist_hash(), "The owner should be part of the hash")
+
+        with game.plan() as plan:
+            game.attempt_upgrade([13, 6])
+            self.assertNotEqual(board_hash, game.game_map.zobrist_hash())
+            plan.rollback()
+        self.assertEqual(board_hash, game.game_map.zobrist_hash(), "Rollback should restore the hash")
+        game.game_map.remove_unit([13, 6])
+        game.game_map.remove_unit([10, 10])
+        self.assertEqual(0, game.game_map.zobrist_hash())
+
+        child = other.fork()
+        child.game_map.upgrade_unit([13, 6])
+        expected = child.game_map.zobrist_hash()
+        child.game_map.rehash()
+        self.assertEqual(expected, child.game_map.zobrist_hash())
+        self.assertNotEqual(expected, other.game_map.zobrist_hash())
+        self.assertEqual(empty_hash, self.make_turn_0_map().zobrist_hash())
+
+        table = TranspositionTable(2)
+        table.put(1, "a")
+        table.put(2, "b")
+        self.assertEqual("a", table.get(1))
+        table.put(3, "c")
+        self.assertNotIn(2, table, "The least recently used entry should be dropped")
+        self.assertEqual(2, len(table))
+        self.assertEqual("d", table.get_or_compute(4, lambda: "d"))
+        self.assertEqual("d", table.get_or_compute(4, lambda: "e"))
+        self.assertEqual((2, 1), (table.hits, table.misses))
+
+    def test_defense_planner(self):
+        game = self.make_turn_0_map()
+        for x in range(28):
+            if x not in [1, 26]:
+                game.game_map.add_unit("FF", [x, 13], 0)
+        game.clear_path_cache()
+        board_hash = game.zobrist_hash()
+
+        planner = DefensePlanner(game, [[2, 12], [25, 12], [13, 11], [3, 11]], ["DF"])
+        actions = planner.plan(budget=8, time_limit=5)
+        self.assertEqual(board_hash, game.zobrist_hash(), "Planning should not change the game state")
+        self.assertEqual(sorted([("DF", 2, 12), ("DF", 25, 12)]), sorted(actions[:2]), "Both gaps in the wall should be covered first")
+        self.assertEqual(("UP", 2, 12), actions[2])
+        self.assertEqual(3, planner.apply(actions))
+        self.assertEqual(17, game.get_resource(game.SP))
+        self.assertEqual([], planner.plan(budget=1), "Nothing is affordable")
+
+    def test_place_turrets(self):
+        game = self.make_turn_0_map()
+        heatmap = [[0] * game.ARENA_SIZE for _ in range(game.ARENA_SIZE)]
+        for y in range(4, 12):
+            heatmap[13][y] = 1
+        heatmap[5][10] = 4
+        candidates = [[15, 6], [15, 9], [11, 8], [5, 8], [20, 5]]
+
+        self.assertEqual([[5, 8]], place_turrets(game, candidates, 1, heatmap=heatmap), "The most valuable location should be covered first")
+        picked = place_turrets(game, candidates, 5, heatmap=heatmap)
+        self.assertEqual([[5, 8], [15, 6], [15, 9]], picked[:3])
+        self.assertNotIn([20, 5], picked, "Candidates that cover nothing should not be picked")
+        self.assertNotIn([11, 8], picked, "Locations covered once are worth nothing more")
+        self.assertIn([11, 8], place_turrets(game, candidates, 5, heatmap=heatmap, saturation=2))
+
+        game.attempt_spawn("DF", [5, 12])
+        self.assertEqual([15, 6], place_turrets(game, candidates, 1, heatmap=heatmap)[0], "Existing turrets should already cover their range")
+
+        heatmap[15][4] = 0.5
+        self.assertEqual([[17, 4]], place_turrets(game, [[17, 4], [20, 5]], 5, heatmap=heatmap), "Fractional weights should count")
+        self.assertNotIn([16, 20], place_turrets(game, [[16, 20], [13, 8]], 5, heatmap=heatmap), "Enemy territory can't be built on")
+        game.game_map.add_unit("DF", [15, 6], 1)
+        game.suppress_warnings(True)
+        self.assertNotIn([15, 6], place_turrets(game, candidates, 5, heatmap=heatmap))
+        game._player_resources[0]["SP"] = 2
+        self.assertEqual(1, len(place_turrets(game, candidates, 5, heatmap=heatmap)), "Only affordable turrets should be picked")
+
+    def test_attack_planner(self):
+        game = self.make_turn_0_map()
+        for location in [[24, 15], [25, 16], [23, 16], [22, 17], [26, 15]]:
+            game.game_map.add_unit("DF", location, 1)
+        game.game_map.rehash()
+        planner = AttackPlanner(game)
+
+        breaches = AttackPlanner(game, structure_weight=0)
+        self.assertEqual(5, breaches.evaluate([("PI", 14, 0, 5)]), "Every scout should breach on a safe path")
+        self.assertLess(breaches.evaluate([("PI", 13, 0, 5)]), 5, "Scouts through the turrets should die")
+        self.assertGreater(planner.evaluate([("EI", 13, 0, 1)]), 0, "Demolishers should damage the turrets they pass")
+        game.game_map.add_unit("FF", [15, 1], 0)
+        self.assertEqual(0, breaches.evaluate([("PI", 15, 1, 5)]), "Units on a blocked location should be skipped")
+        game.game_map.remove_unit([15, 1])
+
+        actions = planner.plan(time_limit=5)
+        self.assertEqual(5, sum(count for _, _, _, count in actions))
+        self.assertGreaterEqual(planner.best_score, 5)
+        self.assertEqual(5, game.get_resource(game.MP), "Planning should not spend MP")
+        self.assertEqual(actions, planner.plan(time_limit=0), "The plan should be memoized by the board")
+        self.assertEqual(5, planner.apply(actions))
+        self.assertEqual(0, game.get_resource(game.MP))
+
+    def test_lookahead(self):
+        game = self.make_turn_0_map()
+        game.suppress_warnings(True)
+        lookahead = Lookahead(game)
+        attacks = lookahead.enemy_attacks()
+        self.assertEqual(8, len(attacks), "Scouts and demolishers should be tried at the 4 safest locations")
+        self.assertAlmostEqual(1, sum(probability for probability, _ in attacks))
+        self.assertIn((0.125, [("PI", 0, 14, 8)]), attacks, "Scouts should spend the projected MP")
+
+        builds = [[], [("DF", 24, 12)], [("DF", 3, 12)]]
+        expected, worst = lookahead.evaluate([])
+        self.assertEqual(5, expected, "Every scout should breach on an empty board")
+        self.assertLess(lookahead.evaluate([("DF", 3, 12)])[0], expected, "A turret on the enemy's paths should help")
+        self.assertEqual([("DF", 3, 12)], lookahead.best_build(builds))
+        lookahead.best_build(builds)
+        self.assertEqual(0, lookahead.nodes, "Scored boards should be cached")
+        self.assertEqual(25, game.get_resource(game.SP), "Searching should not spend SP")
+
+        limited = Lookahead(game, max_nodes=len(attacks))
+        self.assertEqual([], limited.best_build(builds), "Only the first build fits in the node budget")
+        parallel = Lookahead(game, processes=2)
+        self.assertEqual([("DF", 3, 12)], parallel.best_build(builds, time_limit=10))
+        self.assertAlmostEqual(lookahead.expected, parallel.expected)
+        self.assertEqual(3 * len(attacks), parallel.nodes)
+        self.assertEqual([("DF", 3, 12)], parallel.best_build(builds, time_limit=10), "The pool should be reused")
+        self.assertEqual(0, parallel.nodes, "Cached leaves should not count against the budget")
+        parallel.close()
+        limited = Lookahead(game, max_nodes=2 * len(attacks), processes=2)
+        self.assertEqual([], limited.best_build(builds, time_limit=10), "Only the first two builds fit in the node budget")
+        self.assertEqual(2 * len(attacks), limited.nodes)
+        limited.close()
+
+        game.attempt_spawn("FF", [13, 6])
+        fork = game.fork()
+        fork.attempt_spawn("DF", [3, 12])
+        job = (game.config, game.serialized_string, game._build_stack, game._deploy_stack, [("DF", 3, 12)], [], 0.01)
+        self.assertEqual(fork.game_map.zobrist_hash(), _evaluate_in_process(job)[0], "Workers should rebuild the same board")
+        game.game_map.add_unit("FF", [13, 7], 0)
+        self.assertNotEqual(game.fork().game_map.zobrist_hash(), _evaluate_in_process(job)[0], "Direct map edits can't be rebuilt")
+
+    def test_opponent_model(self):
+        game = self.make_turn_0_map()
+        model = OpponentModel(game.config)
+        self.assertEqual((None, 0), model.predict_edge(), "Nothing should be predicted before any attack")
+
+        def turn(number, mp, spawns=(), deaths=()):
+            model.update({"turnInfo": [0, number, -1], "p2Stats": [30, 0, mp, 0]})
+            model.update({"turnInfo": [1, number, 0], "events": {"spawn": list(spawns), "death": list(deaths)}})
+
+        turn(1, 6, [[[5, 18], 3, "1", 2]] * 6 + [[[20, 7], 3, "2", 1]])
+        turn(2, 8, deaths=[[[10, 16], 2, "3", 2, False], [[11, 16], 0, "4", 2, True]])
+        turn(3, 12, [[[10, 16], 2, "5", 2], [[11, 16], 0, "6", 2], [[12, 16], 6, "7", 2]])
+        turn(4, 12, [[[22, 19], 4, "8", 2]] * 4)
+        model.update({"turnInfo": [0, 5, -1], "p2Stats": [30, 0, 10, 0]})
+
+        self.assertEqual(4, model.turns)
+        self.assertEqual(game.game_map.TOP_RIGHT, model.predict_edge()[0], "The latest attack should weigh the most")
+        self.assertAlmostEqual(1 / (1 + 0.8 ** 3), model.predict_edge()[1])
+        self.assertEqual([[22, 19], [5, 18]], model.spawn_locations(), "Our own spawns should be ignored")
+        self.assertEqual([[22, 19]], model.spawn_locations(1), "4 recent units should count more than 6 older ones")
+        self.assertAlmostEqual((6 * 0.8 ** 3 + 12) / (1 + 0.8 ** 3), model.predict_attack_size())
+        self.assertAlmostEqual(10, model.predict_attack_size(10), "Both attacks spent all the MP")
+        self.assertAlmostEqual((0.8 ** 3 + 1) / (1 + 0.8 + 0.8 ** 2 + 0.8 ** 3), model.attack_probability())
+        self.assertEqual(1, model.rebuild_rate(), "Only the destroyed turret counts, the removed wall does not")
+        self.assertEqual(0, model.unit_type_share("SI"))
+
+        attacks = model.likely_attacks(10)
+        self.assertAlmostEqual(1, sum(probability for probability, _ in attacks))
+        self.assertIn([("EI", 22, 19, 3)], [actions for _, actions in attacks])
+        self.assertIn([("PI", 5, 18, 10)], [actions for _, actions in attacks])
+
+        turn(5, 10, [[[12, 16], 6, "9", 2]])
+        model.update({"turnInfo": [0, 6, -1], "p2Stats": [30, 0, 10, 0]})
+        self.assertAlmostEqual(1, model.attack_probability(), msg="The last turn after a removal had an attack")
+
+        model.start_turn(game)
+        model.update({"turnInfo": [1, 6, 0], "events": {"spawn": [[[5, 18], 3, "10", 2]] * 5, "death": []}})
+        model.start_turn(game)
+        self.assertEqual(6, model.turns, "start_turn should close the turn like the turn state does")
+        self.assertAlmostEqual(10, model.predict_attack_size(10), msg="The 5 MP from the game state were all spent")
+
+    def test_knowledge_store(self):
+        game = self.make_turn_0_map()
+        empty = opening_signature(game)
+        game.game_map.add_unit("DF", [3, 14], 1)
+        game.game_map.add_unit("FF", [13, 5], 0)
+        signature = opening_signature(game)
+        self.assertNotEqual(empty, signature, "The opponent's structures should change the signature")
+        game.game_map.add_unit("FF", [14, 5], 0)
+        self.assertEqual(signature, opening_signature(game), "Our structures should not")
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "knowledge.db")
+            store = KnowledgeStore(path, max_entries=2)
+            self.assertEqual({}, store.get(signature))
+            store.put(signature, {"failures": 1})
+            store.put(signature, {"failures": 2})
+            store.close()
+
+            store = KnowledgeStore(path, max_entries=2)
+            self.assertEqual({"failures": 2, "games": 2}, store.get(signature), "Entries should persist between games")
+            store.put("b", {})
+            store.put("c", {})
+            self.assertEqual(2, len(store))
+            self.assertEqual({}, store.get(signature), "The oldest entry should be forgotten")
+            store.close()
+
+        broken = KnowledgeStore(os.path.join(tempfile.gettempdir(), "missing", "knowledge.db"))
+        broken.put(signature, {"failures": 1})
+        self.assertEqual({}, broken.get(signature), "An unusable file should act as an empty store")
+        self.assertEqual(0, len(broken))
+
+    def test_load_params(self):
+        defaults = {"count": 2, "ratio": 0.5, "flag": False, "anything": None}
+        def load(source):
+            old = os.environ.get(PARAMS_ENV)
+            os.environ[PARAMS_ENV] = source
+            try:
+                return load_params(defaults)
+            finally:
+                if old is None:
+                    del os.environ[PARAMS_ENV]
+                else:
+                    os.environ[PARAMS_ENV] = old
+
+        self.assertEqual({"count": 3, "ratio": 1.0, "flag": True, "anything": [1]},
+                         load('{"count": 3, "ratio": 1, "flag": true, "anything": [1], "unknown": 1}'))
+        self.assertEqual(defaults, load('{"count": 2.5, "ratio": "x"}'), "Inexact conversions should keep the defaults")
+        self.assertTrue(load('{"flag": "TRUE"}')["flag"])
+        self.assertFalse(load('{"flag": "false"}')["flag"], "The string false should not be truthy")
+        self.assertFalse(load('{"flag": 1}')["flag"], "Only booleans and their strings should be accepted")
+        self.assertFalse(load('{"flag": "yes"}')["flag"])
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "params.json")
+            with open(path, "w") as f:
+                f.write("[1, 2]")
+            self.assertEqual(defaults, load(path), "Json that is not an object should keep the defaults")
+            with open(path, "w") as f:
+                f.write('{"count": 5}')
+            self.assertEqual(5, load(path)["count"])
+
+    def test_shield_map(self):
+        game = self.make_turn_0_map()
+        game.config["unitInformation"][1].update({"shieldRange": 3, "shieldPerUnit": 2, "shieldBonusPerY": 0.5})
+        shield_map = game.get_shield_map()
+        path = [[13, 6], [13, 7], [13, 8], [13, 9], [13, 10], [13, 11]]
+        self.assertEqual(0, shield_map.path_shield(path, 0), "There are no supports yet")
+
+        game.attempt_spawn("EF", [[12, 4], [14, 12]])
+        self.assertEqual(4, shield_map.shield_of([12, 4]), "Shield should include the bonus for every row")
+        self.assertEqual(8, shield_map.shield_of([14, 12]))
+        self.assertEqual(0, shield_map.path_shield(path, 1), "Our supports should not shield enemy units")
+        self.assertEqual([4, 4, 4, 4, 12, 12], shield_map.cumulative_shield(path, 0), "Each support should shield a unit once")
+        self.assertEqual(12, shield_map.path_shield(path, 0))
+        self.assertEqual(3 * (15 + 12), shield_map.effective_health("PI", path, 3, 0))
+
+        game.game_map.add_unit("EF", [13, 20], 1)
+        shield_map.update_location([13, 20])
+        self.assertEqual([[13, 20]], [list(s) for s in shield_map.supports_at([13, 18], 1)])
+        self.assertEqual(2 + 0.5 * 7, shield_map.shield_of([13, 20]), "Enemy bonus should count rows from their edge")
+
+        game.game_map.remove_unit([14, 12])
+        shield_map.update_location([14, 12])
+        self.assertEqual(4, shield_map.path_shield(path, 0), "The removed support should no longer shield")
@@ -0,0 +1,157 @@
+import math
+import copy
+from .navigation import path_timeline
+from .unit import GameUnit
+
+
+_OFFSETS = {}
+
+def range_offsets(radius):
+    """Gets the [dx, dy] offsets of every location within radius of a location, computed once per radius
+
+    Args:
+        radius: The range of a unit (attackRange, shieldRange)
+
+    Returns:
+        A list of (dx, dy) tuples whose distance from (0, 0) is at most radius
+
+    """
+    if radius not in _OFFSETS:
+        reach = int(math.ceil(radius))
+        _OFFSETS[radius] = [(dx, dy) for dx in range(-reach, reach + 1) for dy in range(-reach, reach + 1)
+                            if math.sqrt(dx ** 2 + dy ** 2) <= radius]
+    return _OFFSETS[radius]
+
+
+class ThreatMap:
+    """Holds the damage per frame a mobile unit would take at every location, for both players.
+    Should usually be created with 'GameState.get_threat_map()', which keeps it up to date
+    when you spawn or upgrade structures.
+
+    A location is threatened by every enemy structure that deals damage to mobile units (damage_i)
+    and is within that structure's attackRange, the same structures GameState.get_attackers returns.
+    Ranges and damage are read from each unit, so upgrades from the config are included.
+
+    Attributes :
+        * game_state (:obj: GameState): The game state the threats are computed from
+        * grid (list): grid[player_index][x][y] is the damage per frame a mobile unit controlled by
+          player_index takes at [x, y]. 0 for you, 1 for your opponent.
+
+    """
+    def __init__(self, game_state):
+        """Computes the threat from every structure on the map
+
+        Args:
+            game_state: A GameState object
+
+        """
+        self.game_state = game_state
+        self.ARENA_SIZE = game_state.ARENA_SIZE
+        self.grid = [[[0.0] * self.ARENA_SIZE for _ in range(self.ARENA_SIZE)] for _ in range(2)]
+        self.__sources = {}
+
+        for location in game_state.game_map:
+            self.update_location(location)
+
+    def __apply(self, source, sign):
+        """Adds (sign 1) or removes (sign -1) the threat of a single structure
+        """
+        x, y, target_index, damage, attack_range = source
+        grid = self.grid[target_index]
+        in_bounds = self.game_state.game_map.in_arena_bounds
+        for dx, dy in range_offsets(attack_range):
+            if in_bounds([x + dx, y + dy]):
+                grid[x + dx][y + dy] += sign * damage
+
+    def fork(self, game_state):
+        """Copies this map for a fork of its game state, see GameState.fork
+
+        Args:
+            game_state: The forked GameState
+
+        Returns:
+            A new ThreatMap with the same values, updated from game_state from now on
+
+        """
+        child = copy.copy(self)
+        child.game_state = game_state
+        child.grid = [[column[:] for column in grid] for grid in self.grid]
+        child.__sources = dict(self.__sources)
+        return child
+
+    def update_location(self, location):
+        """Recomputes the threat of the structure at a location.
+        Call this after changing the game map directly (add_unit, remove_unit or upgrading a unit).
+
+        Args:
+            location: The location of the structure that was added, removed or upgraded
+
+        """
+        x, y = map(int, location)
+        old_source = self.__sources.pop((x, y), None)
+        if old_source is not None:
+            self.__apply(old_source, -1)
+
+        unit = self.game_state.contains_stationary_unit([x, y])
+        if unit and unit.damage_i > 0 and unit.attackRange > 0:
+            source = (x, y, 1 - unit.player_index, unit.damage_i, unit.attackRange)
+            self.__sources[(x, y)] = source
+            self.__apply(source, 1)
+
+    def damage_at(self, location, player_index=0):
+        """Gets the damage per frame a mobile unit would take at a location
+
+        Args:
+            location: The location of a hypothetical mobile unit
+            player_index: The player controlling the mobile unit, 0 for you 1 for the enemy
+
+        Returns:
+            The total damage per frame of every enemy structure in range of the location
+
+        """
+        x, y = location
+        return self.grid[player_index][x][y]
+
+    def path_damage(self, path, player_index=0):
+        """Sums the threat over every location of a path in one call
+
+        Args:
+            path: A list of locations, for example from GameState.find_path_to_edge
+            player_index: The player controlling the mobile units taking the path, 0 for you 1 for the enemy
+
+        Returns:
+            The sum of the damage per frame at every location of the path
+
+        """
+        grid = self.grid[player_index]
+        return sum(grid[x][y] for x, y in path)
+
+    def timeline_damage(self, timeline, player_index=0):
+        """Gets the damage a single mobile unit takes following a timeline, the damage per frame of every
+        location times the frames the unit is there
+
+        Args:
+            timeline: A list of (location, entry frame, exit frame), for example from GameState.find_path_timeline
+            player_index: The player controlling the mobile unit, 0 for you 1 for the enemy
+
+        Returns:
+            The total damage taken over the whole timeline
+
+        """
+        grid = self.grid[player_index]
+        return sum(grid[x][y] * (exit_frame - entry_frame) for (x, y), entry_frame, exit_frame in timeline)
+
+    def unit_path_damage(self, unit_type, path, player_index=0):
+        """Gets the damage a single mobile unit of a type takes along a path, using the unit's speed
+
+        Args:
+            unit_type: The type of the mobile unit
+            path: A list of locations, for example from GameState.find_path_to_edge
+            player_index: The player controlling the mobile unit, 0 for you 1 for the enemy
+
+        Returns:
+            The total damage taken over the path, see timeline_damage
+
+        """
+        speed = GameUnit(unit_type, self.game_state.config).speed
+        return self.timeline_damage(path_timeline(path, speed), player_index)
@@ -0,0 +1,104 @@
+from collections import OrderedDict
+
+
+MASK_64 = (1 << 64) - 1
+
+
+def zobrist_key(value):
+    """Gets a 64 bit key for an integer, the same in every game and process (splitmix64).
+    XORing the keys of the parts of a board gives its Zobrist hash.
+
+    Args:
+        value: A non negative integer, for example a packed (location, owner, unit type, upgraded)
+
+    Returns:
+        A 64 bit integer
+
+    """
+    value = (value + 0x9E3779B97F4A7C15) & MASK_64
+    value = ((value ^ (value >> 30)) * 0xBF58476D1CE4E5B9) & MASK_64
+    value = ((value ^ (value >> 27)) * 0x94D049BB133111EB) & MASK_64
+    return value ^ (value >> 31)
+
+
+class TranspositionTable:
+    """A dictionary with a maximum size that forgets the least recently used entries first.
+    Meant to be keyed by GameState.zobrist_hash() (or GameMap.zobrist_hash()), so path caches,
+    simulators and planners can remember results for board states they have already seen.
+
+    Attributes :
+        * max_size (int): The most entries kept
+        * hits (int): The number of lookups that found an entry
+        * misses (int): The number of lookups that did not
+
+    """
+    def __init__(self, max_size=100000):
+        """Creates an empty table
+
+        Args:
+            max_size: The most entries kept
+
+        """
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self.__entries = OrderedDict()
+
+    def __len__(self):
+        return len(self.__entries)
+
+    def __contains__(self, key):
+        return key in self.__entries
+
+    def get(self, key, default=None):
+        """Gets the value stored for a key, and marks it as recently used
+
+        Args:
+            key: The key, usually a Zobrist hash
+            default: Returned if the key is not in the table
+
+        Returns:
+            The value stored for the key, or default
+
+        """
+        if key in self.__entries:
+            self.hits += 1
+            self.__entries.move_to_end(key)
+            return self.__entries[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        """Stores a value for a key, forgetting the least recently used entry if the table is full
+
+        Args:
+            key: The key, usually a Zobrist hash
+            value: The value to store
+
+        """
+        self.__entries[key] = value
+        self.__entries.move_to_end(key)
+        if len(self.__entries) > self.max_size:
+            self.__entries.popitem(last=False)
+
+    def get_or_compute(self, key, compute):
+        """Gets the value stored for a key, or computes and stores it
+
+        Args:
+            key: The key, usually a Zobrist hash
+            compute: A function with no arguments that returns the value
+
+        Returns:
+            The value for the key
+
+        """
+        value = self.get(key, self)
+        if value is self:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        """Forgets every entry
+        """
+        self.__entries.clear()
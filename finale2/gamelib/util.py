@@ -1,7 +1,11 @@
+import os
 import sys
+import json
 
 
 BANNER_TEXT = "---------------- Starting Your Algo --------------------"
+PARAMS_ENV = "ALGO_PARAMS"
+PARAMS_FILE = "params.json"
 
 
 def get_command():
@@ -39,3 +43,64 @@ def debug_write(*msg):
     #Printing to STDERR is okay and printed out by the game but doesn't effect turns.
     sys.stderr.write(", ".join(map(str, msg)).strip() + "\n")
     sys.stderr.flush()
+
+def load_params(defaults):
+    """Gets the tunable parameters of an algo, so they can be changed without editing the strategy.
+    Should usually be called once in 'on_game_start'.
+
+    Parameters are read from the ALGO_PARAMS environment variable, either as a json object or
+    as the path to a json file. If it is not set, params.json next to algo_strategy.py is used if it exists.
+
+    Args:
+        defaults: A dict of parameter names to their default values
+
+    Returns:
+        A copy of defaults with the values that were given replaced. Given values are converted
+        to the type of the default, values that can't be converted exactly (like 2.5 for an int,
+        or anything but true, false, "true" and "false" for a bool) and unknown names are ignored
+        with a warning. If the json is not an object, all of the defaults are used.
+
+    """
+    params = dict(defaults)
+    source = os.environ.get(PARAMS_ENV, "")
+    if source == "":
+        source = os.path.join(os.path.dirname(os.path.abspath(sys.argv[0])), PARAMS_FILE)
+        if not os.path.isfile(source):
+            return params
+
+    try:
+        if source.strip().startswith("{"):
+            given = json.loads(source)
+        else:
+            with open(source) as f:
+                given = json.load(f)
+    except (OSError, ValueError) as e:
+        debug_write("Could not load params from {}, using defaults: {}".format(source, e))
+        return params
+    if not isinstance(given, dict):
+        debug_write("Params from {} are not a json object, using defaults".format(source))
+        return params
+
+    for name, value in given.items():
+        if name not in defaults:
+            debug_write("Unknown param {} ignored".format(name))
+            continue
+        if defaults[name] is None:
+            params[name] = value
+            continue
+        try:
+            if isinstance(defaults[name], bool):
+                # bool("false") is True, so only json booleans and their strings are accepted
+                if isinstance(value, str) and value.lower() in ["true", "false"]:
+                    value = value.lower() == "true"
+                elif not isinstance(value, bool):
+                    raise ValueError("not a boolean")
+            converted = type(defaults[name])(value)
+            if isinstance(converted, int) and not isinstance(converted, bool) and float(value) != converted:
+                raise ValueError("not a whole number")
+        except (TypeError, ValueError) as e:
+            debug_write("Param {} can't be {}, using the default {}: {}".format(name, value, defaults[name], e))
+            continue
+        params[name] = converted
+    debug_write("Loaded params: {}".format(params))
+    return params
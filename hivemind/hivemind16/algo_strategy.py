@@ -39,6 +39,7 @@ class AlgoStrategy(gamelib.AlgoCore):
         global WALL, SUPPORT, TURRET, SCOUT, DEMOLISHER, INTERCEPTOR, MP, SP
         global TURRET_COST, WALL_COST, WALL_UPGRADE_COST
         global SCOUT_HEALTH, TURRET_DAMAGE_NORMAL, TURRET_DAMAGE_UPGRADED, BASE_STRUCTURE_POINT_INCOME
+        global SPAWN_MP, EXTRA_MP_STEP, MAX_LEARNED_EXTRA_MP
         SCOUT_HEALTH= config["unitInformation"][3]["startHealth"]
         WALL = config["unitInformation"][0]["shorthand"]
         SUPPORT = config["unitInformation"][1]["shorthand"]
@@ -49,9 +50,20 @@ class AlgoStrategy(gamelib.AlgoCore):
         TURRET_COST=1
         WALL_COST=3
         WALL_UPGRADE_COST=3
-        TURRET_DAMAGE_NORMAL= 3
-        TURRET_DAMAGE_UPGRADED=20
         BASE_STRUCTURE_POINT_INCOME=5
+        # Tuning constants, can be overridden with an ALGO_PARAMS env var or params.json (see scripts/contributions/sweep.py)
+        params = gamelib.load_params({
+            "spawn_mp": 17,
+            "extra_mp_step": 3,
+            "max_learned_extra_mp": 6,
+            "turret_damage_normal": 3,
+            "turret_damage_upgraded": 20,
+        })
+        SPAWN_MP = params["spawn_mp"]
+        EXTRA_MP_STEP = params["extra_mp_step"]
+        MAX_LEARNED_EXTRA_MP = params["max_learned_extra_mp"]
+        TURRET_DAMAGE_NORMAL = params["turret_damage_normal"]
+        TURRET_DAMAGE_UPGRADED = params["turret_damage_upgraded"]
         dont_spawn=False
         oldSpawn=False
         old_enemy_health=30
@@ -61,6 +73,9 @@ class AlgoStrategy(gamelib.AlgoCore):
         SP = 0
         # This is a good place to do initial setup
         self.scored_on_locations = []
+        self.knowledge = gamelib.KnowledgeStore()
+        self.signature = None
+        self.learned_extra_mp = 0
 
     def on_turn(self, turn_state):
         """
@@ -74,6 +89,13 @@ class AlgoStrategy(gamelib.AlgoCore):
         gamelib.debug_write('Performing turn {} of your custom algo strategy'.format(game_state.turn_number))
         game_state.suppress_warnings(True)  #Comment or remove this line to enable warnings.
 
+        if game_state.turn_number == 1:
+            # the opponent's opening is on the board, start from the extra MP we needed against it before
+            global extra_mp
+            self.signature = gamelib.opening_signature(game_state)
+            self.learned_extra_mp = min(self.knowledge.get(self.signature).get("extra_mp", 0), MAX_LEARNED_EXTRA_MP)
+            extra_mp += self.learned_extra_mp
+
         self.starter_strategy(game_state)
 
         game_state.submit_turn()
@@ -97,10 +119,10 @@ class AlgoStrategy(gamelib.AlgoCore):
         global old_spawn
         global old_enemy_health
         global extra_mp
-        if game_state.get_resource(MP)<17+extra_mp:
+        if game_state.get_resource(MP)<SPAWN_MP+extra_mp:
             if dont_spawn:
                 if game_state.enemy_health== old_enemy_health:
-                    extra_mp+=3
+                    extra_mp+=EXTRA_MP_STEP
                 else:
                     old_enemy_health=game_state.enemy_health
             old_spawn=dont_spawn
@@ -119,13 +141,13 @@ class AlgoStrategy(gamelib.AlgoCore):
             ]
             best_location,left,leastDamage,blocked = self.least_damage_spawn_location(game_state, scout_spawn_location_options)
 
-            if game_state.project_future_MP(1,0)>=17+extra_mp and not dont_spawn:
+            if game_state.project_future_MP(1,0)>=SPAWN_MP+extra_mp and not dont_spawn:
                 dont_spawn=[best_location[0],13]
                 game_state.attempt_remove(dont_spawn)
                 go=True
             if blocked:
                 leastDamage*=2
-            if game_state.get_resource(MP)>=17+extra_mp: #blocked:
+            if game_state.get_resource(MP)>=SPAWN_MP+extra_mp: #blocked:
                 if dont_spawn[0] in [1,26]:
                     if dont_spawn[0]>13:
                         game_state.attempt_spawn(SCOUT, [17,3],5)
@@ -313,6 +335,13 @@ class AlgoStrategy(gamelib.AlgoCore):
         return filtered
 
 
+    def on_game_end(self, end_state):
+        if self.signature is not None:
+            # halve what was learned before and add what this game added, so repeat games can't grow it without limit
+            learned = self.learned_extra_mp / 2 + extra_mp - self.learned_extra_mp
+            self.knowledge.put(self.signature, {"extra_mp": min(learned, MAX_LEARNED_EXTRA_MP)})
+        self.knowledge.close()
+
     def on_action_frame(self, turn_string):
         """
         This is the action frame of the game. This function could be called 
@@ -16,14 +16,19 @@ Investigating it is useful for advanced players interested in getting data from
 The Navigation class in navigation.py contains functions related to path-finding, which are used by GameState in pathing related functions. 
 Investigating it is useful for advanced player who want to optimize the slow default pathing algorithm we provide. \n 
 
-util.py contains a small handful of functions that help with communication, including the debug-printing function, debug_write().
+The KnowledgeStore class in knowledge.py remembers what the algo learned about an opponent between games, keyed by
+opening_signature(), the structures the opponent opened with. \n
+
+util.py contains a small handful of functions that help with communication, including the debug-printing function, debug_write(), 
+and load_params() for reading tunable parameters.
 """
 
 from .algocore import AlgoCore
-from .util import debug_write
+from .util import debug_write, load_params
 from .game_state import GameState
 from .unit import GameUnit
 from .game_map import GameMap
+from .knowledge import KnowledgeStore, opening_signature
 
-__all__ = ["algocore", "game_state", "game_map", "navigation", "unit", "util"]
+__all__ = ["algocore", "game_state", "game_map", "knowledge", "navigation", "unit", "util"]
  
\ No newline at end of file
@@ -43,6 +43,13 @@ class AlgoCore(object):
         """
         pass
 
+    def on_game_end(self, end_state):
+        """
+        This function is called once with the end game message, before the algo stops.
+        It is a good place to save what was learned during the game, see KnowledgeStore.
+        """
+        pass
+
 
     def start(self):
         """ 
@@ -82,6 +89,7 @@ class AlgoCore(object):
                     This is the end game message. This means the game is over so break and finish the program.
                     """
                     debug_write("Got end state, game over. Stopping algo.")
+                    self.on_game_end(game_state_string)
                     break
                 else:
                     """
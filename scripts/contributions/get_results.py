@@ -117,6 +117,16 @@ would show 2 graphs. The first would show health and the second would plot bits
 
 (I recommend just trying a bunch of combinations with ':' to get familiar with this).
 
+----------------------------------------------------------------------------------------
+-nc, -p: Caching and parsing in parallel
+
+The stats of every replay that has been read are saved in replays/results_cache.json (with the
+time the replay was last modified), so running this again only has to read replays that are new
+or have changed. New replays are read on a separate process per cpu. You can choose the number
+of processes with -p, or read everything again and ignore the cache with -nc:
+>py scripts/contributions/get_results.py -a -p 4
+>py scripts/contributions/get_results.py -a -nc
+
 ----------------------------------------------------------------------------------------
 
 All of the commands above can be combined in any order. For example, if I wanted to run the
@@ -175,6 +185,8 @@ try:
 	import glob
 	import math
 	import argparse
+	import multiprocessing as mp
+	import replay_io
 except ImportError as e:
 	sys.stderr.write("WARNING: Module not found, full error:\n\n")
 	sys.stderr.write(e)
@@ -231,6 +243,15 @@ def parse_args():
 		nargs="*",
 		default=[],
 		help="specify what data you would like to be graphed - you must have matplotlib installed\n\nValid Options For Single Game:\n\t- health\n\t- bits\n\t- cores\n\t- cores_spent\n\t- bits_spent\n\t- cores_on_board\n\nValid Options For Multiple Games:\n\t- wins\n\n")
+	ap.add_argument(
+		"-nc", "--no_cache",
+		action='store_true',
+		help="if added will parse every replay again instead of using replays/results_cache.json\n\n")
+	ap.add_argument(
+		"-p", "--processes",
+		type=int,
+		default=None,
+		help="number of processes used to parse new replays (default is one per cpu)\n\n")
 	return vars(ap.parse_args())
 
 
@@ -440,16 +461,140 @@ class Algo:
 		return disp
 
 
+# the per turn stats stored for every algo (in this order)
+SERIES = ['health', 'cores', 'bits', 'cores_on_board', 'cores_spent', 'bits_spent']
+
+# returns the path to the folder that contains algos, replays and scripts
+def get_root_dir():
+	return os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..'))
+
+# generator that yields every frame of a replay in order (normal or compact format), skipping the config line
+def iter_frames(f_name):
+	for data in replay_io.iter_frames(f_name):
+		if 'debug' not in data:
+			yield data
+
+def get_cores_on_board(filters, encryptors, destructors):
+	return len(filters) + len(encryptors) * 4 + len(destructors) * 3
+
+def get_bits_spent(p_index, spawn):
+	pings = [x for x in spawn if x[3] == p_index and x[1] == 3]
+	emps = [x for x in spawn if x[3] == p_index and x[1] == 4]
+	scramblers = [x for x in spawn if x[3] == p_index and x[1] == 5]
+	return len(pings) + len(emps) * 3 + len(scramblers)
+
+def get_cores_spent(p_index, spawn):
+	filters = [x for x in spawn if x[3] == p_index and x[1] == 0]
+	encryptors = [x for x in spawn if x[3] == p_index and x[1] == 1]
+	destructors = [x for x in spawn if x[3] == p_index and x[1] == 2]
+	return len(filters) + len(encryptors) * 4 + len(destructors) * 3
+
+def add_data_to_algo(f_name, algo, p_index, t, f, stats, units, spawn):
+	algo.add_data(f_name, t, 'health', stats[0])
+	algo.add_data(f_name, t, 'cores', stats[1])
+	algo.add_data(f_name, t, 'bits', stats[2])
+
+	filters, encryptors, destructors, pings, emps, scramblers, removes = units[:7]
+
+	algo.add_data(f_name, t, 'cores_on_board', get_cores_on_board(filters, encryptors, destructors))
+
+	if f == 0:
+		algo.add_data(f_name, t, 'cores_spent', get_cores_spent(p_index, spawn), True)
+		algo.add_data(f_name, t, 'bits_spent', get_bits_spent(p_index, spawn), True)
+
+# reads a replay and returns the stats of both players as columns (one list per stat, lined up with 'turns')
+# this is a module level function so it can be run in a process pool, and the result is what gets cached
+def parse_replay(f_name):
+	try:
+		# the names of the algos are only in the last frame, so the stats are collected in placeholder algos
+		p1, p2 = Algo(None), Algo(None)
+		end_stats = None
+
+		for turn in iter_frames(f_name):
+			if 'endStats' in turn:
+				end_stats = turn['endStats']
+
+			t = turn['turnInfo'][1]
+			f = turn['turnInfo'][2]
+			spawn = turn['events']['spawn']
+
+			add_data_to_algo(f_name, p1, 1, t, f, turn['p1Stats'], turn['p1Units'], spawn)
+			add_data_to_algo(f_name, p2, 2, t, f, turn['p2Stats'], turn['p2Units'], spawn)
+
+		if end_stats is None:
+			raise ValueError('{} has no endStats (the game did not finish)\n'.format(f_name))
+
+		rows1 = p1.replays.get(f_name, {})
+		rows2 = p2.replays.get(f_name, {})
+		turns = sorted(rows1)
+		return {
+			'names':	[end_stats['player1']['name'], end_stats['player2']['name']],
+			'endStats':	[end_stats['player1'], end_stats['player2']],
+			'turns':	turns,
+			'p1':		{arg: [rows1[t].get(arg) for t in turns] for arg in SERIES},
+			'p2':		{arg: [rows2[t].get(arg) for t in turns] for arg in SERIES}
+		}
+	except Exception as e:
+		sys.stderr.write(str(e))
+		return None
+
+# turns the columns of one player back into the {turn: {stat: value}} form the Algo class uses
+def columns_to_rows(turns, columns):
+	rows = {}
+	for i, t in enumerate(turns):
+		rows[t] = {arg: columns[arg][i] for arg in SERIES if columns[arg][i] is not None}
+	return rows
+
+# stores the parsed stats of every replay on disk, keyed by the replay path and its modified time
+# so only new (or changed) replays need to be read again
+class StatsCache:
+	def __init__(self, path):
+		self.path = path
+		self.entries = {}
+		self.changed = False
+
+		try:
+			with open(self.path, 'r') as f:
+				self.entries = json.load(f)
+		except (FileNotFoundError, ValueError):
+			pass
+
+	def get(self, f_name):
+		entry = self.entries.get(os.path.abspath(f_name))
+		if entry is not None and entry['mtime'] == os.path.getmtime(f_name):
+			return entry['record']
+		return None
+
+	def put(self, f_name, record):
+		self.entries[os.path.abspath(f_name)] = {'mtime': os.path.getmtime(f_name), 'record': record}
+		self.changed = True
+
+	# writes the cache, dropping the replays that have been deleted
+	def save(self):
+		for f_name in [f_name for f_name in self.entries if not os.path.exists(f_name)]:
+			del self.entries[f_name]
+			self.changed = True
+		if not self.changed:
+			return
+
+		cache_dir = os.path.dirname(os.path.abspath(self.path))
+		if not os.path.isdir(cache_dir):
+			os.makedirs(cache_dir)
+		with open(self.path, 'w') as f:
+			json.dump(self.entries, f, separators=(',', ':'))
+		self.changed = False
+
 # Stores data from a single replay and creates the Algo classes
+# The stats come from parse_replay (or the cache), which reads the file one frame at a time
+# so even very large replays are summarized without holding every frame in memory.
 class Replay:
-	def __init__(self, f_name, algos):
+	def __init__(self, f_name, algos, record=None):
 		self.fname = f_name;
-		self.ref = None
-		self.turns = {}
-		self.valid_turns = []
+		self.end_stats = None
 
-		self.load_data()				# handles loading all the data from file into python variables
-		self.unpack_data(algos)		# stores relevant data after it has been loaded
+		if record is None:
+			record = parse_replay(f_name)
+		self.unpack_data(algos, record)		# stores the parsed stats in the algos
 
 	def __eq__(self, other):
 		return self.fname == other.fname
@@ -460,87 +605,27 @@ class Replay:
 	def __repr__(self):
 		return self.__string()
 
-	def load_data(self):
-		with open(self.fname) as f:
-			for line in f:
-				line = line.replace("\n", "")
-				line = line.replace("\t", "")
-
-				if (line != ''):
-					data = json.loads(line)
-
-					try:
-						data['debug']
-						self.ref = data
-					except:
-						turn_num = data['turnInfo'][1]
-						frame_num = data['turnInfo'][2]
-						self.turns[(turn_num, frame_num)] = data
-						if (turn_num, frame_num) not in self.valid_turns:
-							self.valid_turns.append((turn_num, frame_num))
-
-	def get_cores_on_board(self, filters, encryptors, destructors):
-		return len(filters) + len(encryptors) * 4 + len(destructors) * 3
-
-	def get_bits_spent(self, algo, spawn):
-		p_index = 1 if algo == self.algo1 else 2
-		pings = [x for x in spawn if x[3] == p_index and x[1] == 3]
-		emps = [x for x in spawn if x[3] == p_index and x[1] == 4]
-		scramblers = [x for x in spawn if x[3] == p_index and x[1] == 5]
-		return len(pings) + len(emps) * 3 + len(scramblers)
-
-	def get_cores_spent(self, algo, spawn):
-		p_index = 1 if algo == self.algo1 else 2
-		filters = [x for x in spawn if x[3] == p_index and x[1] == 0]
-		encryptors = [x for x in spawn if x[3] == p_index and x[1] == 1]
-		destructors = [x for x in spawn if x[3] == p_index and x[1] == 2]
-		return len(filters) + len(encryptors) * 4 + len(destructors) * 3
-
-	def add_data_to_algo(self, algo, t, f, stats, units, spawn):
-		algo.add_data(self.fname, t, 'health', stats[0])
-		algo.add_data(self.fname, t, 'cores', stats[1])
-		algo.add_data(self.fname, t, 'bits', stats[2])
-
-		filters, encryptors, destructors, pings, emps, scramblers, removes = units
-
-		algo.add_data(self.fname, t, 'cores_on_board', self.get_cores_on_board(filters, encryptors, destructors))
-
-		if f == 0:
-			algo.add_data(self.fname, t, 'cores_spent', self.get_cores_spent(algo, spawn), True)
-			algo.add_data(self.fname, t, 'bits_spent', self.get_bits_spent(algo, spawn), True)
-
-	def unpack_data(self, algos):
-		try:
-			self.algo1, self.algo2 = self.create_algos(algos)
-
-			for t, f in self.get_valid_turns():
-				turn = self.get_turn(t, f)
+	def frames(self):
+		return iter_frames(self.fname)
 
-				turn_info = turn['turnInfo']
-				events = turn['events']
-				spawn = events['spawn']
+	def unpack_data(self, algos, record):
+		if record is None:
+			return
 
-				p1_stats = turn['p1Stats']
-				p1_units = turn['p1Units']
+		self.end_stats = {'player1': record['endStats'][0], 'player2': record['endStats'][1]}
+		self.algo1, self.algo2 = self.create_algos(algos)
+		self.algo1.replays[self.fname] = columns_to_rows(record['turns'], record['p1'])
+		self.algo2.replays[self.fname] = columns_to_rows(record['turns'], record['p2'])
 
-				p2_stats = turn['p2Stats']
-				p2_units = turn['p2Units']
-
-				self.add_data_to_algo(self.algo1, t, f, p1_stats, p1_units, spawn)
-				self.add_data_to_algo(self.algo2, t, f, p2_stats, p2_units, spawn)
-
-			self.algo1.recored_final_data(self.fname, self.algo2)
-			self.algo2.recored_final_data(self.fname, self.algo1)
-			self.algo1.add_end_stats(self.fname, self.turns[self.valid_turns[-1]]['endStats']['player1'])
-			self.algo2.add_end_stats(self.fname, self.turns[self.valid_turns[-1]]['endStats']['player2'])
-		except Exception as e:
-			sys.stderr.write(str(e))
+		self.algo1.recored_final_data(self.fname, self.algo2)
+		self.algo2.recored_final_data(self.fname, self.algo1)
+		self.algo1.add_end_stats(self.fname, dict(self.end_stats['player1']))
+		self.algo2.add_end_stats(self.fname, dict(self.end_stats['player2']))
 
 	# only creates a new algo class if that algo does not already exist. Otherwise data is added to the existing one
 	def create_algos(self, algos):
-		end_stats = self.turns[self.valid_turns[-1]]['endStats']
-		p1_algo = end_stats['player1']['name']
-		p2_algo = end_stats['player2']['name']
+		p1_algo = self.end_stats['player1']['name']
+		p2_algo = self.end_stats['player2']['name']
 
 		if p1_algo not in algos:
 			algo1 = Algo(p1_algo)
@@ -559,12 +644,8 @@ class Replay:
 	def get_algos(self):
 		return [self.algo1, self.algo2]
 
-	def get_valid_turns(self):
-		return self.valid_turns
-	def get_turns(self):
-		return self.turns
-	def get_turn(self, turn, frame=-1):
-		return self.turns[(turn, frame)]
+	def get_end_stats(self):
+		return self.end_stats
 
 # handles opening multiple games (replays)
 class FileHandler:
@@ -593,23 +674,47 @@ class FileHandler:
 		return self.replays[i]
 
 	def __latest_replays(self, num=1, a=False):
-		replay_dir = os.path.dirname(os.path.realpath(__file__)).replace('scripts\\contributions', '')+'replays\\'
-		files = glob.glob('{}*.replay'.format(replay_dir))
+		files = glob.glob(os.path.join(get_root_dir(), 'replays', '*.replay'))
+		# compact replays (see replay_io.py) are only used when the original is gone, so no game is counted twice
+		compact = glob.glob(os.path.join(get_root_dir(), 'replays', '*' + replay_io.EXTENSION))
+		files += [f for f in compact if os.path.splitext(f)[0] + '.replay' not in files]
 		files = sorted(files, key=os.path.getctime, reverse=True)
 		if a:
 			return files
 		return files[:num]
 
-	def load_files(self, num=1, a=False, f_names=[]):
+	# parses the replays, using the cache for the ones already seen and a process pool for the rest
+	def load_files(self, num=1, a=False, f_names=[], use_cache=True, processes=None):
 		if len(f_names) > 0:
+			f_names = [f_name if f_name.find('replays') != -1 else os.path.join('replays', f_name) for f_name in f_names]
+		else:
+			f_names = self.__latest_replays(num, a)
+
+		cache = StatsCache(os.path.join(get_root_dir(), 'replays', 'results_cache.json')) if use_cache else None
+		records = {}
+		if cache is not None:
 			for f_name in f_names:
-				if f_name.find('replays') == -1:
-					self.replays.append(Replay('replays/'+f_name, self.algos))
-				else:
-					self.replays.append(Replay(f_name, self.algos))
+				records[f_name] = cache.get(f_name)
+		new_files = [f_name for f_name in f_names if records.get(f_name) is None]
+
+		if len(new_files) > 1 and processes != 1:
+			with mp.Pool(processes) as pool:
+				for f_name, record in zip(new_files, pool.map(parse_replay, new_files)):
+					records[f_name] = record
 		else:
-			for f_name in self.__latest_replays(num, a):
-				self.replays.append(Replay(f_name, self.algos))
+			for f_name in new_files:
+				records[f_name] = parse_replay(f_name)
+
+		if cache is not None:
+			for f_name in new_files:
+				if records[f_name] is not None:
+					cache.put(f_name, records[f_name])
+			cache.save()
+
+		# replays that could not be parsed (the error has already been written) are skipped
+		for f_name in f_names:
+			if records[f_name] is not None:
+				self.replays.append(Replay(f_name, self.algos, records[f_name]))
 
 	def add_plot(self, lbl):
 		if lbl == 'wins':
@@ -711,7 +816,7 @@ def main(args):
 	verbose_options, summary_options = get_graph_options(args['graph'])
 
 	fh = FileHandler()
-	fh.load_files(int(args['num']), args['all'], args['file']) #loads the files - all JSON reading is here
+	fh.load_files(int(args['num']), args['all'], args['file'], not args.get('no_cache', False), args.get('processes', None)) #loads the files - all JSON reading is here
 
 	# check to see if matplotlib is installed
 	graphing_enabled = True if len(verbose_options) > 0 or len(summary_options) > 0 else False
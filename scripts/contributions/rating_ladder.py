@@ -0,0 +1,230 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+This is a python script to keep a rating ladder of all your algos without playing every combination.
+It keeps a Glicko rating (an Elo rating with an uncertainty) for every algo and only plays the
+matches that tell it the most about the ladder.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the contributions/scripts directory, next to run_arena.py
+
+With a lot of algos a full arena (run_arena.py) is a lot of games, and every new algo adds a game
+against every other one. Instead, this script stores a rating and a rating deviation (how unsure the
+rating is) for every algo in replays/ratings.json. Each round it picks the pairings with the most
+uncertain algos and the closest ratings (the games whose result is hardest to guess), plays them and
+updates the ratings. A new algo starts out very uncertain, so it gets placed against algos around its
+rating like a binary search, which takes far fewer games than playing all of them.
+
+You choose the algos the same way as run_arena.py:
+>py scripts/contributions/rating_ladder.py -a
+>py scripts/contributions/rating_ladder.py -s algo1 algo2 algo3 algo4 [...]
+>py scripts/contributions/rating_ladder.py -f algos.txt
+
+-n is the most games to play (default 20) and -b how many run at once (default 5):
+>py scripts/contributions/rating_ladder.py -a -n 40 -b 6
+
+It stops early once every algo's rating deviation is below -rd (default 75).
+
+If an algo changes (its files hash differently), its rating is kept as a starting point but its
+deviation is reset so it gets placed again.
+
+To just print the ladder without playing anything:
+>py scripts/contributions/rating_ladder.py -a -n 0
+'''
+
+import sys
+try:
+	import os
+	import math
+	import json
+	import argparse
+	from run_arena import get_root_dir, hash_algo, run_all, run_from_file, run_matches, collect_results, get_replay_files
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+
+INITIAL_RATING = 1500.
+INITIAL_RD = 350.
+MIN_RD = 30.
+Q = math.log(10) / 400
+
+
+# handles all the arguments
+def parse_args():
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument(
+		"-a", "--all",
+		action='store_true',
+		help="if added will rate every algo in the directory\n\n")
+	ap.add_argument(
+		"-s", "--specific",
+		nargs='*',
+		default=[],
+		help="will rate the algos added\n\n")
+	ap.add_argument(
+		"-f", "--file",
+		default='',
+		help="will rate the algos in a specified file\n\n")
+	ap.add_argument(
+		"-n", "--num",
+		type=int,
+		default=20,
+		help="most games to play (default 20)\n\n")
+	ap.add_argument(
+		"-b", "--batch",
+		type=int,
+		default=5,
+		help="number of games to run at a single time (on seperate threads)\n\n")
+	ap.add_argument(
+		"-rd", "--rating_deviation",
+		type=float,
+		default=75.,
+		help="stop once every algo's rating deviation is below this (default 75)\n\n")
+	ap.add_argument(
+		"-r", "--ratings",
+		default=os.path.join(get_root_dir(), 'replays', 'ratings.json'),
+		help="file the ratings are stored in\n\n")
+	return vars(ap.parse_args())
+
+
+# stores the rating of every algo and updates them after each game (Glicko-1)
+class Ladder:
+	def __init__(self, path):
+		self.path = path
+		self.algos = {}		# algo name -> {'hash', 'rating', 'rd', 'games'}
+
+		try:
+			with open(self.path, 'r') as f:
+				self.algos = json.load(f)['algos']
+		except (FileNotFoundError, ValueError, KeyError):
+			pass
+
+	def save(self):
+		ratings_dir = os.path.dirname(os.path.abspath(self.path))
+		if not os.path.isdir(ratings_dir):
+			os.makedirs(ratings_dir)
+		with open(self.path, 'w') as f:
+			json.dump({'algos': self.algos}, f, indent=1)
+
+	# adds an algo to the ladder, or resets the deviation of one whose files changed
+	def add(self, name, algo_hash):
+		if name not in self.algos:
+			self.algos[name] = {'hash': algo_hash, 'rating': INITIAL_RATING, 'rd': INITIAL_RD, 'games': 0}
+		elif self.algos[name]['hash'] != algo_hash:
+			self.algos[name]['hash'] = algo_hash
+			self.algos[name]['rd'] = INITIAL_RD
+
+	# reduces the impact of a result against an opponent whose rating is uncertain
+	def g(self, rd):
+		return 1 / math.sqrt(1 + 3 * Q**2 * rd**2 / math.pi**2)
+
+	# the expected score of algo1 against algo2
+	def expected(self, algo1, algo2, rd=None):
+		a, b = self.algos[algo1], self.algos[algo2]
+		rd = b['rd'] if rd is None else rd
+		return 1 / (1 + 10 ** (-self.g(rd) * (a['rating'] - b['rating']) / 400))
+
+	# how much we expect to learn from a game between two algos:
+	# high when the algos are uncertain and their ratings are close (the result is hard to guess)
+	def information(self, algo1, algo2):
+		a, b = self.algos[algo1], self.algos[algo2]
+		combined_rd = math.sqrt(a['rd']**2 + b['rd']**2)
+		e = self.expected(algo1, algo2, combined_rd)
+		return (a['rd']**2 + b['rd']**2) * self.g(combined_rd)**2 * e * (1 - e)
+
+	# updates both ratings with the result of a game, score is 1 if algo1 won, 0 if it lost and .5 for a tie
+	def update(self, algo1, algo2, score):
+		new = {}
+		for name, other, s in [(algo1, algo2, score), (algo2, algo1, 1 - score)]:
+			a, b = self.algos[name], self.algos[other]
+			g = self.g(b['rd'])
+			e = self.expected(name, other)
+			d2 = 1 / (Q**2 * g**2 * e * (1 - e))
+			denominator = 1 / a['rd']**2 + 1 / d2
+			new[name] = (a['rating'] + Q / denominator * g * (s - e), max(MIN_RD, math.sqrt(1 / denominator)))
+
+		for name, (rating, rd) in new.items():
+			self.algos[name]['rating'] = rating
+			self.algos[name]['rd'] = rd
+			self.algos[name]['games'] += 1
+
+	# picks up to num pairings for the next round, most informative first, with every algo in at most one game
+	def next_matches(self, algos, num):
+		pairings = [(a, b) for i, a in enumerate(algos) for b in algos[i+1:]]
+		pairings = sorted(pairings, key=lambda p: -1 * self.information(p[0], p[1]))
+
+		matches = []
+		busy = set()
+		for algo1, algo2 in pairings:
+			if len(matches) >= num:
+				break
+			if algo1 in busy or algo2 in busy:
+				continue
+			busy.add(algo1)
+			busy.add(algo2)
+			# alternate which algo is player 1 so neither side is favoured
+			matches.append((algo1, algo2) if (self.algos[algo1]['games'] + self.algos[algo2]['games']) % 2 == 0 else (algo2, algo1))
+		return matches
+
+	def print_ladder(self, algos):
+		fill_len = max([len(algo) for algo in algos]) + 9
+		print ('Rating ladder (rating +- 2 deviations):\n|')
+		for algo in sorted(algos, key=lambda e: -1 * self.algos[e]['rating']):
+			a = self.algos[algo]
+			print ('|{: >{fill}} : {: >6.0f} +- {: <4.0f} ({} games)'.format(algo, a['rating'], 2 * a['rd'], a['games'], fill=fill_len))
+		print ()
+
+
+def main(args):
+	if args['all']:
+		algos = sorted(set(a for m in run_all() for a in m))
+	elif len(args['specific']) > 0:
+		algos = list(args['specific'])
+	elif args['file'] != '':
+		algos = sorted(set(a for m in run_from_file(args['file']) for a in m))
+	else:
+		print ('No arguments - no action taken')
+		sys.exit()
+
+	if len(algos) < 2:
+		print ('Need at least 2 algos for a ladder')
+		sys.exit()
+
+	ladder = Ladder(args['ratings'])
+	for algo in algos:
+		ladder.add(algo, hash_algo(algo))
+
+	played = 0
+	while played < args['num']:
+		if max([ladder.algos[algo]['rd'] for algo in algos]) < args['rating_deviation']:
+			print ('Every rating is certain enough - stopping')
+			break
+
+		matches = ladder.next_matches(algos, min(args['batch'], args['num'] - played))
+		old_replays = set(get_replay_files())
+		run_matches(matches, args['batch'])
+
+		results = collect_results(matches, old_replays)
+		if len(results) == 0:
+			print ('No games finished this round - stopping')
+			break
+
+		for match, end_stats, f_name in results:
+			ladder.update(match[0], match[1], {1:1., 2:0.}.get(end_stats['winner'], .5))
+		played += len(results)
+		ladder.save()
+
+	ladder.save()
+	ladder.print_ladder(algos)
+
+
+if __name__ == '__main__':
+	args = parse_args() # get command line arguments
+	main(args)
@@ -0,0 +1,305 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+This is a python script to shrink replay files into a compact format, and the reader the other
+scripts use to open both the normal and the compact format.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the contributions/scripts directory
+
+A normal replay stores every unit on the board for every frame, so a replay is mostly the same
+units repeated over and over. The compact format (.creplay) stores each turn as a single
+compressed block: the first frame of the turn in full (a keyframe), then only the units that were
+added, removed or changed for every frame after it. Unit positions are packed into a single integer.
+
+To convert replays (the .creplay is written next to the .replay):
+>py scripts/contributions/replay_io.py -f [REPLAY_FILE].replay [REPLAY_FILE].replay
+
+or every replay in the replays folder:
+>py scripts/contributions/replay_io.py -a
+
+You can check that the compact file gives back exactly the same frames as the original with -v
+(verify), and remove the originals once they are verified with -rm (which always verifies):
+>py scripts/contributions/replay_io.py -a -rm
+
+To turn a compact replay back into a normal one (for the online viewer or other tools):
+>py scripts/contributions/replay_io.py -x [REPLAY_FILE].creplay
+
+get_results.py and watch_replay.py open .creplay files just like .replay files. From your own
+scripts use iter_frames, it yields every line of either format as a dict:
+
+	import replay_io
+	for frame in replay_io.iter_frames('replays/my.creplay'):
+		...
+
+File layout: the line MAGIC, then blocks of a 4 byte (big endian) length followed by that many
+bytes of zlib compressed json. The first block is the config line, every other block is one turn.
+'''
+
+import sys
+try:
+	import os
+	import glob
+	import json
+	import zlib
+	import struct
+	import argparse
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+
+MAGIC = b'CREPLAY1\n'
+EXTENSION = '.creplay'
+UNITS = ['p1Units', 'p2Units']
+
+
+# handles all the arguments
+def parse_args():
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument(
+		"-f", "--file",
+		nargs='*',
+		default=[],
+		help="replay files to convert to the compact format\n\n")
+	ap.add_argument(
+		"-a", "--all",
+		action='store_true',
+		help="if added will convert every replay in the replays folder\n\n")
+	ap.add_argument(
+		"-v", "--verify",
+		action='store_true',
+		help="if added will check every converted file gives back the same frames as the original\n\n")
+	ap.add_argument(
+		"-rm", "--remove",
+		action='store_true',
+		help="if added will verify every converted file and delete the originals that pass\n\n")
+	ap.add_argument(
+		"-x", "--expand",
+		nargs='*',
+		default=[],
+		help="compact replay files to turn back into normal replays\n\n")
+	return vars(ap.parse_args())
+
+# returns whether a file is in the compact format
+def is_compact(f_name):
+	with open(f_name, 'rb') as f:
+		return f.read(len(MAGIC)) == MAGIC
+
+# a unit's x and y are packed into a single integer
+def pack_loc(x, y):
+	return x * 32 + y
+
+def unpack_loc(loc):
+	return loc // 32, loc % 32
+
+def pack_units(units):
+	return [[pack_loc(u[0], u[1])] + u[2:] for u in units]
+
+def unpack_units(units):
+	return [list(unpack_loc(u[0])) + u[1:] for u in units]
+
+# applies the changes to a single list of units (for one unit type), see diff_units
+def apply_diff(prev, diff):
+	if 'f' in diff:
+		return unpack_units(diff['f'])
+
+	removed = set(diff.get('r', []))
+	changed = {c[0]: c[1:] for c in diff.get('c', [])}
+	units = []
+	for u in prev:
+		if u[3] in removed:
+			continue
+		if u[3] in changed:
+			loc, hp = changed[u[3]]
+			u = list(unpack_loc(loc)) + [hp, u[3]]
+		units.append(u)
+	return units + unpack_units(diff.get('a', []))
+
+# returns the changes from one list of units to the next as removed ids, changed [id, loc, hp] and added units
+# if the units can't be rebuilt that way (the order changed or ids repeat) the whole list is stored instead
+def diff_units(prev, cur):
+	prev_by_id = {u[3]: u for u in prev}
+	cur_ids = set(u[3] for u in cur)
+	diff = {}
+	removed = [u[3] for u in prev if u[3] not in cur_ids]
+	changed = [[u[3], pack_loc(u[0], u[1]), u[2]] for u in cur if u[3] in prev_by_id and u != prev_by_id[u[3]]]
+	added = pack_units([u for u in cur if u[3] not in prev_by_id])
+	if len(removed) > 0: diff['r'] = removed
+	if len(changed) > 0: diff['c'] = changed
+	if len(added) > 0: diff['a'] = added
+
+	if len(prev_by_id) != len(prev) or apply_diff(prev, diff) != cur:
+		return {'f': pack_units(cur)}
+	return diff
+
+# the first frame of a turn, stored in full
+def encode_keyframe(frame):
+	frame = dict(frame)
+	for key in UNITS:
+		frame[key] = [pack_units(units) for units in frame[key]]
+	return frame
+
+def decode_keyframe(frame):
+	for key in UNITS:
+		frame[key] = [unpack_units(units) for units in frame[key]]
+	return frame
+
+# every other frame only stores the unit lists that changed, by index of the unit type
+def encode_delta(prev, frame):
+	delta = {key: value for key, value in frame.items() if key not in UNITS}
+	delta['_keys'] = list(frame.keys())		# keeps the key order of the original frame
+	for key in UNITS:
+		delta[key] = {}
+		for i, (p, c) in enumerate(zip(prev[key], frame[key])):
+			if p != c:
+				delta[key][str(i)] = diff_units(p, c)
+		if len(prev[key]) != len(frame[key]):
+			delta[key] = {str(i): {'f': pack_units(units)} for i, units in enumerate(frame[key])}
+			delta[key]['n'] = len(frame[key])
+	return delta
+
+def decode_delta(prev, delta):
+	frame = {}
+	for key in delta.pop('_keys'):
+		if key not in UNITS:
+			frame[key] = delta[key]
+			continue
+		changes = delta[key]
+		units = [list(u) for u in prev[key][:changes.get('n', len(prev[key]))]]
+		units += [[] for i in range(changes.get('n', 0) - len(units))]
+		for i, diff in changes.items():
+			if i != 'n':
+				units[int(i)] = apply_diff(prev[key][int(i)] if int(i) < len(prev[key]) else [], diff)
+		frame[key] = units
+	return frame
+
+def write_block(f, data):
+	block = zlib.compress(json.dumps(data, separators=(',', ':')).encode(), 9)
+	f.write(struct.pack('>I', len(block)))
+	f.write(block)
+
+# yields (offset, length, data) for every block of a compact file, starting at the byte offset start
+# offset and length can be passed to read_block later to read that block again
+def iter_blocks(f_name, start=0):
+	with open(f_name, 'rb') as f:
+		offset = max(start, len(MAGIC))
+		f.seek(offset)
+		while True:
+			header = f.read(4)
+			if len(header) < 4:
+				break
+			length = struct.unpack('>I', header)[0]
+			block = f.read(length)
+			if len(block) < length:
+				break
+			yield offset, length + 4, json.loads(zlib.decompress(block))
+			offset += length + 4
+
+def read_block(f_name, offset, length):
+	with open(f_name, 'rb') as f:
+		f.seek(offset + 4)
+		return json.loads(zlib.decompress(f.read(length - 4)))
+
+# decodes the frames of a single turn block
+def decode_turn(block):
+	frames = []
+	for data in block:
+		if len(frames) == 0:
+			frames.append(decode_keyframe(data))
+		else:
+			frames.append(decode_delta(frames[-1], data))
+	return frames
+
+# yields every line of a replay as a dict (the config first, then every frame), in either format
+def iter_frames(f_name):
+	if is_compact(f_name):
+		for i, (offset, length, block) in enumerate(iter_blocks(f_name)):
+			if i == 0:
+				yield block
+			else:
+				for frame in decode_turn(block):
+					yield frame
+	else:
+		with open(f_name) as f:
+			for line in f:
+				line = line.replace("\n", "")
+				line = line.replace("\t", "")
+
+				if (line != ''):
+					yield json.loads(line)
+
+# writes the compact version of a normal replay
+def convert(f_name, out_name):
+	with open(out_name, 'wb') as out:
+		out.write(MAGIC)
+		turn = []
+		turn_num = None
+		for data in iter_frames(f_name):
+			if 'turnInfo' not in data:
+				write_block(out, data)
+				continue
+
+			if data['turnInfo'][1] != turn_num and len(turn) > 0:
+				write_block(out, [encode_keyframe(turn[0])] + [encode_delta(p, c) for p, c in zip(turn, turn[1:])])
+				turn = []
+			turn_num = data['turnInfo'][1]
+			turn.append(data)
+
+		if len(turn) > 0:
+			write_block(out, [encode_keyframe(turn[0])] + [encode_delta(p, c) for p, c in zip(turn, turn[1:])])
+
+# writes a normal replay from a compact one
+def expand(f_name, out_name):
+	with open(out_name, 'w') as out:
+		for data in iter_frames(f_name):
+			out.write(json.dumps(data) + '\n')
+
+# returns whether both files give the same frames, in the same order
+def verify(f_name, compact_name):
+	original = iter_frames(f_name)
+	compact = iter_frames(compact_name)
+	for a, b in zip(original, compact):
+		if a != b or list(a.keys()) != list(b.keys()):
+			return False
+	return next(original, None) is None and next(compact, None) is None
+
+def get_root_dir():
+	return os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..'))
+
+def main(args):
+	if args['all']:
+		f_names = glob.glob(os.path.join(get_root_dir(), 'replays', '*.replay'))
+	else:
+		f_names = args['file']
+
+	for f_name in f_names:
+		out_name = os.path.splitext(f_name)[0] + EXTENSION
+		convert(f_name, out_name)
+		before, after = os.path.getsize(f_name), os.path.getsize(out_name)
+		msg = '{: <60} {: >10} -> {: >9} bytes ({:.1%})'.format(os.path.basename(f_name), before, after, after / max(before, 1))
+
+		verified = None
+		if args['verify'] or args['remove']:
+			verified = verify(f_name, out_name)
+			msg += '   verified' if verified else '   FAILED VERIFICATION'
+		print (msg)
+
+		if args['remove'] and verified is True:
+			os.remove(f_name)
+
+	for f_name in args['expand']:
+		out_name = os.path.splitext(f_name)[0] + '.replay'
+		expand(f_name, out_name)
+		print ('{} -> {}'.format(f_name, out_name))
+
+
+if __name__ == '__main__':
+	args = parse_args() # get command line arguments
+	main(args)
@@ -0,0 +1,308 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+This is a python script to answer questions like "where do we get breached by demolishers" over
+all of your replays at once, without writing a loop over events["breach"] every time.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the contributions/scripts directory, next to replay_io.py
+
+The events of every replay (spawn, breach, damage, death, shield, attack and selfDestruct) are
+read once and stored in a SQLite database (replays/events.db). Every time you run this, replays
+that are new (or changed) since the last run are added first, so the queries are always up to date.
+Replays in the compact format (see replay_io.py) are read too.
+
+Every event has the algo that owns its unit (-al) and the algo on the other side (-op). That is the
+unit doing it, except for damage and death events where it is the unit damaged or destroyed.
+The counts (and the total amount: damage, breach damage or shield) are printed grouped by location
+by default.
+
+Where do the demolishers of other algos breach my-bot?
+>py scripts/contributions/replay_query.py -k breach -op my-bot -u demolisher
+
+Where do my-bot's turrets get destroyed in the first 10 turns?
+>py scripts/contributions/replay_query.py -k death -al my-bot -u turret -t 0 10
+
+How much damage do my-bot's units take, by the type of the unit damaged and turn:
+>py scripts/contributions/replay_query.py -k damage -al my-bot -g unit turn
+
+Options:
+	-k:		kind of event (spawn, breach, damage, death, shield, attack, selfDestruct), default breach
+	-al:	the algo that owns the unit of the event (the unit damaged or destroyed for damage and death)
+	-op:	the algo on the other side
+	-u:		unit type (wall, support, turret, scout, demolisher, interceptor, the shorthand FF, EF, DF,
+			PI, EI, SI or the index 0-5)
+	-t:		first and last turn to include
+	-loc:	only events at this x y
+	-g:		what to group by, any of loc, turn, unit, algo, opponent, replay (default loc)
+	-n:		number of rows to print (default 20)
+	-sql:	run your own query, the tables are replays and events (see SCHEMA below) and the
+			view event_view has the algo names of every event
+	-f:		only add these replay files (instead of everything in the replays folder)
+	-ni:	don't add new replays before the query
+'''
+
+import sys
+try:
+	import os
+	import glob
+	import sqlite3
+	import argparse
+	import replay_io
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS replays (
+	id INTEGER PRIMARY KEY,
+	path TEXT UNIQUE,
+	mtime REAL,
+	p1 TEXT,
+	p2 TEXT,
+	winner INTEGER
+);
+CREATE TABLE IF NOT EXISTS events (
+	replay INTEGER,
+	turn INTEGER,
+	frame INTEGER,
+	kind TEXT,
+	player INTEGER,
+	x INTEGER,
+	y INTEGER,
+	x2 INTEGER,
+	y2 INTEGER,
+	unit_type INTEGER,
+	amount REAL,
+	unit_id TEXT,
+	target_id TEXT
+);
+CREATE INDEX IF NOT EXISTS events_kind ON events (kind, replay, player);
+CREATE INDEX IF NOT EXISTS events_loc ON events (kind, x, y);
+CREATE INDEX IF NOT EXISTS events_turn ON events (kind, turn);
+CREATE VIEW IF NOT EXISTS event_view AS
+	SELECT e.*,
+		CASE e.player WHEN 1 THEN r.p1 ELSE r.p2 END AS algo,
+		CASE e.player WHEN 1 THEN r.p2 ELSE r.p1 END AS opponent
+	FROM events e JOIN replays r ON e.replay = r.id;
+'''
+
+# where each value is in the list of every event kind: (loc, loc2, amount, unit type, id, target id, player)
+EVENTS = {
+	'spawn':		(0, None, None, 1, 2, None, 3),
+	'breach':		(0, None, 1, 2, 3, None, 4),
+	'damage':		(0, None, 1, 2, 3, None, 4),
+	'death':		(0, None, None, 1, 2, None, 3),
+	'shield':		(0, 1, 2, 3, 4, 5, 6),
+	'attack':		(0, 1, 2, 3, 4, 5, 6),
+	'selfDestruct':	(0, None, 2, 3, 4, None, 5),
+}
+
+UNIT_NAMES = ['wall', 'support', 'turret', 'scout', 'demolisher', 'interceptor', 'remove', 'upgrade']
+UNIT_SHORTHAND = ['FF', 'EF', 'DF', 'PI', 'EI', 'SI', 'RM', 'UP']
+GROUPS = {'loc': ['x', 'y'], 'turn': ['turn'], 'unit': ['unit_type'], 'algo': ['algo'], 'opponent': ['opponent'], 'replay': ['replay']}
+
+
+# handles all the arguments
+def parse_args():
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument(
+		"-k", "--kind",
+		default='breach',
+		choices=sorted(EVENTS),
+		help="kind of event to query (default breach)\n\n")
+	ap.add_argument(
+		"-al", "--algo",
+		default=None,
+		help="only events of units owned by this algo\n\n")
+	ap.add_argument(
+		"-op", "--opponent",
+		default=None,
+		help="only events in games against this algo (the algo not owning the unit)\n\n")
+	ap.add_argument(
+		"-u", "--unit",
+		default=None,
+		help="only events of this unit type (name, shorthand or index)\n\n")
+	ap.add_argument(
+		"-t", "--turns",
+		nargs=2,
+		type=int,
+		default=None,
+		help="first and last turn to include\n\n")
+	ap.add_argument(
+		"-loc", "--location",
+		nargs=2,
+		type=int,
+		default=None,
+		help="only events at this x y\n\n")
+	ap.add_argument(
+		"-g", "--group",
+		nargs='+',
+		default=['loc'],
+		choices=sorted(GROUPS),
+		help="what to group the results by (default loc)\n\n")
+	ap.add_argument(
+		"-n", "--num",
+		type=int,
+		default=20,
+		help="number of rows to print (default 20)\n\n")
+	ap.add_argument(
+		"-sql", "--sql",
+		default=None,
+		help="run your own sql query instead\n\n")
+	ap.add_argument(
+		"-f", "--file",
+		nargs='*',
+		default=[],
+		help="only add these replay files to the database\n\n")
+	ap.add_argument(
+		"-ni", "--no_ingest",
+		action='store_true',
+		help="if added will not add new replays before the query\n\n")
+	ap.add_argument(
+		"-db", "--database",
+		default=os.path.join(get_root_dir(), 'replays', 'events.db'),
+		help="the database file\n\n")
+	return vars(ap.parse_args())
+
+def get_root_dir():
+	return os.path.abspath(os.path.join(os.path.dirname(os.path.realpath(__file__)), '..', '..'))
+
+def connect(path):
+	db_dir = os.path.dirname(os.path.abspath(path))
+	if not os.path.isdir(db_dir):
+		os.makedirs(db_dir)
+	db = sqlite3.connect(path)
+	db.executescript(SCHEMA)
+	return db
+
+# returns the index of a unit type from its name, shorthand or index
+def get_unit_type(unit):
+	if unit.lower() in UNIT_NAMES:
+		return UNIT_NAMES.index(unit.lower())
+	if unit.upper() in UNIT_SHORTHAND:
+		return UNIT_SHORTHAND.index(unit.upper())
+	return int(unit)
+
+# turns a single event from a frame into a row of the events table (without the replay, turn and frame)
+def event_row(kind, event):
+	loc, loc2, amount, unit_type, unit_id, target_id, player = [event[i] if i is not None else None for i in EVENTS[kind]]
+	x2, y2 = loc2[:2] if isinstance(loc2, list) and len(loc2) >= 2 and not isinstance(loc2[0], list) else (None, None)
+	return (kind, player, loc[0], loc[1], x2, y2, unit_type, amount, unit_id, target_id)
+
+# adds the events of a replay to the database, returns the number of events added (None if the replay is already there)
+def ingest(db, f_name):
+	path = os.path.abspath(f_name)
+	mtime = os.path.getmtime(f_name)
+	row = db.execute('SELECT id, mtime FROM replays WHERE path = ?', (path,)).fetchone()
+	if row is not None:
+		if row[1] == mtime:
+			return None
+		db.execute('DELETE FROM events WHERE replay = ?', (row[0],))
+		db.execute('DELETE FROM replays WHERE id = ?', (row[0],))
+
+	replay_id = db.execute('INSERT INTO replays (path, mtime) VALUES (?, ?)', (path, mtime)).lastrowid
+	added = 0
+	end_stats = None
+	for frame in replay_io.iter_frames(f_name):
+		if 'turnInfo' not in frame:
+			continue
+		if 'endStats' in frame:
+			end_stats = frame['endStats']
+
+		turn, frame_num = frame['turnInfo'][1], frame['turnInfo'][2]
+		rows = []
+		for kind, events in frame.get('events', {}).items():
+			if kind not in EVENTS:
+				continue
+			for event in events:
+				try:
+					rows.append((replay_id, turn, frame_num) + event_row(kind, event))
+				except (IndexError, TypeError):
+					pass
+		db.executemany('INSERT INTO events VALUES (?,?,?,?,?,?,?,?,?,?,?,?,?)', rows)
+		added += len(rows)
+
+	if end_stats is not None:
+		db.execute('UPDATE replays SET p1 = ?, p2 = ?, winner = ? WHERE id = ?', (end_stats['player1']['name'], end_stats['player2']['name'], end_stats.get('winner'), replay_id))
+	db.commit()
+	return added
+
+# adds every new replay in the replays folder (or just the files given)
+def ingest_all(db, f_names=[]):
+	if len(f_names) == 0:
+		replay_dir = os.path.join(get_root_dir(), 'replays')
+		f_names = glob.glob(os.path.join(replay_dir, '*.replay'))
+		compact = glob.glob(os.path.join(replay_dir, '*' + replay_io.EXTENSION))
+		f_names += [f for f in compact if os.path.splitext(f)[0] + '.replay' not in f_names]
+
+	num = 0
+	for f_name in sorted(f_names, key=os.path.getmtime):
+		try:
+			if ingest(db, f_name) is not None:
+				num += 1
+		except Exception as e:
+			db.rollback()
+			sys.stderr.write('Could not read {}: {}\n'.format(f_name, str(e)))
+	if num > 0:
+		print ('Added {} replays'.format(num))
+		print ()
+
+# builds and runs the grouped query from the arguments, returns the column names and the rows
+def query(db, args):
+	where = ['kind = ?']
+	params = [args['kind']]
+	if args['algo'] is not None:
+		where.append('algo = ?')
+		params.append(args['algo'])
+	if args['opponent'] is not None:
+		where.append('opponent = ?')
+		params.append(args['opponent'])
+	if args['unit'] is not None:
+		where.append('unit_type = ?')
+		params.append(get_unit_type(args['unit']))
+	if args['turns'] is not None:
+		where.append('turn BETWEEN ? AND ?')
+		params += args['turns']
+	if args['location'] is not None:
+		where.append('x = ? AND y = ?')
+		params += args['location']
+
+	columns = [c for g in args['group'] for c in GROUPS[g]]
+	sql = 'SELECT {0}, COUNT(*) AS count, SUM(amount) AS amount, COUNT(DISTINCT replay) AS games FROM event_view WHERE {1} GROUP BY {0} ORDER BY count DESC LIMIT ?'.format(', '.join(columns), ' AND '.join(where))
+	cursor = db.execute(sql, params + [args['num']])
+	return [d[0] for d in cursor.description], cursor.fetchall()
+
+def print_rows(names, rows):
+	rows = [[UNIT_NAMES[v] if n == 'unit_type' and isinstance(v, int) and 0 <= v < len(UNIT_NAMES) else v for n, v in zip(names, row)] for row in rows]
+	rows = [['' if v is None else round(v, 1) if isinstance(v, float) else v for v in row] for row in rows]
+	widths = [max([len(str(v)) for v in [n] + [row[i] for row in rows]]) for i, n in enumerate(names)]
+	print ('|' + ' | '.join('{: >{fill}}'.format(n, fill=w) for n, w in zip(names, widths)))
+	print ('|' + '-+-'.join('-' * w for w in widths))
+	for row in rows:
+		print ('|' + ' | '.join('{: >{fill}}'.format(str(v), fill=w) for v, w in zip(row, widths)))
+	print ()
+
+def main(args):
+	db = connect(args['database'])
+	if not args['no_ingest'] or len(args['file']) > 0:
+		ingest_all(db, args['file'])
+
+	if args['sql'] is not None:
+		cursor = db.execute(args['sql'])
+		print_rows([d[0] for d in cursor.description] if cursor.description else [], cursor.fetchall())
+	else:
+		print_rows(*query(db, args))
+	db.close()
+
+
+if __name__ == '__main__':
+	args = parse_args() # get command line arguments
+	main(args)
@@ -61,6 +61,34 @@ This would run every single game like before, but 6 games at a time.
 DO NOT RUN WITH A LARGE BATCH SIZE (like >15, depending on your computer) or else it will take forever and crash.
 
 
+Result caching:
+
+Every algo directory is hashed (every file in it, except __pycache__, .git, replay indexes
+and the knowledge.db it learns in) before the matches start. The result of each pairing is stored in replays/arena_cache.json
+keyed by the two hashes, so re-running the arena only plays pairings where at least one of
+the algos is new or has changed since the last run. For example, after editing one algo:
+>py scripts/contributions/run_arena.py -a
+
+only replays the games that algo is part of. If you want to play everything again use -nc (no cache):
+>py scripts/contributions/run_arena.py -a -nc
+
+You can point to a different cache file with -c:
+>py scripts/contributions/run_arena.py -a -c my_cache.json
+
+
+Sequential mode:
+
+Games are not fully deterministic (a lot of algos use random), so a single game can pick the wrong winner.
+With -seq every pairing is played repeatedly (swapping sides every game) until a sequential
+probability ratio test decides which algo is better, or -mg games have been played:
+>py scripts/contributions/run_arena.py -a -seq -mg 30
+
+Pairings where one algo wins every game stop after a handful of games, so most of the games go
+to the close pairings. -d sets how much better than 50% an algo has to win to count as better
+(default .15) and -al the chance of picking the wrong one (default .05). The win/loss records are
+kept in the cache, so running it again continues where it stopped.
+
+
 At the end I also run the get_results.py script that outputs some data. I recommend having
 matplotlib installed for graphs, etc.
 
@@ -78,6 +106,10 @@ try:
 	import itertools
 	import time
 	import copy
+	import json
+	import glob
+	import math
+	import hashlib
 	import multiprocessing as mp
 except ImportError as e:
 	print("WARNING: Module not found, full error:\n")
@@ -103,11 +135,14 @@ def run_single_game(process_command, algo1, algo2, max_name_len):
 	if str(error) != "b''":
 		print ('Error with match - {} {}:\n\tError:\n{}'.format(algo1, algo2, error))
 
+# returns the root of the starterkit (where engine.jar, algos/ and replays/ live)
+def get_root_dir():
+	file_dir = os.path.dirname(os.path.realpath(__file__))
+	return os.path.abspath(os.path.join(file_dir, os.pardir, os.pardir))
+
 def run_match(arg1='', arg2='', max_name_len=0):
-	# Get location of this run file
-	file_dir = os.path.dirname(os.path.realpath(__file__)).replace('\\contributions', '')
-	parent_dir = os.path.join(file_dir, os.pardir)
-	parent_dir = os.path.abspath(parent_dir)
+	# Get location of the starterkit root
+	parent_dir = get_root_dir()
 
 	# Get if running in windows OS
 	is_windows = sys.platform.startswith('win')
@@ -140,7 +175,7 @@ def run_match(arg1='', arg2='', max_name_len=0):
 			trailing_char = "" if algo2.endswith('/') else "/"
 			algo2 = algo2 + trailing_char + "run.sh"
 
-	run_single_game("cd {} && java -jar engine.jar work {} {}".format(parent_dir, algo1, algo2), algo1.split('\\')[-2].replace('algos/',''),  algo2.split('\\')[-2].replace('algos/',''), max_name_len)
+	run_single_game("cd {} && java -jar engine.jar work {} {}".format(parent_dir, algo1, algo2), algo1.replace('\\', '/').split('/')[-2],  algo2.replace('\\', '/').split('/')[-2], max_name_len)
 
 # handles all the arguments
 def parse_args():
@@ -164,11 +199,38 @@ def parse_args():
 		type=int,
 		default=5,
 		help="number of games to run at a single time (on seperate threads)\n\n")
+	ap.add_argument(
+		"-c", "--cache",
+		default=os.path.join(get_root_dir(), 'replays', 'arena_cache.json'),
+		help="file used to store the results of pairings between unchanged algos\n\n")
+	ap.add_argument(
+		"-nc", "--no_cache",
+		action='store_true',
+		help="if added will play every pairing again, even if its result is cached\n\n")
+	ap.add_argument(
+		"-seq", "--sequential",
+		action='store_true',
+		help="if added will play each pairing repeatedly until it is clear which algo is better\n\n")
+	ap.add_argument(
+		"-mg", "--max_games",
+		type=int,
+		default=20,
+		help="most games played for a single pairing in sequential mode (default 20)\n\n")
+	ap.add_argument(
+		"-d", "--delta",
+		type=float,
+		default=.15,
+		help="win rate above/below 50%% that counts as one algo being better in sequential mode (default .15)\n\n")
+	ap.add_argument(
+		"-al", "--alpha",
+		type=float,
+		default=.05,
+		help="chance of picking the wrong algo as better in sequential mode (default .05)\n\n")
 	return vars(ap.parse_args())
 
 # called by the -a arg, runs every algo in directory
 def run_all():
-	algos_dir = os.path.dirname(os.path.realpath(__file__)).replace('scripts\\contributions', '')+'algos\\'
+	algos_dir = os.path.join(get_root_dir(), 'algos')
 	algos = os.listdir(algos_dir)
 	matches = itertools.combinations(algos, 2)
 	return matches
@@ -188,6 +250,197 @@ def run_from_file(filePath):
 		print ('File {} was not found'.format(filePath))
 		sys.exit()
 
+# returns a hash of everything that changes how an algo plays (every file of the algo, including gamelib)
+# returns None if the algo directory does not exist, so results for it are never cached
+def hash_algo(algo):
+	algo_dir = os.path.join(get_root_dir(), 'algos', algo)
+	if not os.path.isdir(algo_dir):
+		return None
+
+	h = hashlib.sha1()
+	for root, dirs, files in os.walk(algo_dir):
+		dirs[:] = sorted([d for d in dirs if d not in ['__pycache__', '.git']])	# walk in a fixed order
+		for f_name in sorted(files):
+			# every file can change how the algo plays (params, data, binaries), except what it writes while playing
+			if not f_name.endswith('.idx') and f_name != 'knowledge.db':
+				path = os.path.join(root, f_name)
+				h.update(os.path.relpath(path, algo_dir).replace('\\', '/').encode())
+				with open(path, 'rb') as f:
+					h.update(f.read())
+	return h.hexdigest()
+
+def load_cache(path):
+	try:
+		with open(path, 'r') as f:
+			return json.load(f)
+	except (FileNotFoundError, ValueError):
+		return {}
+
+def save_cache(cache, path):
+	cache_dir = os.path.dirname(os.path.abspath(path))
+	if not os.path.isdir(cache_dir):
+		os.makedirs(cache_dir)
+	with open(path, 'w') as f:
+		json.dump(cache, f, indent=1)
+
+# returns the cached result of a pairing (with algo1 as player 1) or None if it has to be played
+# a result cached with the players the other way around is flipped
+def get_cached_result(cache, hashes, algo1, algo2):
+	h1, h2 = hashes[algo1], hashes[algo2]
+	if h1 is None or h2 is None:
+		return None
+
+	if '{}:{}'.format(h1, h2) in cache:
+		return cache['{}:{}'.format(h1, h2)]
+	if '{}:{}'.format(h2, h1) in cache:
+		result = dict(cache['{}:{}'.format(h2, h1)])
+		result['winner'] = {1:2, 2:1}.get(result['winner'], result['winner'])
+		if 'record' in result:
+			result['record'] = result['record'][::-1]
+		return result
+	return None
+
+# reads the endStats from the last line of a replay without parsing the rest of the file
+def read_end_stats(f_name):
+	with open(f_name, 'rb') as f:
+		f.seek(0, os.SEEK_END)
+		pos = f.tell()
+		block = b''
+		while pos > 0 and block.strip().find(b'\n') == -1:
+			step = min(4096, pos)
+			pos -= step
+			f.seek(pos)
+			block = f.read(step) + block
+
+	try:
+		return json.loads(block.strip().split(b'\n')[-1].decode())['endStats']
+	except (ValueError, KeyError, TypeError):
+		return None		# the game crashed or has not finished
+
+# matches the replays created while the arena was running to the games that were played
+# returns a list of (match, endStats, replay file) for every game that finished
+def collect_results(matches, old_replays):
+	results = []
+	unclaimed = list(matches)
+	new_replays = sorted(set(get_replay_files()) - old_replays, key=os.path.getmtime)
+	for f_name in new_replays:
+		end_stats = read_end_stats(f_name)
+		if end_stats is None:
+			continue
+
+		names = (end_stats['player1']['name'], end_stats['player2']['name'])
+		for match in unclaimed:
+			if (os.path.basename(match[0]), os.path.basename(match[1])) == names:
+				unclaimed.remove(match)
+				results.append((match, end_stats, f_name))
+				break
+
+	for match in unclaimed:
+		print ('{: <30}{}   vs   {}'.format('No replay found for match:', match[0], match[1]))
+	return results
+
+# caches the result of every pairing that was played
+def record_results(matches, hashes, cache, old_replays):
+	for match, end_stats, f_name in collect_results(matches, old_replays):
+		h1, h2 = hashes[match[0]], hashes[match[1]]
+		if h1 is not None and h2 is not None:
+			cache['{}:{}'.format(h1, h2)] = {'algos': [match[0], match[1]], 'winner': end_stats['winner'], 'replay': f_name}
+
+def get_replay_files():
+	return glob.glob(os.path.join(get_root_dir(), 'replays', '*.replay'))
+
+# prints the wins of every algo over all the pairings, whether they were played now or cached
+def print_summary(matches, hashes, cache):
+	wins = {}
+	for algo1, algo2 in matches:
+		wins.setdefault(algo1, 0)
+		wins.setdefault(algo2, 0)
+		result = get_cached_result(cache, hashes, algo1, algo2)
+		if result is None:
+			continue
+		if result['winner'] == 1:
+			wins[algo1] += 1
+		elif result['winner'] == 2:
+			wins[algo2] += 1
+	if len(wins) == 0:
+		return
+
+	fill_len = max([len(algo) for algo in wins]) + 9
+	print ('Wins by algo (including cached pairings):\n|')
+	for algo in sorted(wins, key=lambda e:-1*wins[e]):
+		print ('|{: >{fill}} : {}'.format(algo, wins[algo], fill=fill_len))
+	print ()
+
+# sequential probability ratio test on the chance p that the first algo of a pairing wins a game
+# H0: p = 0.5 - delta (second algo is better) vs H1: p = 0.5 + delta (first algo is better)
+# returns 1 or 2 for the algo that is decided to be better, 0 if more games are needed
+def sprt(wins, losses, delta=0.15, alpha=0.05):
+	p0, p1 = 0.5 - delta, 0.5 + delta
+	llr = wins * math.log(p1 / p0) + losses * math.log((1 - p1) / (1 - p0))
+
+	if llr >= math.log((1 - alpha) / alpha):
+		return 1
+	if llr <= math.log(alpha / (1 - alpha)):
+		return 2
+	return 0
+
+# returns the [wins, losses] of the first algo of a pairing so far (a tie counts as half a win each)
+def get_record(cache, hashes, match):
+	result = get_cached_result(cache, hashes, match[0], match[1])
+	if result is None:
+		return [0, 0]
+	if 'record' in result:
+		return list(result['record'])
+	return [{1:1, 2:0}.get(result['winner'], .5), {1:0, 2:1}.get(result['winner'], .5)]
+
+# plays every pairing repeatedly in rounds until the sprt decides which algo is better or max_games is reached
+# pairings that are clearly decided stop early, so close pairings get most of the games
+def run_sequential(matches, hashes, cache, args):
+	records = {match: [0, 0] if args['no_cache'] else get_record(cache, hashes, match) for match in matches}
+
+	while True:
+		undecided = [m for m in matches if sprt(records[m][0], records[m][1], args['delta'], args['alpha']) == 0 and sum(records[m]) < args['max_games']]
+		if len(undecided) == 0:
+			break
+
+		# spread the batch over the pairings that are left, and swap sides every game to cancel out any side bias
+		games = []
+		per_pairing = max(1, args['batch'] // len(undecided))
+		for match in undecided:
+			played = int(sum(records[match]))
+			for i in range(min(per_pairing, args['max_games'] - played)):
+				games.append(match if (played + i) % 2 == 0 else (match[1], match[0]))
+
+		print ('{} pairings undecided, running {} matches'.format(len(undecided), len(games)))
+		print ()
+		old_replays = set(get_replay_files())
+		run_matches(games, args['batch'])
+
+		results = collect_results(games, old_replays)
+		if len(results) == 0:
+			print ('No games finished this round - stopping')
+			break
+
+		for game, end_stats, f_name in results:
+			match = game if game in records else (game[1], game[0])
+			winner = end_stats['winner'] if game == match else {1:2, 2:1}.get(end_stats['winner'], end_stats['winner'])
+			records[match][0] += {1:1, 2:0}.get(winner, .5)
+			records[match][1] += {1:0, 2:1}.get(winner, .5)
+
+			h1, h2 = hashes[match[0]], hashes[match[1]]
+			if h1 is not None and h2 is not None:
+				record = records[match]
+				cache['{}:{}'.format(h1, h2)] = {'algos': [match[0], match[1]], 'winner': 1 if record[0] > record[1] else 2 if record[1] > record[0] else 0, 'replay': f_name, 'record': record}
+		save_cache(cache, args['cache'])
+
+	fill_len = max([len(m[0]) for m in matches])
+	print ('Sequential results:\n|')
+	for match in matches:
+		decision = sprt(records[match][0], records[match][1], args['delta'], args['alpha'])
+		decided = match[decision - 1] if decision != 0 else 'undecided'
+		print ('|{: >{fill}}   vs   {: <{fill}} : {:g} - {:g} ({})'.format(match[0], match[1], records[match][0], records[match][1], decided, fill=fill_len))
+	print ()
+
 # returns the number of processess that are active
 def get_num_running(processes):
 	c = 0
@@ -239,17 +492,45 @@ if __name__ == '__main__':
 		print ('No arguments - no action taken')
 		sys.exit()
 
-	tmp = copy.deepcopy(matches)
-	run_matches(matches, args['batch'])		# run all matches
+	matches = list(matches)
+	hashes = {algo: hash_algo(algo) for match in matches for algo in match}
+	cache = load_cache(args['cache'])
+
+	if args['sequential']:
+		run_sequential(matches, hashes, cache, args)
+	else:
+		# only play the pairings where at least one of the algos is new or changed
+		if args['no_cache']:
+			pending = matches
+		else:
+			pending = [match for match in matches if get_cached_result(cache, hashes, match[0], match[1]) is None]
+		print ('{} of {} pairings cached, running {} matches'.format(len(matches) - len(pending), len(matches), len(pending)))
+		print ()
+
+		old_replays = set(get_replay_files())
+		if len(pending) > 0:
+			run_matches(pending, args['batch'])		# run all matches that are not cached
+		record_results(pending, hashes, cache, old_replays)
+	save_cache(cache, args['cache'])
+	print_summary(matches, hashes, cache)
+
+	# replays of every pairing that still exist, played now or cached
+	replays = []
+	for match in matches:
+		result = get_cached_result(cache, hashes, match[0], match[1])
+		if result is not None and os.path.isfile(result['replay']) and result['replay'] not in replays:
+			replays.append(result['replay'])
+	if len(replays) == 0:
+		sys.exit()
 
 	# if get_results is avalible, run a summary of the matches played
 	try:
 		args = {	'all':		False, 				\
 					'verbose':	False, 				\
 					'averages':	[], 				\
-					'file':		[],					\
+					'file':		replays,			\
 					'graph':	['wins'],	\
-					'num':		len(list(tmp))		\
+					'num':		len(replays)		\
 				}
 		from get_results import main
 		main(args)
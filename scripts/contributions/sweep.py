@@ -0,0 +1,214 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+This is a python script to tune the constants of an algo by playing every combination of
+parameter values against a fixed pool of opponents.
+------------------------------------------------------------------------------------------------
+
+README:
+
+This program assumes this file is in the contributions/scripts directory, next to run_arena.py
+
+The algo being tuned has to read its constants with gamelib.load_params in on_game_start, for example:
+
+	self.params = gamelib.load_params({"center_goal_mp": 17, "failure_mp": 3})
+
+load_params uses the defaults unless an ALGO_PARAMS environment variable or a params.json
+file next to algo_strategy.py overrides them.
+
+The values to try are given in a json file, with a list of values for every parameter:
+
+params.json:
+{
+	"center_goal_mp": [15, 17, 19],
+	"failure_mp": [2, 3]
+}
+
+For every combination (here 6 of them) a copy of the algo is made in the algos folder with its
+own params.json, and the copies play against every opponent (swapping sides every game):
+>py scripts/contributions/sweep.py -a finale2 -o hivemind16 new2 -p params.json -g 4 -b 6
+
+-g is the number of games against each opponent (default 2) and -b how many games run at once.
+
+When you have a lot of combinations you can use successive halving (-sh) instead. Every
+combination plays -g games against each opponent, then only the best half is kept and plays
+twice as many more games, and so on until one is left. -e changes how many are dropped each
+round (default 2, keeps 1/2):
+>py scripts/contributions/sweep.py -a finale2 -o hivemind16 new2 -p params.json -sh
+
+The copies are removed when the sweep is done unless you pass -k (keep).
+
+At the end the win rate and average point differential (points scored minus points conceded)
+of every combination is printed, best first, and saved to replays/sweep_[ALGO].json.
+'''
+
+import sys
+try:
+	import os
+	import json
+	import shutil
+	import argparse
+	import itertools
+	from run_arena import get_root_dir, run_matches, collect_results, get_replay_files
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+
+# handles all the arguments
+def parse_args():
+	ap = argparse.ArgumentParser(add_help=False, formatter_class=argparse.RawTextHelpFormatter)
+	ap.add_argument('-h', '--help', action='help', help='show this help message and exit\n\n')
+	ap.add_argument(
+		"-a", "--algo",
+		required=True,
+		help="the algo to tune (name of its folder in algos)\n\n")
+	ap.add_argument(
+		"-o", "--opponents",
+		nargs='+',
+		required=True,
+		help="the algos to play against\n\n")
+	ap.add_argument(
+		"-p", "--params",
+		required=True,
+		help="json file with a list of values to try for every parameter\n\n")
+	ap.add_argument(
+		"-g", "--games",
+		type=int,
+		default=2,
+		help="games against each opponent for every combination (per round with -sh)\n\n")
+	ap.add_argument(
+		"-b", "--batch",
+		type=int,
+		default=5,
+		help="number of games to run at a single time (on seperate threads)\n\n")
+	ap.add_argument(
+		"-sh", "--successive_halving",
+		action='store_true',
+		help="if added will drop the worst combinations after every round\n\n")
+	ap.add_argument(
+		"-e", "--eta",
+		type=int,
+		default=2,
+		help="with -sh, keeps 1/eta of the combinations every round (default 2)\n\n")
+	ap.add_argument(
+		"-k", "--keep",
+		action='store_true',
+		help="if added will not remove the algo copies when done\n\n")
+	return vars(ap.parse_args())
+
+# returns every combination of the parameter values as a list of dicts
+def get_grid(path):
+	with open(path, 'r') as f:
+		values = json.load(f)
+	names = sorted(values)
+	return [dict(zip(names, combination)) for combination in itertools.product(*[values[n] for n in names])]
+
+# copies the algo once for every combination, with the combination stored in the copy's params.json
+def create_copies(algo, grid):
+	algos_dir = os.path.join(get_root_dir(), 'algos')
+	copies = []
+	for i, params in enumerate(grid):
+		name = '{}-sweep{}'.format(algo, i)
+		path = os.path.join(algos_dir, name)
+		if os.path.isdir(path):
+			shutil.rmtree(path)
+		shutil.copytree(os.path.join(algos_dir, algo), path, ignore=shutil.ignore_patterns('documentation', '__pycache__', '.git', 'knowledge.db'))
+		with open(os.path.join(path, 'params.json'), 'w') as f:
+			json.dump(params, f)
+		copies.append(name)
+	return copies
+
+def remove_copies(copies):
+	for name in copies:
+		shutil.rmtree(os.path.join(get_root_dir(), 'algos', name), ignore_errors=True)
+
+# stores the results of every combination
+class Stats:
+	def __init__(self, name, params):
+		self.name = name
+		self.params = params
+		self.games = 0
+		self.wins = 0.
+		self.point_diff = 0.
+
+	def add(self, won, scored, conceded):
+		self.games += 1
+		self.wins += won
+		self.point_diff += scored - conceded
+
+	def win_rate(self):
+		return self.wins / self.games if self.games > 0 else 0.
+
+	def avg_point_diff(self):
+		return self.point_diff / self.games if self.games > 0 else 0.
+
+	# used to rank the combinations, point differential breaks ties in win rate
+	def score(self):
+		return (self.win_rate(), self.avg_point_diff())
+
+# plays games for every combination in names against every opponent and adds the results to stats
+def play_round(names, opponents, games, stats, batch_size):
+	matches = []
+	for name in names:
+		for opponent in opponents:
+			for i in range(games):
+				matches.append((name, opponent) if (stats[name].games + i) % 2 == 0 else (opponent, name))
+
+	old_replays = set(get_replay_files())
+	run_matches(matches, batch_size)
+
+	for match, end_stats, f_name in collect_results(matches, old_replays):
+		p_self, p_other = ('player1', 'player2') if match[0] in stats else ('player2', 'player1')
+		name = match[0] if match[0] in stats else match[1]
+		won = {p_self: 1., p_other: 0.}.get('player{}'.format(end_stats['winner']), .5)
+		stats[name].add(won, end_stats[p_self].get('points_scored', 0), end_stats[p_other].get('points_scored', 0))
+
+def print_stats(stats):
+	ranked = sorted(stats.values(), key=lambda s: s.score(), reverse=True)
+	fill_len = max([len(s.name) for s in ranked]) + 4
+	print ('Results (best first):\n|')
+	for s in ranked:
+		print ('|{: >{fill}} : win rate {: >5.1%}   point diff {: >+6.2f}   games {: >3}   {}'.format(s.name, s.win_rate(), s.avg_point_diff(), s.games, json.dumps(s.params), fill=fill_len))
+	print ()
+
+def save_stats(algo, stats):
+	path = os.path.join(get_root_dir(), 'replays', 'sweep_{}.json'.format(algo))
+	if not os.path.isdir(os.path.dirname(path)):
+		os.makedirs(os.path.dirname(path))
+	with open(path, 'w') as f:
+		json.dump([{'params': s.params, 'games': s.games, 'win_rate': s.win_rate(), 'point_diff': s.avg_point_diff()} for s in sorted(stats.values(), key=lambda s: s.score(), reverse=True)], f, indent=1)
+
+def main(args):
+	grid = get_grid(args['params'])
+	print ('Sweeping {} combinations of {}'.format(len(grid), args['algo']))
+	print ()
+
+	copies = create_copies(args['algo'], grid)
+	stats = {name: Stats(name, params) for name, params in zip(copies, grid)}
+	try:
+		if args['successive_halving']:
+			remaining = list(copies)
+			games = args['games']
+			while True:
+				play_round(remaining, args['opponents'], games, stats, args['batch'])
+				if len(remaining) <= 1:
+					break
+				remaining = sorted(remaining, key=lambda n: stats[n].score(), reverse=True)[:max(1, len(remaining) // args['eta'])]
+				games *= 2
+		else:
+			play_round(copies, args['opponents'], args['games'], stats, args['batch'])
+	finally:
+		if not args['keep']:
+			remove_copies(copies)
+
+	save_stats(args['algo'], stats)
+	print_stats(stats)
+
+
+if __name__ == '__main__':
+	args = parse_args() # get command line arguments
+	main(args)
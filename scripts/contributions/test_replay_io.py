@@ -0,0 +1,133 @@
+#!/usr/bin/env python
+
+'''
+------------------------------------------------------------------------------------------------
+Short Description:
+Round trip tests for replay_io.py, on a made up replay with turns longer than the frame cache
+of watch_replay.py.
+------------------------------------------------------------------------------------------------
+
+README:
+
+>py scripts/contributions/test_replay_io.py
+
+The FrameIndex tests are skipped when matplotlib isn't installed, as watch_replay.py needs it.
+'''
+
+import sys
+try:
+	import os
+	import json
+	import random
+	import shutil
+	import tempfile
+	import unittest
+	import importlib.util
+	import replay_io
+except ImportError as e:
+	print("WARNING: Module not found, full error:\n")
+	print(str(e))
+	sys.exit()
+
+
+TURNS = 4
+FRAMES_PER_TURN = 100				# more than watch_replay.FrameIndex.CACHE_SIZE
+
+# writes a replay like the engine does: the config, then for every turn its turn state (frame -1) and action frames
+# units walk, lose health, die and are spawned, so the deltas have every kind of change in them
+def write_replay(f_name, seed=0):
+	rng = random.Random(seed)
+	units = [[[] for i in range(8)], [[] for i in range(8)]]
+	next_id = 0
+	frames = []
+	for turn in range(TURNS):
+		for frame in range(-1, FRAMES_PER_TURN):
+			for player in range(2):
+				for unit_type in range(8):
+					for u in units[player][unit_type]:
+						if unit_type >= 3:
+							u[0] = (u[0] + rng.choice([-1, 0, 1])) % 28
+							u[1] = (u[1] + rng.choice([-1, 0, 1])) % 28
+						if rng.random() < 0.1:
+							u[2] = round(u[2] - rng.random() * 5, 1)
+					units[player][unit_type] = [u for u in units[player][unit_type] if u[2] > 0]
+					if rng.random() < 0.05:
+						units[player][unit_type].append([rng.randrange(28), rng.randrange(28), 15.0, str(next_id)])
+						next_id += 1
+			data = {
+				'p2Units': json.loads(json.dumps(units[1])),
+				'turnInfo': [0 if frame == -1 else 1, turn, frame, turn * (FRAMES_PER_TURN + 1) + frame + 1],
+				'p1Stats': [30.0 - turn, 8.0, 5.0, 0],
+				'p1Units': json.loads(json.dumps(units[0])),
+				'p2Stats': [30.0 - turn / 2, 8.0, 5.0, 0],
+				'events': {'spawn': [], 'death': [], 'move': []},
+			}
+			if turn == TURNS - 1 and frame == FRAMES_PER_TURN - 1:
+				data['endStats'] = {'winner': 1, 'turns': TURNS}
+			frames.append(data)
+
+	with open(f_name, 'w') as f:
+		f.write(json.dumps({'unitInformation': [], 'seasonCompatibilityModeP1': 5}) + '\n')
+		for data in frames:
+			f.write(json.dumps(data) + '\n')
+	return frames
+
+
+class TestReplayIO(unittest.TestCase):
+	def setUp(self):
+		self.dir = tempfile.mkdtemp()
+		self.replay = os.path.join(self.dir, 'test.replay')
+		self.compact = os.path.join(self.dir, 'test' + replay_io.EXTENSION)
+		self.frames = write_replay(self.replay)
+		replay_io.convert(self.replay, self.compact)
+
+	def tearDown(self):
+		shutil.rmtree(self.dir)
+
+	def test_convert_and_verify(self):
+		self.assertTrue(replay_io.is_compact(self.compact))
+		self.assertFalse(replay_io.is_compact(self.replay))
+		self.assertTrue(replay_io.verify(self.replay, self.compact))
+		self.assertLess(os.path.getsize(self.compact), os.path.getsize(self.replay))
+
+	def test_verify_fails_on_a_different_replay(self):
+		other = os.path.join(self.dir, 'other.replay')
+		write_replay(other, seed=1)
+		self.assertFalse(replay_io.verify(other, self.compact))
+
+	def test_expand(self):
+		expanded = os.path.join(self.dir, 'expanded.replay')
+		replay_io.expand(self.compact, expanded)
+		self.assertTrue(replay_io.verify(self.replay, expanded))
+
+	def test_random_access(self):
+		blocks = list(replay_io.iter_blocks(self.compact))[1:]
+		self.assertEqual(len(blocks), TURNS)
+		order = list(range(TURNS))
+		random.Random(0).shuffle(order)
+		for turn in order:
+			offset, length, _ = blocks[turn]
+			frames = replay_io.decode_turn(replay_io.read_block(self.compact, offset, length))
+			self.assertEqual(frames, [data for data in self.frames if data['turnInfo'][1] == turn])
+
+	@unittest.skipIf(importlib.util.find_spec('matplotlib') is None, 'watch_replay.py needs matplotlib')
+	def test_frame_index(self):
+		import watch_replay
+		self.assertGreater(FRAMES_PER_TURN, watch_replay.FrameIndex.CACHE_SIZE)
+		by_key = {(data['turnInfo'][1], data['turnInfo'][2]): data for data in self.frames}
+		keys = [(0, 5), (1, -1), (1, FRAMES_PER_TURN - 1), (0, -1), (TURNS - 1, 0), (0, 5)]
+		keys += random.Random(0).sample(sorted(by_key), 50)
+		for f_name in [self.replay, self.compact]:
+			replay = watch_replay.Replay(f_name)
+			self.assertEqual(len(replay.frames), len(self.frames))
+			self.assertEqual(replay.frames_in_turn, {turn: FRAMES_PER_TURN + 1 for turn in range(TURNS)})
+			for key in keys:
+				frame = replay.frames[key]
+				self.assertEqual((frame.turn, frame.frame), key)
+				self.assertEqual(frame.data, by_key[key])
+			with self.assertRaises(KeyError):
+				replay.frames[(TURNS, 0)]
+
+
+if __name__ == '__main__':
+	unittest.main()
@@ -171,6 +171,28 @@ If you want to change the order just:
 2. Change the order of the list to be the priority you want
 
 ----------------------------------------------------------------------------------------
+-batch: Render many replays at once
+
+You can save a whole set of replays without opening any windows. Each replay is rendered in its own
+process (-j sets how many run at once, the default is one per cpu) and saved next to the replay with
+the same name:
+>py scripts/contributions/watch_replay.py -batch [REPLAY_FILE].replay [REPLAY_FILE].replay -w pillow
+>py scripts/contributions/watch_replay.py -batch all -j 4 -w ffmpeg
+
+-st (stride) only draws every n-th frame, which makes quick previews a lot faster to render:
+>py scripts/contributions/watch_replay.py -batch all -st 5 -w pillow
+
+Instead of checking every unit on the board every frame, only the units that were added, removed or
+changed since the last frame drawn are updated (these changes are worked out before rendering starts).
+The normal viewer does the same, working the changes out a turn at a time as you watch or scrub.
+
+----------------------------------------------------------------------------------------
+
+Compact replays (.creplay, made with replay_io.py) can be watched the same way as normal ones.
+
+The first time a replay is opened it is indexed (where every frame is in the file) and the index
+is saved next to it as [REPLAY].replay.idx, frames are then only read when they are shown. The
+.idx files can be deleted at any time, they are just made again.
 
 I cannot stress enough that this program is slow and unoptimized. Expect slowness :).
 I have included the same speeds on the normal visualizer in case people have better machines
@@ -190,6 +212,7 @@ try:
 	import os
 	import sys
 	import time
+	import re
 	import json
 	import glob
 	import random
@@ -197,6 +220,7 @@ try:
 	import argparse
 	import subprocess
 	import multiprocessing as mp
+	import replay_io
 except ImportError as e:
 	sys.stderr.write("WARNING: Module not found, full error:\n\n")
 	sys.stderr.write(e)
@@ -226,7 +250,7 @@ except ImportError:
 			sys.exit()
 
 
-global FILTER, ENCRYPTOR, DESTRUCTOR, PING, EMP, SCRAMBLER, MAX_HP, GET_VERTS, SPEED, BLIT
+global FILTER, ENCRYPTOR, DESTRUCTOR, PING, EMP, SCRAMBLER, MAX_HP, GET_VERTS, SPEED, STATE_TURNS, BLIT
 FILTER = 0     # wall
 ENCRYPTOR = 1  # support
 DESTRUCTOR = 2 # turret
@@ -235,6 +259,7 @@ EMP = 4        # demolisher
 SCRAMBLER = 5  # interceptor
 MAX_HP = {FILTER:60, ENCRYPTOR:30, DESTRUCTOR:75, PING:15, EMP:5, SCRAMBLER:40}
 SPEED = {'1':.25, '2':.5, '3':1, '4':2, '5':4, '6':8} # speed versions, key is user input (number)
+STATE_TURNS = 4 # number of turns of unit positions kept to work out the changes between frames
 
 
 # returns a rotated angle (created to make health deplete from vertical angle)
@@ -299,8 +324,44 @@ def parse_args():
 		'-kt', '--keep_trying',
 		action='store_true',
 		help="forces the save file to keep trying different writers until one works - flag only works if you are saving a replay\n\n")
+	ap.add_argument(
+		'-batch', '--batch',
+		nargs='+',
+		default=[],
+		help="render these replay files (or 'all' for every replay) without showing them, each is saved next to its replay\n\n")
+	ap.add_argument(
+		'-j', '--jobs',
+		type=int,
+		default=None,
+		help="number of replays to render at a time with -batch (default is one per cpu)\n\n")
+	ap.add_argument(
+		'-st', '--stride',
+		type=int,
+		default=1,
+		help="only draw every n-th frame (default 1) - for quick previews\n\n")
 	return vars(ap.parse_args())
 
+# turns the units of a frame (see Graph.cache_units) into {ID: (unit_type, (x, y), stability, p_index, count)}
+# count is the order of the unit on its location (the same count update_units gives it), also returns the
+# number of units on every location with more than 1
+def frame_units(units):
+	state = {}
+	loc = {}
+	for unit_type, pos, stability, p_index, ID in units:
+		loc[pos] = loc.get(pos, 0) + 1
+		state[ID] = (unit_type, pos, stability, p_index, loc[pos])
+	return state, {pos: n for pos, n in loc.items() if n > 1}
+
+# the changes between two frames: the IDs removed, the units added or changed and the stacked locations (None if they didn't change)
+def diff_units(prev, cur):
+	prev_state, prev_stacked = prev
+	cur_state, cur_stacked = cur
+	return {
+		'remove':	[ID for ID in prev_state if ID not in cur_state],
+		'update':	[(ID,) + unit for ID, unit in cur_state.items() if prev_state.get(ID) != unit],
+		'stacked':	None if cur_stacked == prev_stacked else cur_stacked
+	}
+
 # stores all information for a single unit on the graph
 class Unit:
 	def __init__(self, t, x, y, hp, p, ID, count, ax):
@@ -457,11 +518,8 @@ class PatchWrapper:
 
 	# removes a unit by ID from both the board and self.units
 	def remove_unit(self, ID):
-		for key, val in self.units.items():
-			if val == ID:
-				self.units[ID].remove()
-				self.units.pop(ID, None)
-				break
+		if ID in self.units:
+			self.units.pop(ID).remove()
 
 	# clears the entire board - not used anymore (very inefficient mode of updating)
 	def clear_board(self):
@@ -519,6 +577,21 @@ class PatchWrapper:
 				self.create_unit(unit_type, (x,y), stability, p_index, ID, self.loc[(x,y)], ax)
 
 
+	# only updates the units that changed since the last frame drawn (see diff_units)
+	def apply_diff(self, diff, ax):
+		for ID in diff['remove']:
+			self.remove_unit(ID)
+
+		for ID, unit_type, (x, y), stability, p_index, count in diff['update']:
+			if ID in self.units:
+				self.units[ID].update(x, y, stability, p_index, ID, count, ax)
+			else:
+				self.create_unit(unit_type, (x,y), stability, p_index, ID, count, ax)
+
+		if diff['stacked'] is not None:
+			self.loc = dict(diff['stacked'])
+			self.update_lbls(ax)
+
 	# adds the count lable to a position on the board
 	def plot_text(self, txt, pos, ax):
 		x,y = pos
@@ -676,7 +749,7 @@ class Plot:
 
 # this class contains all information regarding the entire window
 class Graph:
-	def __init__(self, data, frames_in_turn, healths, writers, keep_trying, save='', fh=None):
+	def __init__(self, data, frames_in_turn, healths, writers, keep_trying, save='', fh=None, stride=1, diffs=None):
 
 		# pretty clear, if no data, raise an Error
 		if len(data) < 1:
@@ -699,6 +772,10 @@ class Graph:
 		self.is_manual = False														# stores whether the user is manually moving the slider, keyboard, etc
 		self.single_advance = False													# true when user is scrubbing, but still want to move forward one frame
 		self.stop_slider_evt = False												# stop the slider event from triggereing when the code changes it
+		self.stride = stride														# number of frames the head moves every animation frame
+		self.diffs = diffs															# changes between the frames drawn, keys are (previous head, head) (see render_replay)
+		self.prev_head = None														# the head that was drawn last
+		self.states = {}															# units of the frames in the last few turns used, keys are turn then (turn, frame) (see get_state)
 
 		self.patches = PatchWrapper()												# creates the PatchWrapper object
 
@@ -710,7 +787,7 @@ class Graph:
 
 		# if in real-time, use a generator function to update number of frames, otherwise frames is static
 		if not self.real_time:
-			self.anim = animation.FuncAnimation(self.fig, self.update, init_func=self.init, frames=self.num_frames, interval=100, blit=BLIT, repeat=False)
+			self.anim = animation.FuncAnimation(self.fig, self.update, init_func=self.init, frames=self.num_frames // self.stride + 1, interval=100, blit=BLIT, repeat=False)
 		else:
 			self.frame_generator = self.gen_frames()
 			self.anim = animation.FuncAnimation(self.fig, self.update, init_func=self.init, frames=self.frame_generator, interval=100, blit=BLIT, repeat=False)
@@ -732,8 +809,8 @@ class Graph:
 		check_writer = {'ffmpeg':self.check_ffmpeg, 'pillow':self.check_pillow, 'html':lambda:True}
 
 		# seperate the file name from the extension
-		try: name, given_ext = save_name.split('.')
-		except ValueError: name, given_ext = save_name, ''
+		name, given_ext = os.path.splitext(save_name)
+		given_ext = given_ext.replace('.', '')
 
 		default = ['ffmpeg', 'pillow', 'html']		# this is the default order of priority for running a save
 
@@ -828,7 +905,7 @@ class Graph:
 		# try and get endStats, if not then file is still being created by engine (game is still running)
 		try:
 			last_frame = max(self.data, key=lambda f: (f[0], f[1]))			# the last frame of the entire match (single number)
-			endStats = self.data[last_frame].data['endStats']				# here is where the error would be thrown - if endStats exists
+			endStats = self.data[last_frame].data['endStats']				# here is where the error would be thrown - if endStats exists (only this frame is decoded)
 
 			# From here on we know we have all data for entire game - endStats exists
 
@@ -916,9 +993,7 @@ class Graph:
 			turn += 1
 		frame = val - 1
 
-		try:
-			self.data[(int(turn), int(frame))]
-		except KeyError:
+		if (int(turn), int(frame)) not in self.data:
 			if frame > 0:
 				frame -= 1
 
@@ -975,18 +1050,18 @@ class Graph:
 		if self.is_manual and not self.single_advance:
 			return
 
-		# while you can, increment the frame by 1
-		try:
-			self.data[self.head[0],self.head[1]+1]
-			self.head = self.head[0], self.head[1]+1
-		except KeyError:
+		# move forward stride frames (stopping at the last one)
+		for i in range(self.stride):
+			# while you can, increment the frame by 1
+			if (self.head[0], self.head[1]+1) in self.data:
+				self.head = self.head[0], self.head[1]+1
 			# outside of frames for that turn, try incrementing turn by 1
-			try:
-				self.data[self.head[0]+1,-1]
+			elif (self.head[0]+1, -1) in self.data:
 				self.head = self.head[0]+1, -1
-			except KeyError as e:
-				# outside both turns and frames - must be the end of game
+			# outside both turns and frames - must be the end of game
+			else:
 				self.end_of_game = True
+				break
 
 
 		# only update the slider if it exits
@@ -999,18 +1074,17 @@ class Graph:
 	def data_stream(self):
 		while True:
 
-			# everything in this block (real-time) is extrememly inefficient, becuase it has to constantly load new data
+			# in real-time only the lines the engine added since the last tick are read (see Replay.update)
 			if self.real_time:
-				self.info_ax.clear()															# clear the inforation side
-
-				self.fh.load_files(1,False,args['file']) 										# load latest replay (again)
-				replay = self.fh.get_last_replay()												# get latest replay (again)
+				replay = self.fh.get_last_replay()												# the replay being watched
 
 				# user paused game, don't advance
 				if not self.is_manual:
 					self.advance()
 
-				self.general_init(replay.frames, replay.frames_in_turn, replay.healths)			# call general initialization
+				if replay.update() > 0:
+					self.info_ax.clear()														# clear the inforation side
+					self.general_init(replay.frames, replay.frames_in_turn, replay.healths)		# call general initialization with the new frames
 
 				# this is for the first call - cannot send before yield is reached (function called)
 				try:
@@ -1024,9 +1098,18 @@ class Graph:
 			p1Stats = self.data[self.head]['p1Stats']
 			p2Stats = self.data[self.head]['p2Stats']
 
-			units = self.cache_units(p1Units, 1) + self.cache_units(p2Units, 2)						# format the unit data into how it is passed to my functions
-			self.patches.update_units(units, self.board_ax)											# update all the units
-			self.patches.update_lbls(self.board_ax)													# update all the unit count labels
+			# only update the units that changed since the last frame drawn (nothing if the head didn't move)
+			# the first frame is drawn by checking every unit
+			if self.prev_head is None:
+				units = self.cache_units(p1Units, 1) + self.cache_units(p2Units, 2)					# format the unit data into how it is passed to my functions
+				self.patches.update_units(units, self.board_ax)										# update all the units
+				self.patches.update_lbls(self.board_ax)												# update all the unit count labels
+			elif self.prev_head != self.head:
+				diff = self.diffs.get((self.prev_head, self.head)) if self.diffs is not None else None
+				if diff is None:
+					diff = diff_units(self.get_state(self.prev_head), self.get_state(self.head))
+				self.patches.apply_diff(diff, self.board_ax)
+			self.prev_head = self.head
 
 			self.info.update(p1Stats, p2Stats)														# update the information board
 			self.plot.update(self.frame_turn_to_val(self.head[0], self.head[1]))					# update the health plot
@@ -1036,6 +1119,22 @@ class Graph:
 
 			yield self.patches.values() + self.patches.lbls + self.info.lbls + self.plot.lines		# send all dynamic data to the matplotlib animator
 
+	# returns the units of a frame (see frame_units), the units of every frame in a turn are worked out
+	# the first time one of its frames is needed and only the last few turns are kept
+	def get_state(self, key):
+		turn = key[0]
+		if key not in self.states.get(turn, {}):
+			self.states.pop(turn, None)
+			if len(self.states) >= STATE_TURNS:
+				del self.states[next(iter(self.states))]
+
+			self.states[turn] = {}
+			for frame in range(-1, self.frames_in_turn.get(turn, 0) - 1):
+				if (turn, frame) in self.data:
+					data = self.data[(turn, frame)]
+					self.states[turn][(turn, frame)] = frame_units(self.cache_units(data['p1Units'], 1) + self.cache_units(data['p2Units'], 2))
+		return self.states[turn][key]
+
 	# called by the animator everytime it's interval finishes
 	def update(self, i=0):
 		# self.patches.clear_board()	# inefficient, no longer used
@@ -1052,7 +1151,8 @@ class Graph:
 			yield num
 
 	# format all of the raw unit data into how my functions recieve it
-	def cache_units(self, units, p_index):
+	@staticmethod
+	def cache_units(units, p_index):
 		filters, encryptors, destructors, pings, emps, scramblers, removes, upgrades = units
 		units_new = []
 		for unit in filters: units_new.append((FILTER, (unit[0], unit[1]), unit[2], p_index, unit[3]))
@@ -1067,12 +1167,8 @@ class Graph:
 	# checks if reached the final frame - if so, display winner
 	def check_end_of_game(self):
 		self.end_of_game = False
-		try:
-			self.data[self.head[0]+1,-1]
-		except KeyError as e:								# outside of turn limit
-			try:
-				self.data[self.head[0],self.head[1]+1]		
-			except KeyError as e:							# outside of frame limit
+		if (self.head[0]+1, -1) not in self.data:			# outside of turn limit
+			if (self.head[0], self.head[1]+1) not in self.data:	# outside of frame limit
 				self.end_of_game = True 					# must be end of game
 
 		if self.end_of_game: self.info.show_winner()		# show the winner if it is the end of game
@@ -1141,16 +1237,81 @@ class Frame:
 		return self.data[key]
 
 
+# dict-like access to the frames of a replay, frames are only read from the file and decoded when asked for
+# keys are (turn, frame) tuples and values are Frame objects, just like the dict this replaced
+class FrameIndex:
+	CACHE_SIZE = 64					# number of decoded frames kept around
+	TURN_CACHE_SIZE = 4				# number of decoded turns kept around for compact replays, however many frames they have
+
+	def __init__(self, f_name, compact=False):
+		self.fname = f_name
+		self.compact = compact			# whether the file is a compact replay (see replay_io.py)
+		self.offsets = {}				# keys are (turn, frame), values are (byte offset, length) of that line (or turn block when compact) in the file
+		self.cache = {}					# the most recently decoded frames
+		self.turn_cache = {}			# the most recently decoded turns of a compact replay, keys are turns and values are dicts of frame -> Frame
+
+	def add(self, turn, frame, offset, length):
+		self.offsets[(turn, frame)] = (offset, length)
+
+	def __len__(self):
+		return len(self.offsets)
+	def __iter__(self):
+		return iter(self.offsets)
+	def __contains__(self, key):
+		return key in self.offsets
+	def keys(self):
+		return self.offsets.keys()
+
+	def __getitem__(self, key):
+		if key in self.cache:
+			return self.cache[key]
+
+		offset, length = self.offsets[key]		# raises the KeyError callers expect when the frame doesn't exist
+		if self.compact:
+			# a compact block holds the whole turn, so the whole turn is decoded and cached at once
+			# (caching its frames one by one would evict the start of turns longer than CACHE_SIZE)
+			turn = self.turn_cache.get(key[0])
+			if turn is None:
+				turn = {}
+				for data in replay_io.decode_turn(replay_io.read_block(self.fname, offset, length)):
+					turn[data['turnInfo'][2]] = Frame(data['turnInfo'][1], data['turnInfo'][2], data)
+				if len(self.turn_cache) >= self.TURN_CACHE_SIZE:
+					del self.turn_cache[next(iter(self.turn_cache))]
+				self.turn_cache[key[0]] = turn
+			return turn[key[1]]
+		else:
+			with open(self.fname, 'rb') as f:
+				f.seek(offset)
+				self.add_to_cache(Frame(key[0], key[1], json.loads(f.read(length))))
+		return self.cache[key]
+
+	def add_to_cache(self, frame):
+		if len(self.cache) >= self.CACHE_SIZE:
+			del self.cache[next(iter(self.cache))]
+		self.cache[(frame.turn, frame.frame)] = frame
+
+
 # Stores data from a single replay
+# Instead of decoding every frame, the file is scanned once for the byte offset of every (turn, frame) and the
+# health of both players, which is saved next to the replay ([REPLAY].replay.idx) so opening it again is instant.
+# When the replay is still being written, update() only reads the lines added since the last call.
 class Replay:
+	INDEX_VERSION = 1
+	TURN_INFO = re.compile(rb'"turnInfo"\s*:\s*\[\s*-?\d+\s*,\s*(-?\d+)\s*,\s*(-?\d+)')
+	P1_HEALTH = re.compile(rb'"p1Stats"\s*:\s*\[\s*([-+.\deE]+)')
+	P2_HEALTH = re.compile(rb'"p2Stats"\s*:\s*\[\s*([-+.\deE]+)')
+
 	def __init__(self, f_name):
 		self.fname = f_name 			# the file name of the replay
-		self.ref = None					# stores the raw dict data as a reference
-		self.frames = {}				# dict containing all data, keys are turn, frame tuple with Frame objects as values
+		self.compact = replay_io.is_compact(f_name)	# whether the file is a compact replay (see replay_io.py)
+		self.frames = FrameIndex(f_name, self.compact)	# dict-like, keys are turn, frame tuple with Frame objects as values (decoded when used)
 		self.frames_in_turn = {}		# number of frames in each turn
 		self.healths = ([], [])			# contains the healths for player1 and player2
+		self.size = 0					# number of bytes of the file that have been indexed
+		self.entries = []				# [turn, frame, offset, length, p1 health, p2 health] for every indexed frame
+		self.finished = False			# whether the last frame (with endStats) has been read
 
-		self.load_data()				# handles loading all the data from file into python variables
+		self.load_data()				# handles indexing the file (or loading the saved index)
 
 	def __eq__(self, other):
 		return self.fname == other.fname
@@ -1161,32 +1322,89 @@ class Replay:
 	def __repr__(self):
 		return self.__string()
 
-	# loads all data from a replay into the python variables
+	def index_path(self):
+		return self.fname + '.idx'
+
+	# loads the saved index if it matches the file, then indexes anything that was added after it
 	def load_data(self):
-		with open(self.fname) as f:
-			i = 0
+		try:
+			with open(self.index_path(), 'r') as f:
+				index = json.load(f)
+			if index['version'] == self.INDEX_VERSION and index['size'] <= os.path.getsize(self.fname):
+				for entry in index['entries']:
+					self.add_entry(*entry)
+				self.size = index['size']
+				self.finished = index['finished']
+		except (OSError, ValueError, KeyError, TypeError):
+			pass
+
+		self.update()
+
+	# reads the lines added to the file since the last call (all of it the first time), returns the number of new frames
+	def update(self):
+		if self.finished:
+			return 0
+
+		added = self.update_compact() if self.compact else self.update_lines()
+
+		# the file won't change anymore once the game is over, so the index can be saved
+		if added > 0 and self.finished:
+			self.save_index()
+		return added
+
+	# indexes the lines of a normal replay, only complete lines are used
+	def update_lines(self):
+		added = 0
+		with open(self.fname, 'rb') as f:
+			f.seek(self.size)
 			for line in f:
-				line = line.replace("\n", "")
-				line = line.replace("\t", "")
-
-				if (line != ''):
-					data = json.loads(line)
-
+				# a line without a newline may still be being written by the engine, stop and try again next time
+				if not line.endswith(b'\n'):
 					try:
-						data['debug']
-						self.ref = data
-					except:
-						turn_num = data['turnInfo'][1]
-						frame_num = data['turnInfo'][2]
-						self.frames[(turn_num, frame_num)] = Frame(turn_num, frame_num, data)
+						json.loads(line)
+					except ValueError:
+						break
+
+				turn_info = self.TURN_INFO.search(line)
+				if turn_info is not None:
+					h1 = float(self.P1_HEALTH.search(line).group(1))
+					h2 = float(self.P2_HEALTH.search(line).group(1))
+					self.add_entry(int(turn_info.group(1)), int(turn_info.group(2)), self.size, len(line), h1, h2)
+					self.finished = b'"endStats"' in line
+					added += 1
+				self.size += len(line)
+		return added
+
+	# indexes the turn blocks of a compact replay, every frame of a turn points to the block of that turn
+	def update_compact(self):
+		added = 0
+		for offset, length, block in replay_io.iter_blocks(self.fname, self.size):
+			if isinstance(block, list):
+				for data in replay_io.decode_turn(block):
+					self.add_entry(data['turnInfo'][1], data['turnInfo'][2], offset, length, data['p1Stats'][0], data['p2Stats'][0])
+					self.finished = 'endStats' in data
+					added += 1
+			self.size = offset + length
+		return added
+
+	def add_entry(self, turn, frame, offset, length, h1, h2):
+		self.entries.append([turn, frame, offset, length, h1, h2])
+		self.frames.add(turn, frame, offset, length)
+
+		self.healths[0].append(h1)
+		self.healths[1].append(h2)
 
-						self.healths[0].append(data['p1Stats'][0])
-						self.healths[1].append(data['p2Stats'][0])
+		try:
+			self.frames_in_turn[turn] += 1
+		except KeyError:
+			self.frames_in_turn[turn] = 1
 
-						try:
-							self.frames_in_turn[turn_num] += 1
-						except KeyError:
-							self.frames_in_turn[turn_num] = 1
+	def save_index(self):
+		try:
+			with open(self.index_path(), 'w') as f:
+				json.dump({'version': self.INDEX_VERSION, 'size': self.size, 'finished': self.finished, 'entries': self.entries}, f, separators=(',', ':'))
+		except OSError as e:
+			sys.stderr.write('Could not save replay index: {}\n'.format(str(e)))
 
 # handles opening multiple games (replays)
 class FileHandler:
@@ -1208,6 +1426,8 @@ class FileHandler:
 	def __latest_replays(self, num=1, a=False):
 		replay_dir = '{}/../../replays/'.format(os.path.dirname(os.path.realpath(__file__)))
 		files = glob.glob('{}*.replay'.format(replay_dir))
+		# compact replays (see replay_io.py) are only used when the original is gone
+		files += [f for f in glob.glob('{}*{}'.format(replay_dir, replay_io.EXTENSION)) if os.path.splitext(f)[0] + '.replay' not in files]
 		files = sorted(files, key=os.path.getctime, reverse=True)
 		if a:
 			return files
@@ -1226,6 +1446,53 @@ class FileHandler:
 				self.replays.append(Replay(f_name))
 
 
+# works out the changes between every pair of frames that will be drawn (moving stride frames at a time)
+# keys are (previous head, head) like Graph.data_stream looks them up, the first frame is always drawn in full
+def precompute_diffs(replay, stride=1):
+	keys = list(replay.frames)
+	keys = keys[::stride] + ([keys[-1]] if (len(keys) - 1) % stride != 0 else [])
+
+	diffs = {}
+	prev = None
+	for prev_key, key in zip([None] + keys, keys):
+		frame = replay.frames[key]
+		cur = frame_units(Graph.cache_units(frame['p1Units'], 1) + Graph.cache_units(frame['p2Units'], 2))
+		if prev is not None:
+			diffs[(prev_key, key)] = diff_units(prev, cur)
+		prev = cur
+	return diffs
+
+# renders a single replay to a file without opening a window, run in a worker process by render_batch
+def render_replay(job):
+	f_name, writers, keep_trying, stride, blit = job
+	global BLIT
+	BLIT = blit
+
+	plt.switch_backend('Agg')									# draw off screen, there is no window to show
+	try:
+		replay = Replay(f_name)
+		save = os.path.splitext(f_name)[0]
+		Graph(replay.frames, replay.frames_in_turn, replay.healths, writers, keep_trying, save=save, stride=stride, diffs=precompute_diffs(replay, stride))
+	except Exception as e:
+		print ('Failed to render {}: {}'.format(f_name, str(e)))
+	finally:
+		plt.close('all')
+
+# renders every replay given in worker processes (the 'all' keyword renders every replay)
+def render_batch(f_names, writers, keep_trying, stride=1, jobs=None, blit=False):
+	if 'all' in f_names:
+		fh = FileHandler()
+		fh.load_files(a=True)
+		f_names = [str(replay) for replay in fh.get_replays()]
+	else:
+		f_names = [f_name if f_name.find('replays') != -1 else 'replays/'+f_name for f_name in f_names]
+
+	print ('Rendering {} replays'.format(len(f_names)))
+	with mp.Pool(jobs) as pool:
+		pool.map(render_replay, [(f_name, writers, keep_trying, stride, blit) for f_name in f_names], chunksize=1)
+	print ('Finished rendering all replays!')
+
+
 # This is all almost directly copied from run_match.py
 
 # Runs a single game
@@ -1291,7 +1558,10 @@ def main(args):
 	writers = args['writers']		# get save modes
 	keep_trying = args['keep_trying']		# get whether to keep trying writer types
 
-	if args['run_match'][0] != 'empty':
+	if len(args['batch']) > 0:
+		# render every replay in the batch without showing anything
+		render_batch(args['batch'], writers, keep_trying, max(1, args['stride']), args['jobs'], BLIT)
+	elif args['run_match'][0] != 'empty':
 		# inside here we are now running a match and displaying real-time data
 
 		# warn the user about run-time and saving
@@ -1336,7 +1606,7 @@ def main(args):
 		fh.load_files(1,False,args['file'])															# load latest replay
 		replay = fh.get_last_replay()																# get latest replay
 
-		animatedReplay = Graph(replay.frames, replay.frames_in_turn, replay.healths, writers, keep_trying, save=save)		# create our Graph object
+		animatedReplay = Graph(replay.frames, replay.frames_in_turn, replay.healths, writers, keep_trying, save=save, stride=max(1, args['stride']))		# create our Graph object
 
 
 if __name__ == '__main__':